@@ -53,3 +53,11 @@ class ReapplyCertificateRequest(BaseModel):
 
     certificate_id: str = Field(..., min_length=1)
     force_renewal: bool = False
+
+
+class ConsolidateCertificatesRequest(BaseModel):
+    """SAN 合并签发：默认只返回规划；`dry_run=False` 时提交合并订单到签发队列。"""
+
+    certificate_ids: Optional[list[str]] = Field(None, description="限定参与规划的证书；为空表示全部")
+    dry_run: bool = True
+    force_renewal: bool = False
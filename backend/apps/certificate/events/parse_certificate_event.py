@@ -9,6 +9,8 @@ from typing import Any, Optional
 class ParseCertificateEvent:
     certificate_id: str
     timestamp: Optional[str] = None
+    # 合并订单写回的行：证书覆盖整组域名，只刷新有效期 / 签发者，不用证书 SAN 覆盖行自己的 sans
+    keep_sans: bool = False
 
     def __post_init__(self) -> None:
         if self.timestamp is None:
@@ -19,6 +21,7 @@ class ParseCertificateEvent:
         return cls(
             certificate_id=data.get("certificate_id", ""),
             timestamp=data.get("timestamp"),
+            keep_sans=bool(data.get("keep_sans", False)),
         )
 
     def to_dict(self) -> dict[str, Any]:
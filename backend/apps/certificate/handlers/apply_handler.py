@@ -1,5 +1,5 @@
 # coding=utf-8
-"""POST /vault/tls/apply — 新建证书（Certbot 签发后写入 DB）。"""
+"""POST /vault/tls/apply — 新建证书（入签发队列，返回 job_id；Certbot 签发后写入 DB）。"""
 from __future__ import annotations
 
 import asyncio
@@ -19,7 +19,7 @@ async def apply_new(
     req: ApplyCertificateRequest,
     svc: CertificateService = Depends(get_certificate_service),
 ) -> CertificateVo:
-    # Certbot 使用 subprocess.run，必须放到线程池，否则会阻塞 asyncio 事件环（登录等 API 全部卡住）。
+    # 校验含 DB 查询，放线程池；签发本身进入 IssuanceQueue，立即返回 job_id。
     r = await asyncio.to_thread(
         svc.apply_new_certificate,
         domain=req.domain,
@@ -0,0 +1,23 @@
+# coding=utf-8
+"""POST /vault/tls/consolidation — 按 (注册域名, 邮箱) 规划 SAN 合并签发；`dry_run=False` 时提交合并订单。"""
+from __future__ import annotations
+
+import asyncio
+
+from fastapi import APIRouter, Depends
+
+from apps.certificate.dto.certificate_request_dto import ConsolidateCertificatesRequest
+from apps.certificate.handlers.deps import get_san_consolidator
+from apps.certificate.services.san_consolidation import SanConsolidationPlanner
+
+router = APIRouter()
+
+
+@router.post("/consolidation")
+async def consolidate_certificates(
+    req: ConsolidateCertificatesRequest,
+    planner: SanConsolidationPlanner = Depends(get_san_consolidator),
+) -> dict:
+    if req.dry_run:
+        return await asyncio.to_thread(planner.propose, req.certificate_ids)
+    return await asyncio.to_thread(planner.execute, req.certificate_ids, req.force_renewal)
@@ -4,6 +4,7 @@ from __future__ import annotations
 from fastapi import HTTPException, Request
 
 from apps.certificate.services.certificate_service import CertificateService
+from apps.certificate.services.san_consolidation import SanConsolidationPlanner
 
 
 def get_certificate_service(request: Request) -> CertificateService:
@@ -11,3 +12,10 @@ def get_certificate_service(request: Request) -> CertificateService:
     if s is None:
         raise HTTPException(status_code=503, detail="certificate_service not ready")
     return s
+
+
+def get_san_consolidator(request: Request) -> SanConsolidationPlanner:
+    s = getattr(request.app.state, "san_consolidator", None)
+    if s is None:
+        raise HTTPException(status_code=503, detail="san_consolidator not ready")
+    return s
@@ -0,0 +1,21 @@
+# coding=utf-8
+"""GET /vault/tls/jobs/{job_id} — 查询 apply / reapply 签发任务状态；完成后 `result` 与原同步接口响应一致。"""
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from apps.certificate.handlers.deps import get_certificate_service
+from apps.certificate.services.certificate_service import CertificateService
+
+router = APIRouter()
+
+
+@router.get("/jobs/{job_id}")
+async def issuance_job(
+    job_id: str,
+    svc: CertificateService = Depends(get_certificate_service),
+) -> dict:
+    r = svc.get_issuance_job(job_id)
+    if not r:
+        raise HTTPException(status_code=404, detail="Not found")
+    return r
@@ -1,5 +1,5 @@
 # coding=utf-8
-"""POST /vault/tls/reapply — 按证书 ID 从库中读取信息后重新签发并更新。"""
+"""POST /vault/tls/reapply — 按证书 ID 从库中读取信息后入签发队列，重新签发并更新。"""
 from __future__ import annotations
 
 import asyncio
@@ -5,11 +5,13 @@ from __future__ import annotations
 from fastapi import APIRouter
 
 from apps.certificate.handlers.apply_handler import router as apply_router
+from apps.certificate.handlers.consolidation_handler import router as consolidation_router
 from apps.certificate.handlers.reapply_handler import router as reapply_router
 from apps.certificate.handlers.create_handler import router as create_router
 from apps.certificate.handlers.delete_handler import router as delete_router
 from apps.certificate.handlers.detail_handler import router as detail_router
 from apps.certificate.handlers.invalidate_cache_handler import router as invalidate_cache_router
+from apps.certificate.handlers.job_handler import router as job_router
 from apps.certificate.handlers.list_handler import router as list_router
 from apps.certificate.handlers.parse_preview_handler import router as parse_preview_router
 from apps.certificate.handlers.search_handler import router as search_router
@@ -22,6 +24,8 @@ router.include_router(detail_router)
 router.include_router(invalidate_cache_router)
 router.include_router(apply_router)
 router.include_router(reapply_router)
+router.include_router(job_router)
+router.include_router(consolidation_router)
 router.include_router(create_router)
 router.include_router(update_router)
 router.include_router(delete_router)
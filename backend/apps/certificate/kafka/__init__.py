@@ -1,10 +1,12 @@
 from .certificate_kafka_handler import CertificateKafkaHandler
 from .certificate_pipeline import CertificatePipeline
 from .event_router import KafkaEventRouter, setup_kafka_routes
+from .outbox_relay import OutboxRelay
 
 __all__ = [
     "CertificateKafkaHandler",
     "CertificatePipeline",
     "KafkaEventRouter",
+    "OutboxRelay",
     "setup_kafka_routes",
 ]
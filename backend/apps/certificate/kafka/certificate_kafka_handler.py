@@ -2,7 +2,6 @@
 """证书相关 Kafka 事件处理。"""
 from __future__ import annotations
 
-import asyncio
 import logging
 from typing import Any
 
@@ -29,18 +28,12 @@ class CertificateKafkaHandler:
         self.certificate_service = certificate_service
         self.file_service = file_service
 
-    def process_read_certificate_file(self, event_data: dict[str, Any]) -> None:
+    async def process_read_certificate_file(self, event_data: dict[str, Any]) -> None:
+        """async handler：由 Consumer 自有事件环直接 await。"""
         try:
             event = OperationRefreshEvent.from_dict(event_data)
             logger.info("Kafka refresh folders: store=%s trigger=%s", event.store, event.trigger)
-            try:
-                loop = asyncio.get_event_loop()
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-            loop.run_until_complete(
-                self.file_service.read_folders_and_store_certificates(store=event.store)
-            )
+            await self.file_service.read_folders_and_store_certificates(store=event.store)
         except Exception as e:  # noqa: BLE001
             logger.error("process_read_certificate_file: %s", e, exc_info=True)
             raise
@@ -56,7 +49,7 @@ class CertificateKafkaHandler:
     def process_parse_certificate(self, event_data: dict[str, Any]) -> None:
         try:
             event = ParseCertificateEvent.from_dict(event_data)
-            self.certificate_service.parse_certificate(event.certificate_id)
+            self.certificate_service.parse_certificate(event.certificate_id, keep_sans=event.keep_sans)
         except Exception as e:  # noqa: BLE001
             logger.error("process_parse_certificate: %s", e, exc_info=True)
             raise
@@ -82,13 +75,9 @@ class CertificateKafkaHandler:
     def process_export_certificate(self, event_data: dict[str, Any]) -> None:
         try:
             event = ExportCertificateEvent.from_dict(event_data)
-            cert_detail = self.certificate_service.database_repo.get_certificate_by_id(
-                event.certificate_id
-            )
-            if not cert_detail:
-                logger.error("证书不存在: %s", event.certificate_id)
-                return
-            self.file_service.export_single_certificate(event.certificate_id)
+            result = self.file_service.export_single_certificate(event.certificate_id)
+            if not result.get("success"):
+                logger.error("process_export_certificate %s: %s", event.certificate_id, result.get("message"))
         except Exception as e:  # noqa: BLE001
             logger.error("process_export_certificate: %s", e, exc_info=True)
             raise
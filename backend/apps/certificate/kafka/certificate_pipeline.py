@@ -1,5 +1,5 @@
 # coding=utf-8
-"""证书域 Kafka 事件发送（headers 键 `event_type` 与 Consumer 一致）。"""
+"""证书域事件发送：优先 Kafka（headers 键 `event_type` 与 Consumer 一致），Kafka 不可用时投递进程内总线。"""
 from __future__ import annotations
 
 import logging
@@ -15,7 +15,7 @@ from apps.certificate.events import (
     ParseCertificateEvent,
 )
 from config.types import DatabaseConfig
-from utils import KafkaClient
+from utils import KafkaClient, LocalEventBus
 
 logger = logging.getLogger(__name__)
 
@@ -27,14 +27,40 @@ class CertificatePipeline:
         self,
         db_config: Optional[DatabaseConfig] = None,
         kafka_client: Optional[KafkaClient] = None,
+        local_bus: Optional[LocalEventBus] = None,
     ) -> None:
         self.db_config = db_config
         self.kafka_client = kafka_client
+        self.local_bus = local_bus
+
+    @property
+    def kafka_ready(self) -> bool:
+        return bool(self.db_config and self.kafka_client and self.kafka_client.enable_kafka)
+
+    @property
+    def has_destination(self) -> bool:
+        return self.kafka_ready or self.local_bus is not None
+
+    def publish(self, event_type: str, data: dict) -> bool:
+        """OutboxRelay 投递入口（参数顺序与 outbox 行一致）。"""
+        return self._send(data, event_type)
+
+    @staticmethod
+    def build_cache_invalidate_event(trigger: str = "manual") -> tuple[str, dict]:
+        return EventType.CACHE_INVALIDATE, CacheInvalidateEvent(stores=[], trigger=trigger).to_dict()
+
+    @staticmethod
+    def build_parse_certificate_event(certificate_id: str, keep_sans: bool = False) -> tuple[str, dict]:
+        ev = ParseCertificateEvent(certificate_id=certificate_id, keep_sans=keep_sans)
+        return EventType.PARSE_CERTIFICATE, ev.to_dict()
 
     def _send(self, data: dict, event_type: str) -> bool:
-        if not self.db_config or not self.kafka_client or not self.kafka_client.enable_kafka:
+        if not self.kafka_ready:
+            if self.local_bus is not None:
+                return self.local_bus.publish(event_type, data)
             logger.warning("Kafka 未就绪，跳过发送")
             return False
+        assert self.db_config and self.kafka_client
         topic = self.db_config.KAFKA_EVENT_TOPIC
         self.kafka_client.ensure_topic_exists(topic)
         return self.kafka_client.send(
@@ -48,12 +74,12 @@ class CertificatePipeline:
         return self._send(ev.to_dict(), EventType.OPERATION_REFRESH)
 
     def send_cache_invalidate_event(self, trigger: str = "manual") -> bool:
-        ev = CacheInvalidateEvent(stores=[], trigger=trigger)
-        return self._send(ev.to_dict(), EventType.CACHE_INVALIDATE)
+        event_type, data = self.build_cache_invalidate_event(trigger)
+        return self._send(data, event_type)
 
-    def send_parse_certificate_event(self, certificate_id: str) -> bool:
-        ev = ParseCertificateEvent(certificate_id=certificate_id)
-        return self._send(ev.to_dict(), EventType.PARSE_CERTIFICATE)
+    def send_parse_certificate_event(self, certificate_id: str, keep_sans: bool = False) -> bool:
+        event_type, data = self.build_parse_certificate_event(certificate_id, keep_sans)
+        return self._send(data, event_type)
 
     def send_delete_folder_event(self, store: str, folder_name: str) -> bool:
         ev = DeleteFolderEvent(store=store, folder_name=folder_name)
@@ -14,7 +14,10 @@ logger = logging.getLogger(__name__)
 class KafkaEventRouter:
     def __init__(self, certificate_kafka_handler: Optional[CertificateKafkaHandler] = None) -> None:
         self.certificate_kafka_handler = certificate_kafka_handler
-        self.routes: dict[str, Callable[[dict[str, Any]], None]] = {}
+        # 值可为同步函数或 async 函数（Consumer 在自有事件环上 await）
+        self.routes: dict[str, Callable[[dict[str, Any]], Any]] = {}
+        # 幂等事件 → 合并 key（同 key 在窗口内/执行中只跑一次）
+        self.coalesce_keys: dict[str, Callable[[dict[str, Any]], str]] = {}
 
     def register_routes(self) -> None:
         h = self.certificate_kafka_handler
@@ -26,6 +29,8 @@ class KafkaEventRouter:
         self.routes[EventType.DELETE_FOLDER] = h.process_delete_folder
         self.routes[EventType.DELETE_FILE_OR_FOLDER] = h.process_delete_file_or_folder
         self.routes[EventType.EXPORT_CERTIFICATE] = h.process_export_certificate
+        self.coalesce_keys[EventType.CACHE_INVALIDATE] = lambda _data: "all"
+        self.coalesce_keys[EventType.OPERATION_REFRESH] = lambda data: str(data.get("store") or "websites")
         logger.info("Kafka 路由注册: %s 条", len(self.routes))
 
 
@@ -0,0 +1,99 @@
+# coding=utf-8
+"""Outbox relay：后台线程批量领取 event_outbox 行并经 CertificatePipeline 投递（Kafka 或本地总线）。
+
+写入方提交事务后调用 `notify()` 立即唤醒；否则按 `interval_ms` 兜底轮询（含失败退避后的重试行与其他实例写入的行）。
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from typing import Optional
+
+from apps.certificate.kafka.certificate_pipeline import CertificatePipeline
+from apps.certificate.repos.event_outbox_repository import EventOutboxRepository
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxRelay:
+    def __init__(
+        self,
+        outbox_repo: EventOutboxRepository,
+        pipeline: CertificatePipeline,
+        batch_size: int = 100,
+        interval_ms: int = 1000,
+    ) -> None:
+        self.outbox_repo = outbox_repo
+        self.pipeline = pipeline
+        self.batch_size = max(1, batch_size)
+        self.interval_s = max(50, interval_ms) / 1000.0
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.published_total = 0
+        self.failed_total = 0
+
+    def start(self) -> bool:
+        if self._thread is not None:
+            return True
+        self._stopping.clear()
+        # 启动即排空一次：接管上次进程退出前未投递的行
+        self._wakeup.set()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="OutboxRelay")
+        self._thread.start()
+        return True
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.wait(timeout=self.interval_s)
+            self._wakeup.clear()
+            if self._stopping.is_set():
+                break
+            self.drain()
+
+    def drain(self) -> int:
+        """连续领取直到不足一批；返回本轮投递成功数。"""
+        total = 0
+        while not self._stopping.is_set():
+            published, failed = self.outbox_repo.relay_batch(self.batch_size, self.pipeline.publish)
+            total += published
+            self.published_total += published
+            self.failed_total += failed
+            if failed:
+                logger.warning(
+                    json.dumps(
+                        {
+                            "task": "outbox_relay",
+                            "event": "publish_failed",
+                            "published": published,
+                            "failed": failed,
+                        },
+                        ensure_ascii=False,
+                    )
+                )
+            if published + failed < self.batch_size or failed:
+                break
+        return total
+
+    def stop(self, timeout: float = 5) -> None:
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._wakeup.set()
+        self._thread.join(timeout=timeout)
+        self._thread = None
+        logger.info(
+            json.dumps(
+                {
+                    "task": "outbox_relay",
+                    "event": "stopped",
+                    "published_total": self.published_total,
+                    "failed_total": self.failed_total,
+                },
+                ensure_ascii=False,
+            )
+        )
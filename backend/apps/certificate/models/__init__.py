@@ -1,3 +1,4 @@
+from .event_outbox import EventOutbox
 from .tls_certificate import TLSCertificate
 
-__all__ = ["TLSCertificate"]
+__all__ = ["EventOutbox", "TLSCertificate"]
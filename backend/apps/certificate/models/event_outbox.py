@@ -0,0 +1,23 @@
+# coding=utf-8
+"""事务性 outbox：与证书写入同一事务落库，由 OutboxRelay 批量投递到 Kafka / 本地事件总线后删除。"""
+from __future__ import annotations
+
+from sqlalchemy import JSON, BigInteger, Column, DateTime, Index, Integer, String, Text, func
+
+from apps.certificate.models.base import Base
+
+
+class EventOutbox(Base):
+    __tablename__ = "event_outbox"
+    __table_args__ = (
+        Index("idx_event_outbox_available", "available_at", "id"),
+        {"mysql_engine": "InnoDB", "mysql_charset": "utf8mb4"},
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    event_type = Column(String(64), nullable=False)
+    payload = Column(JSON, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    available_at = Column(DateTime, server_default=func.now(), nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
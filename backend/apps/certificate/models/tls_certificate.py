@@ -11,7 +11,11 @@ class TLSCertificate(Base):
     __tablename__ = "tls_certificates"
     __table_args__ = (
         UniqueConstraint("domain", name="uq_tls_certificates_domain"),
-        Index("idx_tls_certificates_domain", "domain"),
+        Index("idx_tls_certificates_created_at_id", "created_at", "id"),
+        Index("idx_tls_certificates_not_after", "not_after"),
+        Index("idx_tls_certificates_status_not_after", "status", "not_after"),
+        Index("idx_tls_certificates_is_valid_not_after", "is_valid", "not_after"),
+        Index("idx_tls_certificates_folder_name", "folder_name"),
         {"mysql_engine": "InnoDB", "mysql_charset": "utf8mb4"},
     )
 
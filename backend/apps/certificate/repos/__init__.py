@@ -1,5 +1,11 @@
 from .certificate_cache_repo import CertificateCacheRepo
 from .certificate_repository import CertificateRepository
+from .event_outbox_repository import EventOutboxRepository
 from .tls_issue_repository import TlsIssueRepository
 
-__all__ = ["CertificateCacheRepo", "CertificateRepository", "TlsIssueRepository"]
+__all__ = [
+    "CertificateCacheRepo",
+    "CertificateRepository",
+    "EventOutboxRepository",
+    "TlsIssueRepository",
+]
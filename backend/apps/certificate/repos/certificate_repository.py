@@ -8,9 +8,58 @@ from typing import Any, Optional
 from enums import CertificateStatus
 from utils import MySQLSession
 from apps.certificate.models import TLSCertificate
+from apps.certificate.repos.event_outbox_repository import EventOutboxRepository, OutboxEvent
 
 logger = logging.getLogger(__name__)
 
+# 重新签发所需的列：续签规划与 SAN 合并规划共用
+_ISSUANCE_COLUMNS = (
+    TLSCertificate.id,
+    TLSCertificate.domain,
+    TLSCertificate.email,
+    TLSCertificate.sans,
+    TLSCertificate.folder_name,
+    TLSCertificate.not_after,
+)
+
+
+# 导出后按证书解析结果回写的列（批量导出仅回写真正变化的列）
+EXPORT_METADATA_COLUMNS = (
+    "status",
+    "sans",
+    "issuer",
+    "not_before",
+    "not_after",
+    "is_valid",
+    "days_remaining",
+)
+
+_EXPORT_COLUMNS = (
+    TLSCertificate.id,
+    TLSCertificate.domain,
+    TLSCertificate.folder_name,
+    TLSCertificate.certificate,
+    TLSCertificate.private_key,
+    TLSCertificate.status,
+    TLSCertificate.sans,
+    TLSCertificate.issuer,
+    TLSCertificate.not_before,
+    TLSCertificate.not_after,
+    TLSCertificate.is_valid,
+    TLSCertificate.days_remaining,
+)
+
+
+def _issuance_row(r: Any) -> dict[str, Any]:
+    return {
+        "id": r.id,
+        "domain": r.domain,
+        "email": r.email,
+        "sans": r.sans or [],
+        "folder_name": r.folder_name,
+        "not_after": r.not_after,
+    }
+
 
 class CertificateRepository:
     def __init__(self, db_session: MySQLSession) -> None:
@@ -25,7 +74,12 @@ class CertificateRepository:
             with self.db_session.get_session() as session:
                 q = session.query(TLSCertificate)
                 total = q.count()
-                rows = q.order_by(TLSCertificate.created_at.desc()).offset(offset).limit(limit).all()
+                rows = (
+                    q.order_by(TLSCertificate.created_at.desc(), TLSCertificate.id.desc())
+                    .offset(offset)
+                    .limit(limit)
+                    .all()
+                )
                 out: list[dict[str, Any]] = []
                 for cert in rows:
                     out.append(
@@ -69,6 +123,43 @@ class CertificateRepository:
             logger.exception("get_certificate_by_id")
             return None
 
+    def get_certificates_for_export(self, certificate_ids: list[str]) -> list[dict[str, Any]]:
+        """一次查询取出导出所需的列；值保持原始类型（datetime / 枚举），便于与解析结果逐列比较。
+
+        数据库异常直接抛出，由调用方按导出失败处理（不能当作「证书不存在」）。
+        """
+        if not self.db_session.enable_mysql or not certificate_ids:
+            return []
+        with self.db_session.get_session() as session:
+            rows = (
+                session.query(*_EXPORT_COLUMNS)
+                .filter(TLSCertificate.id.in_(certificate_ids))
+                .all()
+            )
+            return [dict(r._mapping) for r in rows]
+
+    def update_export_metadata(self, changes: dict[str, dict[str, Any]]) -> int:
+        """{certificate_id: {列: 新值}}，单个事务内按 ID 回写；只接受 `EXPORT_METADATA_COLUMNS`。"""
+        if not self.db_session.enable_mysql or not changes:
+            return 0
+        try:
+            with self.db_session.get_session() as session:
+                certs = (
+                    session.query(TLSCertificate)
+                    .filter(TLSCertificate.id.in_(list(changes)))
+                    .all()
+                )
+                now = datetime.now()
+                for cert in certs:
+                    for column, value in changes[cert.id].items():
+                        if column in EXPORT_METADATA_COLUMNS:
+                            setattr(cert, column, value)
+                    cert.updated_at = now
+                return len(certs)
+        except Exception:  # noqa: BLE001
+            logger.exception("update_export_metadata")
+            return 0
+
     def get_certificate_by_domain(self, domain: str) -> Optional[dict[str, Any]]:
         if not self.db_session.enable_mysql:
             return None
@@ -136,7 +227,7 @@ class CertificateRepository:
                 )
                 total = q.count()
                 rows = (
-                    q.order_by(TLSCertificate.created_at.desc())
+                    q.order_by(TLSCertificate.created_at.desc(), TLSCertificate.id.desc())
                     .offset(offset)
                     .limit(limit)
                     .all()
@@ -232,7 +323,13 @@ class CertificateRepository:
         last_error_message: Optional[str] = None,
         last_error_time: Optional[datetime] = None,
         sans_changed: Optional[bool] = None,
+        outbox_events: Optional[list[OutboxEvent]] = None,
+        clear_last_error: bool = False,
     ) -> Optional[TLSCertificate]:
+        """`outbox_events` 非空时与本次更新同事务写入 event_outbox，单次提交。
+
+        `clear_last_error=True`（签发成功）时清空 last_error_*，与上面的 None 即「不修改」区分开。
+        """
         if not self.db_session.enable_mysql:
             return None
         try:
@@ -272,15 +369,18 @@ class CertificateRepository:
                     cert.last_error_message = last_error_message
                 if last_error_time is not None:
                     cert.last_error_time = last_error_time
+                if clear_last_error:
+                    cert.last_error_message = None
+                    cert.last_error_time = None
                 if sans_changed is not None:
                     cert.sans_changed = sans_changed
                 cert.updated_at = datetime.now()
-                cid = cert.id
-            with self.db_session.get_session() as session:
-                obj = session.query(TLSCertificate).filter(TLSCertificate.id == cid).first()
-                if obj:
-                    session.expunge(obj)
-                    return obj
+                if outbox_events:
+                    EventOutboxRepository.add_events(session, outbox_events)
+                session.flush()
+                session.refresh(cert)
+                session.expunge(cert)
+                return cert
         except Exception:  # noqa: BLE001
             logger.exception("update_certificate_by_id")
         return None
@@ -298,10 +398,12 @@ class CertificateRepository:
         days_remaining: Optional[int] = None,
         folder_name: Optional[str] = None,
         email: Optional[str] = None,
+        certificate_id: Optional[str] = None,
+        outbox_events: Optional[list[OutboxEvent]] = None,
     ) -> Optional[TLSCertificate]:
+        """`certificate_id` 可由调用方预生成，以便 `outbox_events`（如解析事件）引用并同事务提交。"""
         if not self.db_session.enable_mysql:
             return None
-        cert_id: Optional[str] = None
         try:
             with self.db_session.get_session() as session:
                 nc = TLSCertificate(
@@ -318,20 +420,60 @@ class CertificateRepository:
                     is_valid=is_valid,
                     days_remaining=days_remaining,
                 )
+                if certificate_id:
+                    nc.id = certificate_id
                 session.add(nc)
+                if outbox_events:
+                    EventOutboxRepository.add_events(session, outbox_events)
                 session.flush()
-                cert_id = nc.id
+                session.refresh(nc)
+                session.expunge(nc)
+                return nc
         except Exception:  # noqa: BLE001
             logger.exception("create_certificate")
             return None
-        if not cert_id:
-            return None
-        with self.db_session.get_session() as session:
-            obj = session.query(TLSCertificate).filter(TLSCertificate.id == cert_id).first()
-            if obj:
-                session.expunge(obj)
-                return obj
-        return None
+
+    def list_renewal_candidates(self, not_after_before: datetime, limit: int = 500) -> list[dict[str, Any]]:
+        """`not_after` 早于阈值的证书（走 idx_tls_certificates_not_after），最紧急的在前。"""
+        if not self.db_session.enable_mysql:
+            return []
+        try:
+            with self.db_session.get_session() as session:
+                rows = (
+                    session.query(*_ISSUANCE_COLUMNS)
+                    .filter(
+                        TLSCertificate.not_after.isnot(None),
+                        TLSCertificate.not_after < not_after_before,
+                    )
+                    .order_by(TLSCertificate.not_after.asc())
+                    .limit(limit)
+                    .all()
+                )
+                return [_issuance_row(r) for r in rows]
+        except Exception:  # noqa: BLE001
+            logger.exception("list_renewal_candidates")
+            return []
+
+    def list_consolidation_candidates(
+        self, certificate_ids: Optional[list[str]] = None, limit: int = 1000
+    ) -> list[dict[str, Any]]:
+        """SAN 合并规划的候选行（结构同 `list_renewal_candidates`）；不传 ID 时取全部填写了邮箱的证书。"""
+        if not self.db_session.enable_mysql:
+            return []
+        try:
+            with self.db_session.get_session() as session:
+                q = session.query(*_ISSUANCE_COLUMNS).filter(
+                    TLSCertificate.email.isnot(None), TLSCertificate.email != ""
+                )
+                if certificate_ids is not None:
+                    if not certificate_ids:
+                        return []
+                    q = q.filter(TLSCertificate.id.in_(certificate_ids))
+                rows = q.order_by(TLSCertificate.not_after.asc()).limit(limit).all()
+                return [_issuance_row(r) for r in rows]
+        except Exception:  # noqa: BLE001
+            logger.exception("list_consolidation_candidates")
+            return []
 
     def update_all_days_remaining(self) -> tuple[int, int, list[dict[str, Any]]]:
         if not self.db_session.enable_mysql:
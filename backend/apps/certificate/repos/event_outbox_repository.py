@@ -0,0 +1,107 @@
+"""事件 outbox MySQL 仓储：写入方与业务行同 session 追加，relay 以 SKIP LOCKED 短事务领取租约、事务外投递。"""
+from __future__ import annotations
+
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable
+
+from sqlalchemy.orm import Session
+
+from utils import MySQLSession
+from apps.certificate.models import EventOutbox
+
+logger = logging.getLogger(__name__)
+
+OutboxEvent = tuple[str, dict[str, Any]]
+
+_MAX_BACKOFF_SECONDS = 60
+# 领取后的租约：超时未结算（进程退出 / 投递卡住）的行到期后可被重新领取
+_CLAIM_LEASE_SECONDS = 300
+
+
+class EventOutboxRepository:
+    def __init__(self, db_session: MySQLSession) -> None:
+        self.db_session = db_session
+
+    @staticmethod
+    def add_events(session: Session, events: list[OutboxEvent]) -> None:
+        """在调用方事务内追加事件；随业务行一起提交或回滚。"""
+        for event_type, payload in events:
+            session.add(EventOutbox(event_type=event_type, payload=payload, attempts=0))
+
+    def relay_batch(self, limit: int, publish: Callable[[str, dict[str, Any]], bool]) -> tuple[int, int]:
+        """领取一批到期事件逐条投递：成功删除，失败按指数退避推迟；返回 (published, failed)。
+
+        分三步，投递期间不持有行锁或打开的事务：
+        1. 短事务 `FOR UPDATE SKIP LOCKED` 领取，并把 `available_at` 推后 `_CLAIM_LEASE_SECONDS` 作为租约
+           （多实例 relay 不会重复领取；进程中途退出时租约到期后由任一实例重新领取）；
+        2. 事务外逐条 `publish`；耗时超过租约的一半时停止，剩余行释放回队列；
+        3. 短事务删除成功行、为失败行记录退避。
+        """
+        if not self.db_session.enable_mysql:
+            return 0, 0
+        try:
+            claimed = self._claim(limit)
+        except Exception:  # noqa: BLE001
+            logger.exception("relay_batch claim")
+            return 0, 0
+        if not claimed:
+            return 0, 0
+        done: list[int] = []
+        failures: dict[int, str] = {}
+        deadline = time.monotonic() + _CLAIM_LEASE_SECONDS / 2
+        for row_id, event_type, payload in claimed:
+            if time.monotonic() >= deadline:
+                break
+            try:
+                ok = publish(event_type, payload)
+                error = None if ok else "publish returned False"
+            except Exception as e:  # noqa: BLE001
+                ok, error = False, str(e)
+            if ok:
+                done.append(row_id)
+            else:
+                failures[row_id] = error or ""
+        unattempted = [row_id for row_id, _t, _p in claimed if row_id not in failures and row_id not in done]
+        try:
+            self._settle(done, failures, unattempted)
+        except Exception:  # noqa: BLE001
+            # 已投递的行租约到期后会被重新投递（至少一次），消费端按幂等处理
+            logger.exception("relay_batch settle")
+        return len(done), len(failures)
+
+    def _claim(self, limit: int) -> list[tuple[int, str, dict[str, Any]]]:
+        with self.db_session.get_session() as session:
+            now = datetime.now()
+            rows = (
+                session.query(EventOutbox)
+                .filter(EventOutbox.available_at <= now)
+                .order_by(EventOutbox.id)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            lease_until = now + timedelta(seconds=_CLAIM_LEASE_SECONDS)
+            for row in rows:
+                row.available_at = lease_until
+            return [(row.id, row.event_type, dict(row.payload or {})) for row in rows]
+
+    def _settle(self, done: list[int], failures: dict[int, str], unattempted: list[int]) -> None:
+        if not done and not failures and not unattempted:
+            return
+        with self.db_session.get_session() as session:
+            now = datetime.now()
+            if done:
+                session.query(EventOutbox).filter(EventOutbox.id.in_(done)).delete(synchronize_session=False)
+            if unattempted:
+                session.query(EventOutbox).filter(EventOutbox.id.in_(unattempted)).update(
+                    {EventOutbox.available_at: now}, synchronize_session=False
+                )
+            if failures:
+                for row in session.query(EventOutbox).filter(EventOutbox.id.in_(list(failures))).all():
+                    row.attempts = (row.attempts or 0) + 1
+                    row.last_error = failures[row.id]
+                    row.available_at = now + timedelta(
+                        seconds=min(_MAX_BACKOFF_SECONDS, 2 ** min(row.attempts, 6))
+                    )
@@ -29,15 +29,7 @@ class TlsIssueRepository:
         force_renewal: bool = False,
     ) -> dict[str, Any]:
         try:
-            logger.info(
-                "TlsIssueRepository.apply_certificate domain=%s folder_name=%s "
-                "sans=%s force_renewal=%s webroot_param=%s",
-                domain,
-                folder_name,
-                sans,
-                force_renewal,
-                webroot,
-            )
+            self._log_start(domain, sans, webroot, folder_name, force_renewal)
             r = self._client.issue_certificate(
                 domain=domain,
                 email=email,
@@ -46,27 +38,78 @@ class TlsIssueRepository:
                 folder_name=folder_name,
                 force_renewal=force_renewal,
             )
-            if "status" not in r:
-                r["status"] = (
-                    CertificateStatus.SUCCESS.value if r.get("success") else CertificateStatus.FAIL.value
-                )
-            if r.get("success"):
-                logger.info("TlsIssueRepository.apply_certificate ok domain=%s", domain)
-            else:
-                logger.error(
-                    "TlsIssueRepository.apply_certificate fail domain=%s message=%s error=%s",
-                    domain,
-                    r.get("message"),
-                    r.get("error"),
-                )
-            return r
+            return self._normalize(domain, r)
         except Exception as e:  # noqa: BLE001
             logger.exception("apply_certificate")
-            return {
-                "success": False,
-                "message": str(e),
-                "certificate": None,
-                "private_key": None,
-                "status": CertificateStatus.FAIL.value,
-                "error": str(e),
-            }
+            return self._error(e)
+
+    async def apply_certificate_async(
+        self,
+        domain: str,
+        email: str,
+        sans: Optional[list[str]] = None,
+        webroot: Optional[str] = None,
+        folder_name: Optional[str] = None,
+        force_renewal: bool = False,
+    ) -> dict[str, Any]:
+        """与 `apply_certificate` 相同的结果结构；certbot 经 asyncio 子进程运行，不占用线程。"""
+        try:
+            self._log_start(domain, sans, webroot, folder_name, force_renewal)
+            r = await self._client.issue_certificate_async(
+                domain=domain,
+                email=email,
+                sans=sans,
+                webroot=webroot,
+                folder_name=folder_name,
+                force_renewal=force_renewal,
+            )
+            return self._normalize(domain, r)
+        except Exception as e:  # noqa: BLE001
+            logger.exception("apply_certificate_async")
+            return self._error(e)
+
+    @staticmethod
+    def _log_start(
+        domain: str,
+        sans: Optional[list[str]],
+        webroot: Optional[str],
+        folder_name: Optional[str],
+        force_renewal: bool,
+    ) -> None:
+        logger.info(
+            "TlsIssueRepository.apply_certificate domain=%s folder_name=%s "
+            "sans=%s force_renewal=%s webroot_param=%s",
+            domain,
+            folder_name,
+            sans,
+            force_renewal,
+            webroot,
+        )
+
+    @staticmethod
+    def _normalize(domain: str, r: dict[str, Any]) -> dict[str, Any]:
+        if "status" not in r:
+            r["status"] = (
+                CertificateStatus.SUCCESS.value if r.get("success") else CertificateStatus.FAIL.value
+            )
+        if r.get("success"):
+            logger.info("TlsIssueRepository.apply_certificate ok domain=%s", domain)
+        else:
+            logger.error(
+                "TlsIssueRepository.apply_certificate fail domain=%s message=%s error=%s",
+                domain,
+                r.get("message"),
+                r.get("error"),
+            )
+        return r
+
+    @staticmethod
+    def _error(e: Exception) -> dict[str, Any]:
+        return {
+            "success": False,
+            "message": str(e),
+            "certificate": None,
+            "private_key": None,
+            "status": CertificateStatus.FAIL.value,
+            "error": str(e),
+        }
@@ -1,3 +1,4 @@
 from .certificate_service import CertificateService
+from .issuance_queue import IssuanceQueue
 
-__all__ = ["CertificateService"]
+__all__ = ["CertificateService", "IssuanceQueue"]
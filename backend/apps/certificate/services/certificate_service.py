@@ -1,17 +1,25 @@
 """TLS 证书 Service。"""
 from __future__ import annotations
 
+import asyncio
+import functools
+import inspect
+import json
 import logging
-from typing import Any, Optional
+import uuid
+from typing import Any, Awaitable, Optional, Union
 
 from config.types import CertConfig, DatabaseConfig
 from enums import CertificateStatus
-from utils import extract_cert_info_from_pem_sync
+from utils import extract_cert_info_from_pem, extract_cert_info_from_pem_sync
 
 from apps.certificate.repos.certificate_cache_repo import CertificateCacheRepo
 from apps.certificate.repos.certificate_repository import CertificateRepository
 from apps.certificate.repos.tls_issue_repository import TlsIssueRepository
 from apps.certificate.kafka.certificate_pipeline import CertificatePipeline
+from apps.certificate.kafka.outbox_relay import OutboxRelay
+from apps.certificate.repos.event_outbox_repository import OutboxEvent
+from apps.certificate.services.issuance_queue import IssuanceQueue
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +35,11 @@ def _normalized_sans_set(sans: Any) -> frozenset[str]:
     return frozenset(out)
 
 
+def issuance_params(run: functools.partial[Any]) -> dict[str, Any]:
+    """签发任务的请求参数（即 partial 的关键字参数），签发队列据此判断是否为同一请求。"""
+    return dict(run.keywords)
+
+
 class CertificateService:
     def __init__(
         self,
@@ -36,6 +49,8 @@ class CertificateService:
         tls_repo: Optional[TlsIssueRepository],
         db_config: Optional[DatabaseConfig],
         cert_config: CertConfig,
+        outbox_relay: Optional[OutboxRelay] = None,
+        issuance_queue: Optional[IssuanceQueue] = None,
     ) -> None:
         self.database_repo = database_repo
         self.cache_repo = cache_repo
@@ -44,6 +59,31 @@ class CertificateService:
         self.db_config = db_config
         self.cert_config = cert_config
         self.base_dir = cert_config.BASE_DIR
+        self.outbox_relay = outbox_relay
+        self.issuance_queue = issuance_queue
+
+    def _outbox_events(
+        self, certificate_id: str, trigger: str, keep_sans: bool = False
+    ) -> Optional[list[OutboxEvent]]:
+        """启用 outbox 时返回随证书写入同事务落库的事件（解析 + 缓存失效）；否则 None 走即时发送。"""
+        if self.outbox_relay is None:
+            return None
+        return [
+            CertificatePipeline.build_parse_certificate_event(certificate_id, keep_sans),
+            CertificatePipeline.build_cache_invalidate_event(trigger),
+        ]
+
+    def _after_certificate_write(
+        self, certificate_id: str, trigger: str, outboxed: bool, keep_sans: bool = False
+    ) -> None:
+        if outboxed and self.outbox_relay is not None:
+            # 事件已随事务提交，由 relay 投递；本实例的 Redis 缓存仍同步删除，写后立即读不会读到旧列表
+            self.cache_repo.clear_all_certificate_cache()
+            self.outbox_relay.notify()
+            return
+        if self.pipeline_repo:
+            self.pipeline_repo.send_parse_certificate_event(certificate_id, keep_sans)
+        self.invalidate_cache(trigger=trigger)
 
     def list_certificates(
         self,
@@ -138,7 +178,10 @@ class CertificateService:
         webroot: Optional[str] = None,
         force_renewal: bool = False,
     ) -> dict[str, Any]:
-        """通过 Certbot 申请新证书并入库（仅新建；已存在域名会拒绝）。"""
+        """通过 Certbot 申请新证书并入库（仅新建；已存在域名会拒绝）。
+
+        配置了签发队列时校验通过即返回 job_id，签发与入库由队列 worker 完成。
+        """
         if not self.tls_repo:
             return {"success": False, "message": "TLS 签发未配置或未启用"}
         domain_clean = (domain or "").strip()
@@ -151,7 +194,8 @@ class CertificateService:
                 "success": False,
                 "message": f"域名已存在，无法重复申请: {domain_clean}",
             }
-        return self._run_tls_apply_and_persist(
+        run = functools.partial(
+            self._run_tls_apply_and_persist_async,
             domain_clean=domain_clean,
             email_clean=email_clean,
             sans=sans,
@@ -160,6 +204,7 @@ class CertificateService:
             force_renewal=force_renewal,
             renew_certificate_id=None,
         )
+        return self._issue("apply", domain_clean, None, run)
 
     def reapply_certificate(
         self,
@@ -181,23 +226,208 @@ class CertificateService:
             return {"success": False, "message": "记录中缺少域名"}
         if not email_clean:
             return {"success": False, "message": "请先补全联系邮箱后再重新申请"}
+        return self._issue(
+            "reapply",
+            domain_clean,
+            row.get("days_remaining"),
+            self.build_reapply_run(cid, row, force_renewal),
+        )
+
+    def build_reapply_run(
+        self, certificate_id: str, row: dict[str, Any], force_renewal: bool
+    ) -> functools.partial[Awaitable[dict[str, Any]]]:
+        """由证书行（domain / email / sans / folder_name）构造重新签发任务（协程函数）；调用方负责校验 domain 与 email。"""
         raw_sans = row.get("sans")
         sans_list: Optional[list[str]] = None
         if isinstance(raw_sans, list) and raw_sans:
             sans_list = [str(x).strip() for x in raw_sans if str(x).strip()]
         folder_name = row.get("folder_name")
         folder_name_s = folder_name.strip() if isinstance(folder_name, str) else None
-        return self._run_tls_apply_and_persist(
+        domain_clean = (row.get("domain") or "").strip()
+        email_clean = (row.get("email") or "").strip()
+        return functools.partial(
+            self._run_tls_apply_and_persist_async,
             domain_clean=domain_clean,
             email_clean=email_clean,
             sans=sans_list,
             folder_name=folder_name_s,
             webroot=None,
             force_renewal=force_renewal,
-            renew_certificate_id=cid,
+            renew_certificate_id=certificate_id,
+        )
+
+    def build_consolidated_run(
+        self,
+        *,
+        cert_name: str,
+        email: str,
+        names: list[str],
+        certificate_ids: list[str],
+        force_renewal: bool,
+    ) -> functools.partial[Awaitable[dict[str, Any]]]:
+        """一次 certbot 订单覆盖 `names`，签发结果写回 `certificate_ids` 各行（各行 sans / folder_name 不变）。"""
+        return functools.partial(
+            self._run_consolidated_async,
+            cert_name=cert_name,
+            email=email,
+            names=list(names),
+            certificate_ids=list(certificate_ids),
+            force_renewal=force_renewal,
         )
 
-    def _run_tls_apply_and_persist(
+    async def _run_consolidated_async(
+        self,
+        *,
+        cert_name: str,
+        email: str,
+        names: list[str],
+        certificate_ids: list[str],
+        force_renewal: bool,
+    ) -> dict[str, Any]:
+        assert self.tls_repo
+        r = await self.tls_repo.apply_certificate_async(
+            domain=names[0],
+            email=email,
+            sans=names[1:],
+            folder_name=cert_name,
+            force_renewal=force_renewal,
+        )
+        failure = self._issue_failure(r)
+        if failure is not None:
+            failure["certificate_ids"] = list(certificate_ids)
+            if failure.get("rate_limit") or len(certificate_ids) < 2:
+                return failure
+            # 合并订单中任一域名校验失败会拖垮整组：退回逐条按各行自己的 SAN 签发
+            return await self._fallback_per_certificate(certificate_ids, force_renewal, failure)
+        info = await extract_cert_info_from_pem(r["certificate"].strip())
+        out = await asyncio.to_thread(self._persist_consolidated, r, info, certificate_ids)
+        out["issued"] = bool(r.get("issued"))
+        return out
+
+    async def _fallback_per_certificate(
+        self, certificate_ids: list[str], force_renewal: bool, consolidated_failure: dict[str, Any]
+    ) -> dict[str, Any]:
+        """依次重新签发组内每一行；遇到限流即停止（剩余行计为失败，交由队列退避）。"""
+        rows = await asyncio.to_thread(
+            lambda: [self.database_repo.get_certificate_by_id(cid) for cid in certificate_ids]
+        )
+        updated: list[str] = []
+        errors: dict[str, str] = {}
+        issued = 0
+        rate_limited: Optional[dict[str, Any]] = None
+        for cid, row in zip(certificate_ids, rows):
+            if rate_limited is not None:
+                errors[cid] = rate_limited.get("message") or "rate limit"
+                continue
+            if not row or not (row.get("domain") or "").strip() or not (row.get("email") or "").strip():
+                errors[cid] = "证书不存在或缺少域名 / 邮箱"
+                continue
+            res = await self.build_reapply_run(cid, row, force_renewal)()
+            if res.get("issued"):
+                issued += 1
+            if res.get("success"):
+                updated.append(cid)
+                continue
+            errors[cid] = (res.get("message") or res.get("error") or "证书申请失败").strip()
+            if res.get("rate_limit"):
+                rate_limited = res
+        out: dict[str, Any] = {
+            "success": not errors,
+            "message": f"合并签发失败，已逐条签发 {len(updated)}/{len(certificate_ids)} 条证书",
+            "certificate_ids": updated,
+            "failed_certificate_ids": list(errors),
+            "errors": errors,
+            "fallback": True,
+            "consolidated_error": consolidated_failure.get("message"),
+            "issued": issued > 0,
+            "issued_count": issued,
+        }
+        if rate_limited is not None:
+            out["rate_limit"] = True
+            out["retry_after"] = rate_limited.get("retry_after")
+        logger.info(
+            json.dumps(
+                {
+                    "task": "san_consolidation",
+                    "event": "fallback_finished",
+                    "certificates": len(certificate_ids),
+                    "updated": len(updated),
+                    "failed": len(errors),
+                    "issued": issued,
+                    "rate_limit": rate_limited is not None,
+                },
+                ensure_ascii=False,
+            )
+        )
+        return out
+
+    def _persist_consolidated(
+        self, r: dict[str, Any], info: dict[str, Any], certificate_ids: list[str]
+    ) -> dict[str, Any]:
+        certificate = r["certificate"].strip()
+        private_key = r["private_key"].strip()
+        updated: list[str] = []
+        for cid in certificate_ids:
+            events = self._outbox_events(cid, "update", keep_sans=True)
+            ok = self.database_repo.update_certificate_by_id(
+                cid,
+                certificate=certificate,
+                private_key=private_key,
+                issuer=info.get("issuer") or "Let's Encrypt",
+                not_before=info.get("not_before"),
+                not_after=info.get("not_after"),
+                is_valid=info.get("is_valid", True),
+                days_remaining=info.get("days_remaining"),
+                status=CertificateStatus.PROCESS.value,
+                sans_changed=False,
+                outbox_events=events,
+                clear_last_error=True,
+            )
+            if ok:
+                updated.append(cid)
+                self._after_certificate_write(cid, "update", events is not None, keep_sans=True)
+        failed = [cid for cid in certificate_ids if cid not in updated]
+        return {
+            "success": not failed,
+            "message": f"合并签发完成，已更新 {len(updated)}/{len(certificate_ids)} 条证书"
+            if not failed
+            else f"合并签发成功，但 {len(failed)} 条证书更新失败",
+            "certificate_ids": updated,
+            "failed_certificate_ids": failed,
+            "status": r.get("status"),
+        }
+
+    def _issue(
+        self,
+        kind: str,
+        domain: str,
+        days_remaining: Optional[int],
+        run: functools.partial[Union[dict[str, Any], Awaitable[dict[str, Any]]]],
+    ) -> dict[str, Any]:
+        if self.issuance_queue is None:
+            # 无队列时在调用线程内执行（handler 经 to_thread 调用，线程内没有运行中的事件环）
+            result = run()
+            if inspect.isawaitable(result):
+                return asyncio.run(result)
+            return result
+        job = self.issuance_queue.submit(
+            kind, domain, run, days_remaining=days_remaining, params=issuance_params(run)
+        )
+        already_queued = job.run is not run
+        return {
+            "success": True,
+            "message": "相同的签发请求已在队列中" if already_queued else "已加入签发队列",
+            "job_id": job.id,
+            "job_status": job.status,
+            "already_queued": already_queued,
+        }
+
+    def get_issuance_job(self, job_id: str) -> Optional[dict[str, Any]]:
+        if self.issuance_queue is None:
+            return None
+        return self.issuance_queue.get(job_id)
+
+    async def _run_tls_apply_and_persist_async(
         self,
         *,
         domain_clean: str,
@@ -208,8 +438,9 @@ class CertificateService:
         force_renewal: bool,
         renew_certificate_id: Optional[str],
     ) -> dict[str, Any]:
+        """certbot / openssl 以 asyncio 子进程运行；仅入库这一步进线程池。"""
         assert self.tls_repo
-        r = self.tls_repo.apply_certificate(
+        r = await self.tls_repo.apply_certificate_async(
             domain=domain_clean,
             email=email_clean,
             sans=sans,
@@ -217,6 +448,24 @@ class CertificateService:
             folder_name=folder_name,
             force_renewal=force_renewal,
         )
+        failure = self._issue_failure(r)
+        if failure is not None:
+            return failure
+        info = await extract_cert_info_from_pem(r["certificate"].strip())
+        out = await asyncio.to_thread(
+            self._persist_issued,
+            r,
+            info,
+            domain_clean=domain_clean,
+            email_clean=email_clean,
+            folder_name=folder_name,
+            renew_certificate_id=renew_certificate_id,
+        )
+        out["issued"] = bool(r.get("issued"))
+        return out
+
+    @staticmethod
+    def _issue_failure(r: dict[str, Any]) -> Optional[dict[str, Any]]:
         if not r.get("success"):
             out: dict[str, Any] = {
                 "success": False,
@@ -229,11 +478,22 @@ class CertificateService:
             if r.get("retry_after") is not None:
                 out["retry_after"] = r.get("retry_after")
             return out
-        certificate = (r.get("certificate") or "").strip()
-        private_key = (r.get("private_key") or "").strip()
-        if not certificate or not private_key:
+        if not (r.get("certificate") or "").strip() or not (r.get("private_key") or "").strip():
             return {"success": False, "message": "签发结果中缺少证书或私钥 PEM"}
-        info = extract_cert_info_from_pem_sync(certificate)
+        return None
+
+    def _persist_issued(
+        self,
+        r: dict[str, Any],
+        info: dict[str, Any],
+        *,
+        domain_clean: str,
+        email_clean: str,
+        folder_name: Optional[str],
+        renew_certificate_id: Optional[str],
+    ) -> dict[str, Any]:
+        certificate = r["certificate"].strip()
+        private_key = r["private_key"].strip()
         parsed_sans = info.get("sans") or []
         all_domains = info.get("all_domains", [])
         if not isinstance(all_domains, list):
@@ -246,6 +506,7 @@ class CertificateService:
                 all_domains.append(s)
         final_issuer = info.get("issuer") or "Let's Encrypt"
         if renew_certificate_id:
+            renew_events = self._outbox_events(str(renew_certificate_id), "update")
             updated = self.database_repo.update_certificate_by_id(
                 renew_certificate_id,
                 certificate=certificate,
@@ -260,11 +521,11 @@ class CertificateService:
                 email=email_clean,
                 status=CertificateStatus.PROCESS.value,
                 sans_changed=False,
+                outbox_events=renew_events,
+                clear_last_error=True,
             )
             if updated:
-                if self.pipeline_repo:
-                    self.pipeline_repo.send_parse_certificate_event(str(renew_certificate_id))
-                self.invalidate_cache(trigger="update")
+                self._after_certificate_write(str(renew_certificate_id), "update", renew_events is not None)
                 return {
                     "success": True,
                     "message": r.get("message") or "证书已重新申请并更新",
@@ -272,6 +533,8 @@ class CertificateService:
                     "status": r.get("status"),
                 }
             return {"success": False, "message": "更新失败"}
+        new_id = str(uuid.uuid4())
+        new_events = self._outbox_events(new_id, "add")
         cert_obj = self.database_repo.create_certificate(
             domain=domain_clean,
             certificate=certificate,
@@ -284,12 +547,13 @@ class CertificateService:
             days_remaining=info.get("days_remaining"),
             folder_name=folder_name,
             email=email_clean,
+            certificate_id=new_id,
+            outbox_events=new_events,
         )
         if cert_obj:
             cid = getattr(cert_obj, "id", None)
-            if cid and self.pipeline_repo:
-                self.pipeline_repo.send_parse_certificate_event(str(cid))
-            self.invalidate_cache(trigger="add")
+            if cid:
+                self._after_certificate_write(str(cid), "add", new_events is not None)
             return {
                 "success": True,
                 "message": r.get("message") or "证书已申请并入库",
@@ -316,6 +580,8 @@ class CertificateService:
             }
         info = extract_cert_info_from_pem_sync(certificate)
         final_issuer = issuer or info.get("issuer", "Unknown")
+        new_id = str(uuid.uuid4())
+        new_events = self._outbox_events(new_id, "add")
         cert_obj = self.database_repo.create_certificate(
             domain=domain,
             certificate=certificate,
@@ -328,12 +594,13 @@ class CertificateService:
             days_remaining=info.get("days_remaining"),
             folder_name=folder_name,
             email=email,
+            certificate_id=new_id,
+            outbox_events=new_events,
         )
         if cert_obj:
             cid = getattr(cert_obj, "id", None)
-            if cid and self.pipeline_repo:
-                self.pipeline_repo.send_parse_certificate_event(str(cid))
-            self.invalidate_cache(trigger="add")
+            if cid:
+                self._after_certificate_write(str(cid), "add", new_events is not None)
             return {"success": True, "message": "Certificate created", "certificate_id": cid}
         return {"success": False, "message": "Failed to create certificate"}
 
@@ -411,7 +678,8 @@ class CertificateService:
             "days_remaining": info.get("days_remaining"),
         }
 
-    def parse_certificate(self, certificate_id: str) -> dict[str, Any]:
+    def parse_certificate(self, certificate_id: str, keep_sans: bool = False) -> dict[str, Any]:
+        """从 PEM 刷新行上的解析字段；`keep_sans=True`（合并订单写回的行）时不改 sans。"""
         cert_obj = self.database_repo.get_certificate_by_id(certificate_id)
         if not cert_obj:
             return {"success": False, "message": "Not found"}
@@ -435,13 +703,13 @@ class CertificateService:
         self.database_repo.update_certificate_parse_result(
             certificate_id,
             status=CertificateStatus.SUCCESS.value,
-            sans=info.get("sans"),
+            sans=None if keep_sans else info.get("sans"),
             issuer=info.get("issuer"),
             email=info.get("email"),
             not_before=info.get("not_before"),
             not_after=info.get("not_after"),
             is_valid=info.get("is_valid"),
             days_remaining=info.get("days_remaining"),
-            sans_changed=False,
+            sans_changed=None if keep_sans else False,
         )
         return {"success": True, "message": "Parsed"}
@@ -0,0 +1,304 @@
+"""Certbot 签发任务队列：有界并发 worker + 按 days_remaining 排优先级 + 按注册域名令牌桶规划 Let's Encrypt 配额。
+
+- `submit` 线程安全、立即返回 job；同一 (域名, kind, params) 已有未完成任务时复用该任务，
+  参数不同的新任务照常入队，但与同域名的运行中任务串行执行；
+- 令牌不足的任务标记 deferred，到可用时间再入队，不占 worker；
+  运行前预留一个令牌，结果未标记 `issued`（复用已有 PEM / 签发失败）时归还；
+- 结果中出现 `rate_limit` 时清空该注册域名的桶，并在 `retry_after` 前拒绝新任务。
+"""
+from __future__ import annotations
+
+import asyncio
+import inspect
+import itertools
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Optional, Union
+
+from utils import BackgroundLoop, KeyedTokenBucket
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_DEFERRED = "deferred"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+_ACTIVE_STATES = (JOB_QUEUED, JOB_DEFERRED, JOB_RUNNING)
+
+# Let's Encrypt：每个注册域名每 7 天 50 张证书
+_LE_PERIOD_S = 7 * 86400
+# 常见二级公共后缀（不引入 PSL 依赖）：`example.co.uk` 的注册域名取三段
+_SECOND_LEVEL_LABELS = frozenset({"ac", "co", "com", "edu", "gov", "net", "org"})
+_RETRY_AFTER_FALLBACK_S = 3600
+
+# 协程函数直接在队列事件环上 await（certbot 走 asyncio 子进程）；普通函数进线程池
+JobRun = Callable[[], Union[dict[str, Any], Awaitable[dict[str, Any]]]]
+
+
+def registered_domain(host: str) -> str:
+    labels = [p for p in (host or "").strip().lower().lstrip("*.").split(".") if p]
+    if len(labels) >= 3 and labels[-2] in _SECOND_LEVEL_LABELS and len(labels[-1]) == 2:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+def _parse_retry_after(value: Any) -> float:
+    """certbot 报错中的 retry after 为 UTC `YYYY-MM-DD HH:MM:SS`；无法解析时保守等待 1 小时。"""
+    if isinstance(value, str):
+        try:
+            return datetime.strptime(value, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc).timestamp()
+        except ValueError:
+            pass
+    return time.time() + _RETRY_AFTER_FALLBACK_S
+
+
+@dataclass
+class IssuanceJob:
+    id: str
+    kind: str
+    domain: str
+    registered_domain: str
+    priority: int
+    run: JobRun = field(repr=False)
+    params_key: str = ""
+    status: str = JOB_QUEUED
+    created_at: float = field(default_factory=time.time)
+    not_before: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[dict[str, Any]] = None
+
+    def to_dict(self) -> dict[str, Any]:
+        def iso(ts: Optional[float]) -> Optional[str]:
+            return datetime.fromtimestamp(ts).isoformat() if ts else None
+
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "domain": self.domain,
+            "job_status": self.status,
+            "priority": self.priority,
+            "created_at": iso(self.created_at),
+            "not_before": iso(self.not_before),
+            "started_at": iso(self.started_at),
+            "finished_at": iso(self.finished_at),
+        }
+
+
+class IssuanceQueue:
+    def __init__(
+        self,
+        workers: int = 2,
+        rate_limit_per_week: int = 50,
+        retention: int = 500,
+    ) -> None:
+        self.workers = max(1, workers)
+        self.retention = max(1, retention)
+        self.buckets = KeyedTokenBucket(rate_limit_per_week, _LE_PERIOD_S)
+        self._bg = BackgroundLoop("IssuanceQueue")
+        self._queue: Optional[asyncio.PriorityQueue[tuple[int, int, str]]] = None
+        self._seq = itertools.count()
+        self._jobs: OrderedDict[str, IssuanceJob] = OrderedDict()
+        # 以下两项只在队列事件环上访问：运行中的域名、等待同域名任务结束的 job id
+        self._busy_domains: set[str] = set()
+        self._parked: dict[str, list[str]] = {}
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self.running = False
+
+    def start(self) -> bool:
+        with self._start_lock:
+            if self.running:
+                return True
+            self._bg.start()
+            self._bg.submit(self._start_workers()).result(timeout=5)
+            self.running = True
+        return True
+
+    async def _start_workers(self) -> None:
+        self._queue = asyncio.PriorityQueue()
+        for i in range(self.workers):
+            asyncio.create_task(self._worker(), name=f"issuance-worker-{i}")
+
+    def submit(
+        self,
+        kind: str,
+        domain: str,
+        run: JobRun,
+        days_remaining: Optional[int] = None,
+        not_before: Optional[float] = None,
+        params: Optional[dict[str, Any]] = None,
+    ) -> IssuanceJob:
+        """`days_remaining` 越小越先执行（新申请视为 0）；`not_before` 为 epoch 秒，用于错峰延迟入队。
+
+        `params` 描述签发请求（SAN、force 等）；返回的 `job.run is not run` 表示复用了已有任务。
+        """
+        params_key = json.dumps(params or {}, sort_keys=True, default=str)
+        with self._lock:
+            for job in self._jobs.values():
+                if (
+                    job.domain == domain
+                    and job.kind == kind
+                    and job.params_key == params_key
+                    and job.status in _ACTIVE_STATES
+                ):
+                    return job
+            job = IssuanceJob(
+                id=str(uuid.uuid4()),
+                kind=kind,
+                domain=domain,
+                registered_domain=registered_domain(domain),
+                priority=int(days_remaining) if days_remaining is not None else 0,
+                run=run,
+                params_key=params_key,
+            )
+            self._jobs[job.id] = job
+        if not self.running:
+            self.start()
+        delay = max(0.0, (not_before or 0.0) - time.time())
+        self._schedule(job, delay)
+        logger.info(
+            json.dumps(
+                {
+                    "task": "issuance_queue",
+                    "event": "submitted",
+                    "job_id": job.id,
+                    "kind": kind,
+                    "domain": domain,
+                    "priority": job.priority,
+                    "delay_s": round(delay, 1),
+                },
+                ensure_ascii=False,
+            )
+        )
+        return job
+
+    def _schedule(self, job: IssuanceJob, delay: float) -> None:
+        if delay > 0:
+            job.status = JOB_DEFERRED
+            job.not_before = time.time() + delay
+            self._bg.call_soon(self._call_later, delay, job)
+        else:
+            job.status = JOB_QUEUED
+            self._bg.call_soon(self._put, job)
+
+    def _call_later(self, delay: float, job: IssuanceJob) -> None:
+        asyncio.get_running_loop().call_later(delay, self._put, job)
+
+    def _put(self, job: IssuanceJob) -> None:
+        assert self._queue is not None
+        if job.status == JOB_DEFERRED:
+            job.status = JOB_QUEUED
+        self._queue.put_nowait((job.priority, next(self._seq), job.id))
+
+    def has_active(self, domain: str) -> bool:
+        with self._lock:
+            return any(j.domain == domain and j.status in _ACTIVE_STATES for j in self._jobs.values())
+
+    def get(self, job_id: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            out = job.to_dict()
+            if job.result is not None:
+                out["result"] = dict(job.result)
+            return out
+
+    async def _worker(self) -> None:
+        assert self._queue is not None
+        while True:
+            _prio, _seq, job_id = await self._queue.get()
+            try:
+                job = self._jobs.get(job_id)
+                if job is None or job.status != JOB_QUEUED:
+                    continue
+                if job.domain in self._busy_domains:
+                    # 同域名任务运行中（certbot 对同一证书不可并发）：结束后由 _run 重新入队
+                    self._parked.setdefault(job.domain, []).append(job.id)
+                    continue
+                wait = self.buckets.try_take(job.registered_domain)
+                if wait > 0:
+                    self._schedule(job, wait)
+                    logger.info(
+                        json.dumps(
+                            {
+                                "task": "issuance_queue",
+                                "event": "deferred_by_bucket",
+                                "job_id": job.id,
+                                "registered_domain": job.registered_domain,
+                                "wait_s": round(wait, 1),
+                            },
+                            ensure_ascii=False,
+                        )
+                    )
+                    continue
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: IssuanceJob) -> None:
+        job.status = JOB_RUNNING
+        job.started_at = time.time()
+        self._busy_domains.add(job.domain)
+        try:
+            if inspect.iscoroutinefunction(job.run):
+                result = await job.run()
+            else:
+                result = await asyncio.to_thread(job.run)
+        except Exception as e:  # noqa: BLE001
+            logger.error("issuance job 异常 job_id=%s domain=%s: %s", job.id, job.domain, e, exc_info=True)
+            result = {"success": False, "message": str(e), "error": str(e)}
+        finally:
+            self._busy_domains.discard(job.domain)
+            for parked_id in self._parked.pop(job.domain, []):
+                parked = self._jobs.get(parked_id)
+                if parked is not None and parked.status == JOB_QUEUED:
+                    self._put(parked)
+        if result.get("rate_limit"):
+            self.buckets.drain(job.registered_domain, until=_parse_retry_after(result.get("retry_after")))
+        else:
+            # 预留了一个令牌：没有真正签发（复用已有 PEM / 校验失败）时归还，合并订单逐条回退时补扣
+            issued = int(result.get("issued_count", 1 if result.get("issued") else 0))
+            if issued == 0:
+                self.buckets.refund(job.registered_domain)
+            elif issued > 1:
+                self.buckets.charge(job.registered_domain, issued - 1)
+        job.result = result
+        job.finished_at = time.time()
+        job.status = JOB_SUCCEEDED if result.get("success") else JOB_FAILED
+        logger.info(
+            json.dumps(
+                {
+                    "task": "issuance_queue",
+                    "event": "finished",
+                    "job_id": job.id,
+                    "domain": job.domain,
+                    "job_status": job.status,
+                    "duration_s": round(job.finished_at - job.started_at, 1),
+                    "rate_limit": bool(result.get("rate_limit")),
+                    "issued": bool(result.get("issued")),
+                },
+                ensure_ascii=False,
+            )
+        )
+        self._prune()
+
+    def _prune(self) -> None:
+        with self._lock:
+            finished = [jid for jid, j in self._jobs.items() if j.status not in _ACTIVE_STATES]
+            for jid in finished[: max(0, len(finished) - self.retention)]:
+                del self._jobs[jid]
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        self.running = False
+        self._bg.stop()
@@ -0,0 +1,252 @@
+"""自动续签规划：按 not_after 选出即将到期的证书，错峰提交到 IssuanceQueue，结果回写 status / last_error_*。"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+import logging
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Optional
+
+from enums import CertificateStatus
+
+from apps.certificate.services.certificate_service import CertificateService, issuance_params
+from apps.certificate.services.issuance_queue import IssuanceQueue
+from apps.certificate.services.san_consolidation import SanConsolidationPlanner, plan_orders
+
+logger = logging.getLogger(__name__)
+
+# 剩余天数不超过该值的证书不参与错峰，立即入队
+_URGENT_DAYS = 3
+_ERROR_MESSAGE_MAX_LEN = 2000
+
+
+@dataclass
+class _RenewalRun:
+    run_id: str
+    started_at: float
+    submitted: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    rate_limited: int = 0
+    # 规划阶段已有任务完成时，不能以 finished >= submitted 判定整轮结束
+    planning: bool = True
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def finished(self) -> int:
+        return self.succeeded + self.failed
+
+
+@dataclass
+class RenewalMetrics:
+    runs_total: int = 0
+    submitted_total: int = 0
+    succeeded_total: int = 0
+    failed_total: int = 0
+    last_run: dict[str, Any] = field(default_factory=dict)
+
+
+class RenewalPlanner:
+    def __init__(
+        self,
+        certificate_service: CertificateService,
+        issuance_queue: IssuanceQueue,
+        renew_before_days: int = 30,
+        spread_hours: int = 6,
+        max_per_run: int = 500,
+        consolidator: Optional[SanConsolidationPlanner] = None,
+    ) -> None:
+        self.certificate_service = certificate_service
+        self.issuance_queue = issuance_queue
+        self.renew_before_days = max(1, renew_before_days)
+        self.spread_s = max(0, spread_hours) * 3600
+        self.max_per_run = max(1, max_per_run)
+        # 非空时同一 (注册域名, 邮箱) 的候选合并为一个多域名订单
+        self.consolidator = consolidator
+        self.metrics = RenewalMetrics()
+        self._metrics_lock = threading.Lock()
+
+    def metrics_snapshot(self) -> dict[str, Any]:
+        with self._metrics_lock:
+            return {
+                "runs_total": self.metrics.runs_total,
+                "submitted_total": self.metrics.submitted_total,
+                "succeeded_total": self.metrics.succeeded_total,
+                "failed_total": self.metrics.failed_total,
+                "last_run": dict(self.metrics.last_run),
+            }
+
+    def plan(self) -> dict[str, Any]:
+        """选出候选并提交；立即返回规划摘要，各任务完成后另记 `run_finished` 汇总。"""
+        repo = self.certificate_service.database_repo
+        now = datetime.now()
+        rows = repo.list_renewal_candidates(
+            now + timedelta(days=self.renew_before_days), limit=self.max_per_run
+        )
+        run = _RenewalRun(run_id=uuid.uuid4().hex[:12], started_at=time.time())
+        eligible = [r for r in rows if (r.get("domain") or "").strip() and (r.get("email") or "").strip()]
+        skipped_no_email = len(rows) - len(eligible)
+        units = self._units(eligible, now)
+        spread_slots = [u for u in units if u[2] > _URGENT_DAYS]
+        slot_gap = self.spread_s / len(spread_slots) if spread_slots else 0.0
+        already_queued = 0
+        slot = 0
+        for kind, domain, days, certificate_ids, fn in units:
+            if self.issuance_queue.has_active(domain):
+                # 该域名已有手动申请 / 上一轮续签在队列中，本轮不再追加，避免重复消耗配额
+                already_queued += 1
+                continue
+            delay = 0.0
+            if days > _URGENT_DAYS:
+                delay = slot * slot_gap
+                slot += 1
+            run_fn = self._tracked(run, certificate_ids, fn)
+            job = self.issuance_queue.submit(
+                kind,
+                domain,
+                run_fn,
+                days_remaining=days,
+                not_before=time.time() + delay,
+                params=issuance_params(fn),
+            )
+            if job.run is run_fn:
+                with run.lock:
+                    run.submitted += 1
+            else:
+                already_queued += 1
+        with run.lock:
+            run.planning = False
+            done = run.submitted > 0 and run.finished >= run.submitted
+        if done:
+            self._log_run_finished(run)
+        summary = {
+            "success": True,
+            "message": f"Planned {run.submitted} renewals",
+            "run_id": run.run_id,
+            "candidates": len(rows),
+            "orders": len(units),
+            "submitted": run.submitted,
+            "already_queued": already_queued,
+            "skipped_no_email": skipped_no_email,
+            "renew_before_days": self.renew_before_days,
+            "spread_hours": self.spread_s / 3600,
+        }
+        with self._metrics_lock:
+            self.metrics.runs_total += 1
+            self.metrics.submitted_total += run.submitted
+            self.metrics.last_run = dict(summary)
+        logger.info(
+            json.dumps({"task": "cert_renewal", "event": "planned", **summary}, ensure_ascii=False)
+        )
+        return summary
+
+    def _units(
+        self, eligible: list[dict[str, Any]], now: datetime
+    ) -> list[tuple[str, str, int, list[str], functools.partial[Awaitable[dict[str, Any]]]]]:
+        """拆成签发单元 (kind, 主域名, 剩余天数, 证书 ID 列表, 任务)；启用合并时一组证书只占一个单元。"""
+        svc = self.certificate_service
+        singles = eligible
+        units: list[tuple[str, str, int, list[str], functools.partial[Awaitable[dict[str, Any]]]]] = []
+        if self.consolidator is not None:
+            orders, singles = plan_orders(eligible, self.consolidator.max_names, now)
+            for order in orders:
+                fn = svc.build_consolidated_run(
+                    cert_name=order.cert_name,
+                    email=order.email,
+                    names=order.names,
+                    certificate_ids=order.certificate_ids,
+                    force_renewal=True,
+                )
+                days = order.days_remaining if order.days_remaining is not None else 0
+                units.append(("renew", order.domains[0], days, order.certificate_ids, fn))
+        for row in singles:
+            cid = str(row["id"])
+            fn = svc.build_reapply_run(cid, row, force_renewal=True)
+            units.append(("renew", row["domain"].strip(), (row["not_after"] - now).days, [cid], fn))
+        units.sort(key=lambda u: u[2])
+        return units
+
+    def _tracked(
+        self,
+        run: _RenewalRun,
+        certificate_ids: list[str],
+        fn: Callable[[], Awaitable[dict[str, Any]]],
+    ) -> Callable[[], Awaitable[dict[str, Any]]]:
+        async def job() -> dict[str, Any]:
+            try:
+                result = await fn()
+            except Exception as e:  # noqa: BLE001
+                result = {"success": False, "message": str(e), "error": str(e)}
+            # 失败回写是同步 DB 写入
+            await asyncio.to_thread(self._record, run, certificate_ids, result)
+            return result
+
+        return job
+
+    def _record(self, run: _RenewalRun, certificate_ids: list[str], result: dict[str, Any]) -> None:
+        ok = bool(result.get("success"))
+        if not ok:
+            message = (result.get("message") or result.get("error") or "renewal failed").strip()
+            # 合并订单签发成功但部分行写回失败时，只标记失败的行
+            failed_ids = result.get("failed_certificate_ids") or certificate_ids
+            # 合并订单逐条回退时按行记录各自的错误
+            errors = result.get("errors") or {}
+            for cid in failed_ids:
+                row_message = (errors.get(cid) or message).strip()
+                self.certificate_service.database_repo.update_certificate_by_id(
+                    cid,
+                    status=CertificateStatus.FAIL.value,
+                    last_error_message=row_message[:_ERROR_MESSAGE_MAX_LEN],
+                    last_error_time=datetime.now(),
+                )
+        with run.lock:
+            if ok:
+                run.succeeded += 1
+            else:
+                run.failed += 1
+            if result.get("rate_limit"):
+                run.rate_limited += 1
+            done = not run.planning and run.finished >= run.submitted
+        with self._metrics_lock:
+            if ok:
+                self.metrics.succeeded_total += 1
+            else:
+                self.metrics.failed_total += 1
+        logger.info(
+            json.dumps(
+                {
+                    "task": "cert_renewal",
+                    "event": "job_finished",
+                    "run_id": run.run_id,
+                    "certificate_ids": certificate_ids,
+                    "success": ok,
+                    "rate_limit": bool(result.get("rate_limit")),
+                },
+                ensure_ascii=False,
+            )
+        )
+        if done:
+            self._log_run_finished(run)
+
+    @staticmethod
+    def _log_run_finished(run: _RenewalRun) -> None:
+        logger.info(
+            json.dumps(
+                {
+                    "task": "cert_renewal",
+                    "event": "run_finished",
+                    "run_id": run.run_id,
+                    "submitted": run.submitted,
+                    "succeeded": run.succeeded,
+                    "failed": run.failed,
+                    "rate_limited": run.rate_limited,
+                    "duration_s": round(time.time() - run.started_at, 1),
+                },
+                ensure_ascii=False,
+            )
+        )
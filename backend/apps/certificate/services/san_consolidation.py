@@ -0,0 +1,183 @@
+"""SAN 合并签发规划：同一 (注册域名, 邮箱) 下的多张证书合并为一张多域名证书（单订单 ≤ 100 个名称）。
+
+一次订单只计一次 Let's Encrypt 签发配额，共用一次 ACME 账户/订单往返；结果 PEM 写回组内每一行，
+各行的 domain / sans / folder_name 保持不变（随后的解析事件带 `keep_sans`，只刷新有效期等字段）。
+合并订单失败（非限流）时在同一任务内退回逐条签发，单个域名校验失败不再拖垮整组。
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Optional
+
+from apps.certificate.services.certificate_service import CertificateService, issuance_params
+from apps.certificate.services.issuance_queue import IssuanceQueue, registered_domain
+
+logger = logging.getLogger(__name__)
+
+# Let's Encrypt 单张证书名称上限
+MAX_NAMES_PER_ORDER = 100
+
+
+def row_names(row: dict[str, Any]) -> list[str]:
+    """证书行覆盖的全部名称：domain 在前，sans 去重保序。"""
+    out: list[str] = []
+    for h in [row.get("domain"), *(row.get("sans") or [])]:
+        s = str(h or "").strip().lower()
+        if s and s not in out:
+            out.append(s)
+    return out
+
+
+@dataclass
+class ConsolidatedOrder:
+    registered_domain: str
+    email: str
+    names: list[str] = field(default_factory=list)
+    certificate_ids: list[str] = field(default_factory=list)
+    domains: list[str] = field(default_factory=list)
+    days_remaining: Optional[int] = None
+
+    @property
+    def cert_name(self) -> str:
+        """certbot lineage 名：同一组证书多次续签得到同一名称，可复用 lineage。"""
+        digest = hashlib.sha1(",".join(sorted(self.certificate_ids)).encode("utf-8")).hexdigest()[:8]
+        return f"san-{self.registered_domain.replace('.', '_')}-{digest}"
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "registered_domain": self.registered_domain,
+            "email": self.email,
+            "cert_name": self.cert_name,
+            "names": list(self.names),
+            "certificate_ids": list(self.certificate_ids),
+            "domains": list(self.domains),
+            "days_remaining": self.days_remaining,
+        }
+
+
+def plan_orders(
+    rows: list[dict[str, Any]],
+    max_names: int = MAX_NAMES_PER_ORDER,
+    now: Optional[datetime] = None,
+) -> tuple[list[ConsolidatedOrder], list[dict[str, Any]]]:
+    """按 (注册域名, 邮箱) 分组后 first-fit decreasing 装箱；返回 (合并订单, 仍单独签发的行)。
+
+    只含一行的箱子没有收益，退回单独签发；名称数本身超过上限的行同样单独签发。
+    """
+    now = now or datetime.now()
+    max_names = max(1, min(max_names, MAX_NAMES_PER_ORDER))
+    groups: dict[tuple[str, str], list[dict[str, Any]]] = {}
+    singles: list[dict[str, Any]] = []
+    for row in rows:
+        domain = (row.get("domain") or "").strip()
+        email = (row.get("email") or "").strip()
+        if not domain or not email or len(row_names(row)) > max_names:
+            singles.append(row)
+            continue
+        groups.setdefault((registered_domain(domain), email.lower()), []).append(row)
+
+    orders: list[ConsolidatedOrder] = []
+    for (reg, email), members in groups.items():
+        bins: list[tuple[ConsolidatedOrder, list[dict[str, Any]]]] = []
+        for row in sorted(members, key=lambda r: len(row_names(r)), reverse=True):
+            names = row_names(row)
+            for order, placed in bins:
+                extra = [n for n in names if n not in order.names]
+                if len(order.names) + len(extra) <= max_names:
+                    order.names.extend(extra)
+                    placed.append(row)
+                    break
+            else:
+                bins.append((ConsolidatedOrder(registered_domain=reg, email=email, names=list(names)), [row]))
+        for order, placed in bins:
+            if len(placed) < 2:
+                singles.extend(placed)
+                continue
+            for row in placed:
+                order.certificate_ids.append(str(row["id"]))
+                order.domains.append(row["domain"].strip())
+                not_after = row.get("not_after")
+                if isinstance(not_after, datetime):
+                    days = (not_after - now).days
+                    if order.days_remaining is None or days < order.days_remaining:
+                        order.days_remaining = days
+            orders.append(order)
+    return orders, singles
+
+
+class SanConsolidationPlanner:
+    def __init__(
+        self,
+        certificate_service: CertificateService,
+        issuance_queue: IssuanceQueue,
+        max_names: int = MAX_NAMES_PER_ORDER,
+    ) -> None:
+        self.certificate_service = certificate_service
+        self.issuance_queue = issuance_queue
+        self.max_names = max(1, min(max_names, MAX_NAMES_PER_ORDER))
+
+    def propose(self, certificate_ids: Optional[list[str]] = None) -> dict[str, Any]:
+        """只规划不签发：返回合并订单与订单数对比。"""
+        rows = self.certificate_service.database_repo.list_consolidation_candidates(certificate_ids)
+        orders, singles = plan_orders(rows, self.max_names)
+        return {
+            "success": True,
+            "message": f"{len(rows)} certificates -> {len(orders) + len(singles)} orders",
+            "certificates": len(rows),
+            "orders_before": len(rows),
+            "orders_after": len(orders) + len(singles),
+            "orders": [o.to_dict() for o in orders],
+            "single_certificate_ids": [str(r["id"]) for r in singles],
+        }
+
+    def execute(
+        self, certificate_ids: Optional[list[str]] = None, force_renewal: bool = False
+    ) -> dict[str, Any]:
+        """按规划提交合并订单到签发队列；单独签发的行不在此处处理（由续签 / reapply 照常签发）。"""
+        if not self.certificate_service.tls_repo:
+            return {"success": False, "message": "TLS 签发未配置或未启用"}
+        summary = self.propose(certificate_ids)
+        jobs: list[dict[str, Any]] = []
+        for od in summary["orders"]:
+            run = self.certificate_service.build_consolidated_run(
+                cert_name=od["cert_name"],
+                email=od["email"],
+                names=od["names"],
+                certificate_ids=od["certificate_ids"],
+                force_renewal=force_renewal,
+            )
+            job = self.issuance_queue.submit(
+                "consolidate",
+                od["domains"][0],
+                run,
+                days_remaining=od["days_remaining"],
+                params=issuance_params(run),
+            )
+            jobs.append(
+                {
+                    "cert_name": od["cert_name"],
+                    "job_id": job.id,
+                    "job_status": job.status,
+                    "already_queued": job.run is not run,
+                }
+            )
+        summary["jobs"] = jobs
+        summary["message"] = f"已提交 {len(jobs)} 个合并签发任务"
+        logger.info(
+            json.dumps(
+                {
+                    "task": "san_consolidation",
+                    "event": "submitted",
+                    "certificates": summary["certificates"],
+                    "orders_before": summary["orders_before"],
+                    "orders_after": summary["orders_after"],
+                    "jobs": len(jobs),
+                },
+                ensure_ascii=False,
+            )
+        )
+        return summary
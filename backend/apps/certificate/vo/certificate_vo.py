@@ -14,3 +14,6 @@ class CertificateVo(BaseModel):
     error: Optional[str] = None
     rate_limit: Optional[bool] = None
     retry_after: Optional[str] = None
+    job_id: Optional[str] = None
+    job_status: Optional[str] = None
+    already_queued: Optional[bool] = None
@@ -8,6 +8,10 @@ class ExportSingleCertificateRequest(BaseModel):
     certificate_id: str = Field(..., description="证书 ID")
 
 
+class ExportCertificatesBatchRequest(BaseModel):
+    certificate_ids: list[str] = Field(..., min_length=1, max_length=500, description="证书 ID 列表")
+
+
 class DeleteFileOrFolderRequest(BaseModel):
     store: str = Field(default="websites", description="仅支持 websites")
     path: str = Field(...)
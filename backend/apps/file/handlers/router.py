@@ -2,13 +2,21 @@
 """`/vault/file/*` 路由（仅 Websites 目录）。"""
 from __future__ import annotations
 
+import asyncio
 import logging
+from email.utils import formatdate
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 
-from apps.file.dto.file_request_dto import DeleteFileOrFolderRequest, ExportSingleCertificateRequest
+from apps.file.dto.file_request_dto import (
+    DeleteFileOrFolderRequest,
+    ExportCertificatesBatchRequest,
+    ExportSingleCertificateRequest,
+)
+from apps.file.services.file_preview import DEFAULT_PREVIEW_BYTES, MAX_PREVIEW_BYTES
 from apps.file.services.file_service import FileService
+from utils import ZeroCopyFileResponse, file_etag, is_not_modified
 
 logger = logging.getLogger(__name__)
 
@@ -47,13 +55,31 @@ async def export_single_certificate_endpoint(
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
+@router.post("/export-batch")
+async def export_certificates_batch_endpoint(
+    req: ExportCertificatesBatchRequest,
+    svc: FileService = Depends(get_file_service),
+) -> dict:
+    try:
+        return await asyncio.to_thread(svc.export_certificates_batch, req.certificate_ids)
+    except Exception as e:  # noqa: BLE001
+        logger.exception("export_batch")
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+
 @router.get("/list")
 async def list_directory_endpoint(
     path: Optional[str] = None,
+    offset: int = Query(default=0, ge=0),
+    limit: Optional[int] = Query(default=None, ge=1, le=1000),
+    depth: int = Query(default=1, ge=1, le=3),
     svc: FileService = Depends(get_file_service),
 ) -> dict:
     try:
-        return svc.list_directory(_STORE, subpath=path)
+        # 目录扫描为同步 IO（网络存储上可能较慢），放到线程中
+        return await asyncio.to_thread(
+            svc.list_directory, _STORE, subpath=path, offset=offset, limit=limit, depth=depth
+        )
     except Exception as e:  # noqa: BLE001
         logger.exception("list_directory")
         raise HTTPException(status_code=500, detail=str(e)) from e
@@ -62,17 +88,24 @@ async def list_directory_endpoint(
 @router.get("/download")
 async def download_file_endpoint(
     path: str,
+    request: Request,
     svc: FileService = Depends(get_file_service),
 ) -> Response:
+    """文件响应流式发送：支持 Range（断点续传）、If-None-Match / If-Modified-Since → 304。"""
     try:
         result = svc.download_file(_STORE, path)
-        if result.get("success") and result.get("content") is not None:
-            return Response(
-                content=result["content"],
+        if result.get("success") and result.get("path"):
+            st = result["stat"]
+            validators = {"ETag": file_etag(st), "Cache-Control": "no-cache"}
+            if is_not_modified(request.headers, validators["ETag"], st.st_mtime):
+                validators["Last-Modified"] = formatdate(st.st_mtime, usegmt=True)
+                return Response(status_code=304, headers=validators)
+            return ZeroCopyFileResponse(
+                result["path"],
                 media_type=result.get("mime_type", "application/octet-stream"),
-                headers={
-                    "Content-Disposition": f'attachment; filename="{result.get("filename", "file")}"'
-                },
+                filename=result.get("filename") or "file",
+                headers=validators,
+                stat_result=st,
             )
         raise HTTPException(status_code=404, detail=result.get("message", "File not found"))
     except HTTPException:
@@ -85,10 +118,12 @@ async def download_file_endpoint(
 @router.get("/content")
 async def get_file_content_endpoint(
     path: str,
+    offset: int = Query(default=0, ge=0),
+    max_bytes: int = Query(default=DEFAULT_PREVIEW_BYTES, ge=1, le=MAX_PREVIEW_BYTES),
     svc: FileService = Depends(get_file_service),
 ) -> dict:
     try:
-        return svc.get_file_content(_STORE, path)
+        return await asyncio.to_thread(svc.get_file_content, _STORE, path, offset=offset, max_bytes=max_bytes)
     except Exception as e:  # noqa: BLE001
         logger.exception("get_file_content")
         raise HTTPException(status_code=500, detail=str(e)) from e
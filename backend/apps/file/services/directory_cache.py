@@ -0,0 +1,93 @@
+# coding=utf-8
+"""目录列举缓存：os.scandir 一次遍历（类型取自 d_type，每项仅一次 stat），按目录 mtime 失效。
+
+目录 mtime 只随增删 / 改名变化，文件原地改写不会反映出来，因此另设最长缓存时间；
+本进程内的写操作（导出、删除）直接调用 `invalidate` / `clear`。
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+_MAX_CACHED_DIRS = 512
+_MAX_AGE_S = 30.0
+
+
+@dataclass(frozen=True)
+class _Listing:
+    mtime_ns: int
+    loaded_at: float
+    items: tuple[dict[str, Any], ...]
+
+
+def scan_directory(target_dir: str, store_dir: str) -> list[dict[str, Any]]:
+    """按名称排序的目录项（跳过隐藏项），字段与 `/vault/file/list` 一致。"""
+    items: list[dict[str, Any]] = []
+    with os.scandir(target_dir) as it:
+        for entry in it:
+            if entry.name.startswith("."):
+                continue
+            try:
+                is_dir = entry.is_dir()
+                st = entry.stat()
+            except OSError:
+                # 扫描途中被删除 / 悬空符号链接
+                continue
+            items.append(
+                {
+                    "name": entry.name,
+                    "type": "directory" if is_dir else "file",
+                    "path": os.path.relpath(entry.path, store_dir).replace("\\", "/"),
+                    "size": st.st_size if not is_dir else None,
+                    "modified": st.st_mtime,
+                }
+            )
+    items.sort(key=lambda i: i["name"])
+    return items
+
+
+class DirectoryListingCache:
+    def __init__(self, max_dirs: int = _MAX_CACHED_DIRS, max_age_s: float = _MAX_AGE_S) -> None:
+        self.max_dirs = max(1, max_dirs)
+        self.max_age_s = max_age_s
+        self._entries: OrderedDict[str, _Listing] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def list(self, target_dir: str, store_dir: str) -> tuple[dict[str, Any], ...]:
+        """返回缓存的目录项（只读，勿修改）；目录不存在时抛 OSError。"""
+        mtime_ns = os.stat(target_dir).st_mtime_ns
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(target_dir)
+            if cached is not None and cached.mtime_ns == mtime_ns and now - cached.loaded_at < self.max_age_s:
+                self._entries.move_to_end(target_dir)
+                self.hits += 1
+                return cached.items
+            self.misses += 1
+        items = tuple(scan_directory(target_dir, store_dir))
+        with self._lock:
+            self._entries[target_dir] = _Listing(mtime_ns=mtime_ns, loaded_at=now, items=items)
+            self._entries.move_to_end(target_dir)
+            while len(self._entries) > self.max_dirs:
+                self._entries.popitem(last=False)
+        return items
+
+    def invalidate(self, path: str) -> None:
+        """删除 `path` 本身及其父目录的缓存（增删条目会改变父目录的列举结果）。"""
+        path = os.path.realpath(path)
+        with self._lock:
+            self._entries.pop(path, None)
+            self._entries.pop(os.path.dirname(path), None)
+            prefix = path.rstrip(os.sep) + os.sep
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
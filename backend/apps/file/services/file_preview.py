@@ -0,0 +1,79 @@
+# coding=utf-8
+"""文件内容预览：只读取 [offset, offset + max_bytes) 一段，一次二进制读取后增量解码。
+
+- 二进制判定只看文件首块（含 NUL 即视为二进制，不返回正文）；
+- 窗口两端被截断的 UTF-8 多字节字符会被跳过 / 留到下一页，不会误判为非 UTF-8；
+- 非 UTF-8 文本退回 latin-1 解码同一段字节，不再重读文件；
+- 窗口较大时经 mmap 切片读取，开销与请求的字节数成正比。
+"""
+from __future__ import annotations
+
+import codecs
+import mmap
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+DEFAULT_PREVIEW_BYTES = 1024 * 1024
+MAX_PREVIEW_BYTES = 8 * 1024 * 1024
+_SNIFF_BYTES = 4096
+_MMAP_MIN_BYTES = 256 * 1024
+# UTF-8 单个字符最多 4 字节：窗口起点最多跳过 3 个续字节
+_MAX_UTF8_CONTINUATION = 3
+
+
+@dataclass
+class Preview:
+    size: int
+    offset: int
+    next_offset: int
+    binary: bool
+    content: Optional[str]
+    encoding: Optional[str]
+
+    @property
+    def truncated(self) -> bool:
+        return self.next_offset < self.size
+
+
+def _read_window(f, offset: int, length: int) -> bytes:
+    if length >= _MMAP_MIN_BYTES:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return mm[offset : offset + length]
+    f.seek(offset)
+    return f.read(length)
+
+
+def _looks_binary(block: bytes) -> bool:
+    return b"\x00" in block
+
+
+def read_preview(path: str, offset: int = 0, max_bytes: int = DEFAULT_PREVIEW_BYTES) -> Preview:
+    max_bytes = max(1, min(max_bytes, MAX_PREVIEW_BYTES))
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        offset = max(0, min(offset, size))
+        length = min(max_bytes, size - offset)
+        data = _read_window(f, offset, length) if length > 0 else b""
+        if offset == 0:
+            head = data[:_SNIFF_BYTES]
+        else:
+            f.seek(0)
+            head = f.read(_SNIFF_BYTES)
+    if _looks_binary(head):
+        return Preview(size, offset, offset, True, None, None)
+
+    start = 0
+    if offset > 0:
+        # 窗口起点落在多字节字符中间：跳过续字节（0b10xxxxxx），返回的 offset 指向正文实际起点
+        while start < min(len(data), _MAX_UTF8_CONTINUATION) and data[start] & 0xC0 == 0x80:
+            start += 1
+    decoder = codecs.getincrementaldecoder("utf-8")("strict")
+    at_eof = offset + len(data) >= size
+    try:
+        text = decoder.decode(data[start:], final=at_eof)
+        pending, _flag = decoder.getstate()
+        consumed = len(data) - len(pending)
+        return Preview(size, offset + start, offset + consumed, False, text, "utf-8")
+    except UnicodeDecodeError:
+        return Preview(size, offset, offset + len(data), False, data.decode("latin-1"), "latin-1")
@@ -2,19 +2,26 @@
 """文件域 Service：证书目录导出/列举/下载/删除（仅 Websites 磁盘树）。"""
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import json
 import logging
 import os
 import shutil
-from datetime import datetime
-from typing import Any, Optional
+import stat
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterator, Optional, Union
+
+from sqlalchemy.exc import IntegrityError
 
 from apps.certificate.kafka.certificate_pipeline import CertificatePipeline
 from apps.certificate.models import TLSCertificate
 from apps.certificate.repos.certificate_repository import CertificateRepository
+from apps.file.services.directory_cache import DirectoryListingCache
+from apps.file.services.file_preview import DEFAULT_PREVIEW_BYTES, read_preview
 from config.types import DatabaseConfig
 from enums import CertificateStatus
-from utils import extract_cert_info_from_pem_sync
+from utils import AtomicFileWriter, AtomicWriteBatch, extract_cert_info_from_pem_sync
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +29,23 @@ WEBSITES_STORE = "websites"
 
 _TASK = "disk_cert_import"
 
+# `/vault/file/list` 一次返回的最大目录层数
+_MAX_LIST_DEPTH = 3
+
+# 批量导出：写盘 + openssl 解析的并发度（单次 ID 上限见 ExportCertificatesBatchRequest）
+_EXPORT_CONCURRENCY = 8
+
+# 磁盘导入并发度：每个目录一次读盘 + openssl 子进程 + 一次 DB 事务
+_DISK_IMPORT_CONCURRENCY = 8
+
+_IMPORT_OUTCOMES = (
+    "inserted",
+    "skipped_existing",
+    "skipped_missing_files",
+    "skipped_no_domain",
+    "failed",
+)
+
 
 def _log_disk_import(record: dict[str, Any]) -> None:
     payload = dict(record)
@@ -36,6 +60,43 @@ def _log_disk_import_error(record: dict[str, Any], exc: BaseException) -> None:
     logger.error(json.dumps(payload, ensure_ascii=False, default=str), exc_info=True)
 
 
+def _list_cert_folders(store_dir: str) -> list[str]:
+    with os.scandir(store_dir) as it:
+        return sorted(
+            e.name for e in it if not e.name.startswith(".") and e.is_dir()
+        )
+
+
+def _changed_export_metadata(row: dict[str, Any], cert_info: dict[str, Any]) -> dict[str, Any]:
+    """解析结果优先、缺失时沿用库内值；只返回与库内不同的列（全部相同则不必回写）。
+
+    SAN 按集合比较（顺序不同不算变化）；`days_remaining` 每天都会变，不参与判定，只随其它列一起回写。
+    """
+    domain = row.get("domain")
+    all_domains = cert_info.get("all_domains", [])
+    if not isinstance(all_domains, list):
+        all_domains = []
+    if domain and domain not in all_domains:
+        all_domains.insert(0, domain)
+    for san in cert_info.get("sans") or []:
+        if san and san not in all_domains:
+            all_domains.append(san)
+    wanted = {
+        "status": CertificateStatus.SUCCESS,
+        "sans": all_domains if all_domains else row.get("sans") or [],
+        "issuer": cert_info.get("issuer") or row.get("issuer"),
+        "not_before": cert_info.get("not_before") or row.get("not_before"),
+        "not_after": cert_info.get("not_after") or row.get("not_after"),
+        "is_valid": cert_info["is_valid"] if cert_info.get("is_valid") is not None else row.get("is_valid", True),
+    }
+    changes = {k: v for k, v in wanted.items() if row.get(k) != v}
+    if "sans" in changes and set(row.get("sans") or []) == set(changes["sans"]):
+        del changes["sans"]
+    if changes and cert_info.get("days_remaining") is not None:
+        changes["days_remaining"] = cert_info["days_remaining"]
+    return changes
+
+
 def _fmt_dt(value: Any) -> Optional[str]:
     if value is None:
         return None
@@ -56,9 +117,16 @@ class FileService:
         self.database_repo = database_repo
         self.pipeline_repo = pipeline_repo
         self.db_config = db_config
+        self._listings = DirectoryListingCache()
+        self._writer = AtomicFileWriter()
 
     async def read_folders_and_store_certificates(self, store: str = WEBSITES_STORE) -> dict[str, Any]:
-        """读取磁盘证书目录写入 DB（启动时仅调用 websites）。"""
+        """读取磁盘证书目录写入 DB（启动时仅调用 websites）。
+
+        先并发读盘 + openssl 解析，再按域名去重（同域名取排序在前的目录），最后并发入库；
+        两阶段均在线程池中执行（上限 `_DISK_IMPORT_CONCURRENCY`），
+        调用方事件环（HTTP lifespan 或 Kafka Consumer 自有 loop）不被阻塞。
+        """
         if not self.database_repo.db_session.enable_mysql:
             return {"success": False, "message": "Database repository not initialized", "processed": 0}
         base_dir = self.base_dir
@@ -66,130 +134,46 @@ class FileService:
         if not os.path.exists(store_dir):
             return {"success": True, "message": f"Directory not found: {store_dir}", "processed": 0}
         try:
-            inserted_count = 0
-            skipped_existing_count = 0
-            skipped_missing_files_count = 0
-            skipped_no_domain_count = 0
-            failed_count = 0
-            for folder_name in os.listdir(store_dir):
-                folder_path = os.path.join(store_dir, folder_name)
-                if not os.path.isdir(folder_path) or folder_name.startswith("."):
+            folder_names = await asyncio.to_thread(_list_cert_folders, store_dir)
+            sem = asyncio.Semaphore(_DISK_IMPORT_CONCURRENCY)
+
+            async def _limited(fn: Any, *args: Any) -> Any:
+                async with sem:
+                    return await asyncio.to_thread(fn, *args)
+
+            parsed_all = await asyncio.gather(
+                *(_limited(self._parse_disk_folder, store, store_dir, n) for n in folder_names)
+            )
+            counts = {k: 0 for k in _IMPORT_OUTCOMES}
+            # 同一域名的多个目录按目录名排序先到先得，入库结果不依赖线程调度
+            winners: dict[str, dict[str, Any]] = {}
+            for parsed in parsed_all:
+                if isinstance(parsed, str):
+                    counts[parsed] += 1
                     continue
-                cert_file = os.path.join(folder_path, "cert.crt")
-                key_file = os.path.join(folder_path, "key.key")
-                if not os.path.exists(cert_file) or not os.path.exists(key_file):
-                    has_c = os.path.exists(cert_file)
-                    has_k = os.path.exists(key_file)
+                first = winners.setdefault(parsed["domain"], parsed)
+                if first is not parsed:
                     _log_disk_import(
                         {
-                            "event": "skip_missing_files",
+                            "event": "skip_domain_exists",
                             "store": store,
-                            "disk_folder": folder_name,
-                            "path": folder_path,
-                            "has_cert_crt": has_c,
-                            "has_key_key": has_k,
+                            "disk_folder": parsed["folder_name"],
+                            "domain": parsed["domain"],
+                            "reason": "duplicate_on_disk",
+                            "kept_disk_folder": first["folder_name"],
                         }
                     )
-                    skipped_missing_files_count += 1
-                    continue
-                try:
-                    with open(cert_file, encoding="utf-8") as f:
-                        cert_pem = f.read()
-                    with open(key_file, encoding="utf-8") as f:
-                        key_pem = f.read()
-                    cert_info = extract_cert_info_from_pem_sync(cert_pem)
-                    domain = cert_info.get("common_name") or (
-                        cert_info.get("subject") or {}
-                    ).get("CN", "")
-                    if not domain:
-                        _log_disk_import(
-                            {
-                                "event": "skip_no_domain",
-                                "store": store,
-                                "disk_folder": folder_name,
-                                "path": folder_path,
-                            }
-                        )
-                        skipped_no_domain_count += 1
-                        continue
-                    parsed_sans = cert_info.get("sans", [])
-                    all_domains = cert_info.get("all_domains", [])
-                    if not isinstance(all_domains, list):
-                        all_domains = []
-                    if domain and domain not in all_domains:
-                        all_domains.insert(0, domain)
-                    if parsed_sans:
-                        for san in parsed_sans:
-                            if san and san not in all_domains:
-                                all_domains.append(san)
-                    with self.database_repo.db_session.get_session() as session:
-                        existing = (
-                            session.query(TLSCertificate)
-                            .filter(TLSCertificate.domain == domain)
-                            .first()
-                        )
-                        if existing:
-                            _log_disk_import(
-                                {
-                                    "event": "skip_domain_exists",
-                                    "store": store,
-                                    "disk_folder": folder_name,
-                                    "domain": domain,
-                                    "certificate_id": existing.id,
-                                    "db_folder_name": existing.folder_name,
-                                    "db_status": existing.status.value if existing.status else None,
-                                    "db_issuer": existing.issuer,
-                                    "db_not_before": _fmt_dt(existing.not_before),
-                                    "db_not_after": _fmt_dt(existing.not_after),
-                                    "db_days_remaining": existing.days_remaining,
-                                    "db_sans": existing.sans,
-                                    "db_updated_at": _fmt_dt(existing.updated_at),
-                                }
-                            )
-                            skipped_existing_count += 1
-                            continue
-                        new_cert = TLSCertificate(
-                            domain=domain,
-                            folder_name=folder_name,
-                            certificate=cert_pem,
-                            private_key=key_pem,
-                            status=CertificateStatus.SUCCESS,
-                            sans=all_domains if all_domains else [],
-                            issuer=cert_info.get("issuer", "Let's Encrypt"),
-                            not_before=cert_info.get("not_before"),
-                            not_after=cert_info.get("not_after"),
-                            is_valid=cert_info.get("is_valid", True),
-                            days_remaining=cert_info.get("days_remaining"),
-                        )
-                        session.add(new_cert)
-                        session.flush()
-                        _log_disk_import(
-                            {
-                                "event": "insert_ok",
-                                "store": store,
-                                "disk_folder": folder_name,
-                                "certificate_id": new_cert.id,
-                                "domain": domain,
-                                "issuer": new_cert.issuer,
-                                "not_before": _fmt_dt(new_cert.not_before),
-                                "not_after": _fmt_dt(new_cert.not_after),
-                                "days_remaining": new_cert.days_remaining,
-                                "is_valid": new_cert.is_valid,
-                                "sans": new_cert.sans,
-                            }
-                        )
-                        inserted_count += 1
-                except Exception as e:  # noqa: BLE001
-                    _log_disk_import_error(
-                        {
-                            "event": "row_error",
-                            "store": store,
-                            "disk_folder": folder_name,
-                            "path": folder_path,
-                        },
-                        e,
-                    )
-                    failed_count += 1
+                    counts["skipped_existing"] += 1
+            outcomes = await asyncio.gather(
+                *(_limited(self._store_disk_folder, store, p) for p in winners.values())
+            )
+            for o in outcomes:
+                counts[o] += 1
+            inserted_count = counts["inserted"]
+            skipped_existing_count = counts["skipped_existing"]
+            skipped_missing_files_count = counts["skipped_missing_files"]
+            skipped_no_domain_count = counts["skipped_no_domain"]
+            failed_count = counts["failed"]
             msg = (
                 f"read_folders_and_store_certificates store={store}: "
                 f"inserted={inserted_count} skipped_existing={skipped_existing_count} "
@@ -222,6 +206,162 @@ class FileService:
             _log_disk_import_error({"event": "batch_fatal", "store": store}, e)
             return {"success": False, "message": str(e), "processed": 0}
 
+    def _parse_disk_folder(self, store: str, store_dir: str, folder_name: str) -> Union[str, dict[str, Any]]:
+        """读盘 + openssl 解析（线程池中执行）；成功返回待入库的 dict，否则返回 `_IMPORT_OUTCOMES` 之一。"""
+        folder_path = os.path.join(store_dir, folder_name)
+        cert_file = os.path.join(folder_path, "cert.crt")
+        key_file = os.path.join(folder_path, "key.key")
+        if not os.path.exists(cert_file) or not os.path.exists(key_file):
+            has_c = os.path.exists(cert_file)
+            has_k = os.path.exists(key_file)
+            _log_disk_import(
+                {
+                    "event": "skip_missing_files",
+                    "store": store,
+                    "disk_folder": folder_name,
+                    "path": folder_path,
+                    "has_cert_crt": has_c,
+                    "has_key_key": has_k,
+                }
+            )
+            return "skipped_missing_files"
+        try:
+            with open(cert_file, encoding="utf-8") as f:
+                cert_pem = f.read()
+            with open(key_file, encoding="utf-8") as f:
+                key_pem = f.read()
+            cert_info = extract_cert_info_from_pem_sync(cert_pem)
+            domain = cert_info.get("common_name") or (
+                cert_info.get("subject") or {}
+            ).get("CN", "")
+            if not domain:
+                _log_disk_import(
+                    {
+                        "event": "skip_no_domain",
+                        "store": store,
+                        "disk_folder": folder_name,
+                        "path": folder_path,
+                    }
+                )
+                return "skipped_no_domain"
+            parsed_sans = cert_info.get("sans", [])
+            all_domains = cert_info.get("all_domains", [])
+            if not isinstance(all_domains, list):
+                all_domains = []
+            if domain and domain not in all_domains:
+                all_domains.insert(0, domain)
+            if parsed_sans:
+                for san in parsed_sans:
+                    if san and san not in all_domains:
+                        all_domains.append(san)
+            return {
+                "folder_name": folder_name,
+                "folder_path": folder_path,
+                "domain": domain,
+                "cert_pem": cert_pem,
+                "key_pem": key_pem,
+                "all_domains": all_domains,
+                "cert_info": cert_info,
+            }
+        except Exception as e:  # noqa: BLE001
+            _log_disk_import_error(
+                {
+                    "event": "row_error",
+                    "store": store,
+                    "disk_folder": folder_name,
+                    "path": folder_path,
+                },
+                e,
+            )
+            return "failed"
+
+    def _store_disk_folder(self, store: str, parsed: dict[str, Any]) -> str:
+        """单个已解析目录入库（线程池中执行）；返回 `_IMPORT_OUTCOMES` 之一。"""
+        folder_name = parsed["folder_name"]
+        domain = parsed["domain"]
+        all_domains = parsed["all_domains"]
+        cert_info = parsed["cert_info"]
+        try:
+            with self.database_repo.db_session.get_session() as session:
+                existing = (
+                    session.query(TLSCertificate)
+                    .filter(TLSCertificate.domain == domain)
+                    .first()
+                )
+                if existing:
+                    _log_disk_import(
+                        {
+                            "event": "skip_domain_exists",
+                            "store": store,
+                            "disk_folder": folder_name,
+                            "domain": domain,
+                            "certificate_id": existing.id,
+                            "db_folder_name": existing.folder_name,
+                            "db_status": existing.status.value if existing.status else None,
+                            "db_issuer": existing.issuer,
+                            "db_not_before": _fmt_dt(existing.not_before),
+                            "db_not_after": _fmt_dt(existing.not_after),
+                            "db_days_remaining": existing.days_remaining,
+                            "db_sans": existing.sans,
+                            "db_updated_at": _fmt_dt(existing.updated_at),
+                        }
+                    )
+                    return "skipped_existing"
+                new_cert = TLSCertificate(
+                    domain=domain,
+                    folder_name=folder_name,
+                    certificate=parsed["cert_pem"],
+                    private_key=parsed["key_pem"],
+                    status=CertificateStatus.SUCCESS,
+                    sans=all_domains if all_domains else [],
+                    issuer=cert_info.get("issuer", "Let's Encrypt"),
+                    not_before=cert_info.get("not_before"),
+                    not_after=cert_info.get("not_after"),
+                    is_valid=cert_info.get("is_valid", True),
+                    days_remaining=cert_info.get("days_remaining"),
+                )
+                session.add(new_cert)
+                session.flush()
+                _log_disk_import(
+                    {
+                        "event": "insert_ok",
+                        "store": store,
+                        "disk_folder": folder_name,
+                        "certificate_id": new_cert.id,
+                        "domain": domain,
+                        "issuer": new_cert.issuer,
+                        "not_before": _fmt_dt(new_cert.not_before),
+                        "not_after": _fmt_dt(new_cert.not_after),
+                        "days_remaining": new_cert.days_remaining,
+                        "is_valid": new_cert.is_valid,
+                        "sans": new_cert.sans,
+                    }
+                )
+                return "inserted"
+        except IntegrityError:
+            # 其他实例 / 并发请求先插入了同一域名（uq_tls_certificates_domain）
+            _log_disk_import(
+                {
+                    "event": "skip_domain_exists",
+                    "store": store,
+                    "disk_folder": folder_name,
+                    "domain": domain,
+                    "reason": "concurrent_insert",
+                }
+            )
+            return "skipped_existing"
+        except Exception as e:  # noqa: BLE001
+            _log_disk_import_error(
+                {
+                    "event": "row_error",
+                    "store": store,
+                    "disk_folder": folder_name,
+                    "path": parsed["folder_path"],
+                },
+                e,
+            )
+            return "failed"
+
     def export_certificates(self) -> dict[str, Any]:
         try:
             cert_dicts, _total = self.database_repo.get_certificate_list(
@@ -229,41 +369,37 @@ class FileService:
             )
             exported_certs: list[dict[str, Any]] = []
             store = WEBSITES_STORE
-            for cert_dict in cert_dicts:
-                domain = cert_dict.get("domain")
-                if not domain:
-                    continue
-                cert_detail = self.database_repo.get_certificate_by_domain(domain)
-                if not cert_detail:
-                    continue
-                folder_name = cert_detail.get("folder_name")
-                if folder_name:
-                    store_dir = os.path.join(self.base_dir, store.capitalize())
-                    folder_path = os.path.join(store_dir, folder_name)
-                    os.makedirs(folder_path, exist_ok=True)
-                    cert_file = os.path.join(folder_path, "cert.crt")
-                    key_file = os.path.join(folder_path, "key.key")
-                    with open(cert_file, "w", encoding="utf-8") as f:
-                        f.write(cert_detail.get("certificate", "") or "")
-                    with open(key_file, "w", encoding="utf-8") as f:
-                        f.write(cert_detail.get("private_key", "") or "")
-                nb = cert_detail.get("not_before")
-                na = cert_detail.get("not_after")
-                exported_certs.append(
-                    {
-                        "domain": cert_detail.get("domain"),
-                        "folder_name": cert_detail.get("folder_name"),
-                        "status": cert_detail.get("status"),
-                        "certificate": cert_detail.get("certificate"),
-                        "private_key": cert_detail.get("private_key"),
-                        "sans": cert_detail.get("sans") or [],
-                        "issuer": cert_detail.get("issuer"),
-                        "not_before": nb.isoformat() if nb and hasattr(nb, "isoformat") else nb,
-                        "not_after": na.isoformat() if na and hasattr(na, "isoformat") else na,
-                        "is_valid": cert_detail.get("is_valid"),
-                        "days_remaining": cert_detail.get("days_remaining"),
-                    }
-                )
+            with self._export_batch() as batch:
+                for cert_dict in cert_dicts:
+                    domain = cert_dict.get("domain")
+                    if not domain:
+                        continue
+                    cert_detail = self.database_repo.get_certificate_by_domain(domain)
+                    if not cert_detail:
+                        continue
+                    folder_name = cert_detail.get("folder_name")
+                    folder_path = self._resolve_store_path(store, folder_name, allow_root=False) if folder_name else None
+                    if folder_path:
+                        os.makedirs(folder_path, exist_ok=True)
+                        batch.write(os.path.join(folder_path, "cert.crt"), cert_detail.get("certificate", "") or "")
+                        batch.write(os.path.join(folder_path, "key.key"), cert_detail.get("private_key", "") or "")
+                    nb = cert_detail.get("not_before")
+                    na = cert_detail.get("not_after")
+                    exported_certs.append(
+                        {
+                            "domain": cert_detail.get("domain"),
+                            "folder_name": cert_detail.get("folder_name"),
+                            "status": cert_detail.get("status"),
+                            "certificate": cert_detail.get("certificate"),
+                            "private_key": cert_detail.get("private_key"),
+                            "sans": cert_detail.get("sans") or [],
+                            "issuer": cert_detail.get("issuer"),
+                            "not_before": nb.isoformat() if nb and hasattr(nb, "isoformat") else nb,
+                            "not_after": na.isoformat() if na and hasattr(na, "isoformat") else na,
+                            "is_valid": cert_detail.get("is_valid"),
+                            "days_remaining": cert_detail.get("days_remaining"),
+                        }
+                    )
             return {
                 "success": True,
                 "message": f"Successfully exported {len(exported_certs)} certificates",
@@ -282,110 +418,29 @@ class FileService:
     def export_single_certificate(self, certificate_id: str) -> dict[str, Any]:
         store = WEBSITES_STORE
         try:
-            cert_detail = self.database_repo.get_certificate_by_id(certificate_id)
-            if not cert_detail:
+            rows = self.database_repo.get_certificates_for_export([certificate_id])
+            if not rows:
                 return {
                     "success": False,
                     "message": f"Certificate not found: {certificate_id}",
                     "certificate_id": certificate_id,
                 }
-            folder_name = cert_detail.get("folder_name")
-            if not folder_name:
-                return {
-                    "success": False,
-                    "message": f"Folder name not found for certificate: {certificate_id}",
-                    "certificate_id": certificate_id,
-                }
-            domain = cert_detail.get("domain")
-            certificate = cert_detail.get("certificate", "") or ""
-            private_key = cert_detail.get("private_key", "") or ""
-            if not certificate or not private_key:
+            with self._export_batch() as batch:
+                outcome = self._export_row(store, rows[0], batch)
+            if not outcome["success"]:
                 return {
                     "success": False,
-                    "message": f"Certificate or private key is empty for certificate: {certificate_id}",
+                    "message": outcome["message"],
                     "certificate_id": certificate_id,
                 }
-            store_dir = os.path.join(self.base_dir, store.capitalize())
-            folder_path = os.path.join(store_dir, folder_name)
-            os.makedirs(folder_path, exist_ok=True)
-            with open(os.path.join(folder_path, "cert.crt"), "w", encoding="utf-8") as f:
-                f.write(certificate)
-            with open(os.path.join(folder_path, "key.key"), "w", encoding="utf-8") as f:
-                f.write(private_key)
-            if self.database_repo.db_session.enable_mysql:
-                try:
-                    cert_info = extract_cert_info_from_pem_sync(certificate)
-                    parsed_sans = cert_info.get("sans", [])
-                    all_domains = cert_info.get("all_domains", [])
-                    if not isinstance(all_domains, list):
-                        all_domains = []
-                    if domain and domain not in all_domains:
-                        all_domains.insert(0, domain)
-                    if parsed_sans:
-                        for san in parsed_sans:
-                            if san and san not in all_domains:
-                                all_domains.append(san)
-                    with self.database_repo.db_session.get_session() as session:
-                        existing = (
-                            session.query(TLSCertificate)
-                            .filter(TLSCertificate.domain == domain)
-                            .first()
-                        )
-                        if existing:
-                            existing.folder_name = folder_name
-                            existing.certificate = certificate
-                            existing.private_key = private_key
-                            existing.sans = all_domains if all_domains else cert_detail.get("sans", [])
-                            existing.issuer = cert_info.get("issuer") or cert_detail.get("issuer")
-                            existing.not_before = cert_info.get("not_before") or cert_detail.get(
-                                "not_before"
-                            )
-                            existing.not_after = cert_info.get("not_after") or cert_detail.get(
-                                "not_after"
-                            )
-                            existing.is_valid = (
-                                cert_info.get("is_valid")
-                                if cert_info.get("is_valid") is not None
-                                else cert_detail.get("is_valid", True)
-                            )
-                            existing.days_remaining = (
-                                cert_info.get("days_remaining")
-                                if cert_info.get("days_remaining") is not None
-                                else cert_detail.get("days_remaining")
-                            )
-                            existing.status = CertificateStatus.SUCCESS
-                            existing.email = cert_detail.get("email")
-                            existing.updated_at = datetime.now()
-                        else:
-                            session.add(
-                                TLSCertificate(
-                                    domain=domain,
-                                    folder_name=folder_name,
-                                    certificate=certificate,
-                                    private_key=private_key,
-                                    status=CertificateStatus.SUCCESS,
-                                    sans=all_domains if all_domains else cert_detail.get("sans", []),
-                                    issuer=cert_info.get("issuer") or cert_detail.get("issuer"),
-                                    not_before=cert_info.get("not_before")
-                                    or cert_detail.get("not_before"),
-                                    not_after=cert_info.get("not_after") or cert_detail.get("not_after"),
-                                    is_valid=cert_info.get("is_valid")
-                                    if cert_info.get("is_valid") is not None
-                                    else cert_detail.get("is_valid", True),
-                                    days_remaining=cert_info.get("days_remaining")
-                                    if cert_info.get("days_remaining") is not None
-                                    else cert_detail.get("days_remaining"),
-                                    email=cert_detail.get("email"),
-                                )
-                            )
-                except Exception as e:  # noqa: BLE001
-                    logger.error("export_single DB upsert: %s", e, exc_info=True)
+            if outcome["changes"]:
+                self.database_repo.update_export_metadata({certificate_id: outcome["changes"]})
             return {
                 "success": True,
-                "message": f"Successfully exported certificate for {domain} to {store}/{folder_name}",
+                "message": outcome["message"],
                 "store": store,
-                "folder_name": folder_name,
-                "domain": domain,
+                "folder_name": outcome["folder_name"],
+                "domain": outcome["domain"],
                 "certificate_id": certificate_id,
             }
         except Exception as e:  # noqa: BLE001
@@ -396,100 +451,253 @@ class FileService:
                 "certificate_id": certificate_id,
             }
 
-    def list_directory(self, store: str = WEBSITES_STORE, subpath: Optional[str] = None) -> dict[str, Any]:
+    def export_certificates_batch(self, certificate_ids: list[str]) -> dict[str, Any]:
+        """一次查询取出全部证书，线程池并发写盘 + 解析，元数据有变化的行在一个事务内回写。"""
+        store = WEBSITES_STORE
+        ids = list(dict.fromkeys(i for i in certificate_ids if i))
         try:
-            store_dir = os.path.join(self.base_dir, store.capitalize())
-            if subpath:
-                subpath = subpath.lstrip("/").lstrip("\\")
-                subpath = os.path.normpath(subpath).replace("..", "")
-                target_dir = os.path.join(store_dir, subpath)
-            else:
-                target_dir = store_dir
-            target_dir = os.path.abspath(target_dir)
-            store_dir_abs = os.path.abspath(store_dir)
-            if not target_dir.startswith(store_dir_abs):
+            rows = self.database_repo.get_certificates_for_export(ids)
+            outcomes: dict[str, dict[str, Any]] = {}
+            with self._export_batch() as batch:
+                if rows:
+                    workers = min(_EXPORT_CONCURRENCY, len(rows))
+                    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cert-export") as pool:
+                        for row, outcome in zip(rows, pool.map(lambda r: self._export_row(store, r, batch), rows)):
+                            outcomes[row["id"]] = outcome
+            changes = {cid: o["changes"] for cid, o in outcomes.items() if o["changes"]}
+            db_updated = self.database_repo.update_export_metadata(changes) if changes else 0
+            results: list[dict[str, Any]] = []
+            for cid in ids:
+                o = outcomes.get(cid)
+                if o is None:
+                    results.append(
+                        {
+                            "certificate_id": cid,
+                            "success": False,
+                            "message": f"Certificate not found: {cid}",
+                        }
+                    )
+                    continue
+                results.append(
+                    {
+                        "certificate_id": cid,
+                        "success": o["success"],
+                        "message": o["message"],
+                        "domain": o.get("domain"),
+                        "folder_name": o.get("folder_name"),
+                    }
+                )
+            exported = sum(1 for r in results if r["success"])
+            return {
+                "success": True,
+                "message": f"Exported {exported} of {len(ids)} certificates to {store}",
+                "store": store,
+                "total": len(ids),
+                "exported": exported,
+                "failed": len(ids) - exported,
+                "db_updated": db_updated,
+                "files_written": batch.stats.written,
+                "files_unchanged": batch.stats.skipped,
+                "results": results,
+            }
+        except Exception as e:  # noqa: BLE001
+            logger.error("export_certificates_batch: %s", e, exc_info=True)
+            return {
+                "success": False,
+                "message": str(e),
+                "store": store,
+                "total": len(ids),
+                "exported": 0,
+                "failed": len(ids),
+                "db_updated": 0,
+                "files_written": 0,
+                "files_unchanged": 0,
+                "results": [],
+            }
+
+    @contextlib.contextmanager
+    def _export_batch(self) -> Iterator[AtomicWriteBatch]:
+        """导出共用的写入批次：正常退出时统一替换文件、每个目录 fsync 一次，并失效对应的目录列举缓存。"""
+        with self._writer.batch() as batch:
+            yield batch
+        for path in batch.stats.paths:
+            self._listings.invalidate(os.path.dirname(path))
+
+    def _export_row(self, store: str, row: dict[str, Any], batch: AtomicWriteBatch) -> dict[str, Any]:
+        """暂存单张证书的写入（线程池中执行）；`changes` 为需要回写的元数据列，未变化时为空。"""
+        certificate_id = row["id"]
+        domain = row.get("domain")
+        folder_name = row.get("folder_name")
+        if not folder_name:
+            return {
+                "success": False,
+                "message": f"Folder name not found for certificate: {certificate_id}",
+                "changes": {},
+            }
+        certificate = row.get("certificate") or ""
+        private_key = row.get("private_key") or ""
+        if not certificate or not private_key:
+            return {
+                "success": False,
+                "message": f"Certificate or private key is empty for certificate: {certificate_id}",
+                "changes": {},
+            }
+        folder_path = self._resolve_store_path(store, folder_name, allow_root=False)
+        if folder_path is None:
+            return {
+                "success": False,
+                "message": f"Invalid folder name for certificate: {certificate_id}",
+                "changes": {},
+            }
+        try:
+            os.makedirs(folder_path, exist_ok=True)
+            batch.write(os.path.join(folder_path, "cert.crt"), certificate)
+            batch.write(os.path.join(folder_path, "key.key"), private_key)
+        except OSError as e:
+            logger.error("export %s: %s", certificate_id, e, exc_info=True)
+            return {"success": False, "message": str(e), "changes": {}}
+        changes: dict[str, Any] = {}
+        if self.database_repo.db_session.enable_mysql:
+            try:
+                cert_info = extract_cert_info_from_pem_sync(certificate)
+                changes = _changed_export_metadata(row, cert_info)
+            except Exception as e:  # noqa: BLE001
+                logger.error("export %s parse: %s", certificate_id, e, exc_info=True)
+        return {
+            "success": True,
+            "message": f"Successfully exported certificate for {domain} to {store}/{folder_name}",
+            "domain": domain,
+            "folder_name": folder_name,
+            "changes": changes,
+        }
+
+    def _resolve_store_path(
+        self, store: str, rel: Optional[str], *, allow_root: bool = True, follow_links: bool = True
+    ) -> Optional[str]:
+        """`rel` → store 目录下的真实绝对路径；越出 store（`..`、绝对路径、指向外部的符号链接）返回 None。
+
+        所有按路径访问磁盘的接口共用，`allow_root=False` 时拒绝 store 根目录本身（删除类操作）。
+        `follow_links=False` 时只解析父目录、保留最后一段原样：删除符号链接时删的是链接本身而不是它指向的目标。
+        """
+        store_dir = os.path.realpath(os.path.join(self.base_dir, store.capitalize()))
+        cleaned = (rel or "").replace("\\", "/").lstrip("/")
+        if follow_links:
+            target = os.path.realpath(os.path.join(store_dir, cleaned))
+        else:
+            lexical = os.path.normpath(os.path.join(store_dir, cleaned))
+            if lexical != store_dir:
+                lexical = os.path.join(os.path.realpath(os.path.dirname(lexical)), os.path.basename(lexical))
+            target = lexical
+        try:
+            if os.path.commonpath([store_dir, target]) != store_dir:
+                return None
+        except ValueError:
+            return None
+        if not allow_root and target == store_dir:
+            return None
+        return target
+
+    def list_directory(
+        self,
+        store: str = WEBSITES_STORE,
+        subpath: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        depth: int = 1,
+    ) -> dict[str, Any]:
+        """分页作用于当前目录一层；`depth > 1` 时子目录项带 `children`（不分页）。"""
+        try:
+            store_dir = os.path.realpath(os.path.join(self.base_dir, store.capitalize()))
+            subpath = (subpath or "").replace("\\", "/").strip("/")
+            target_dir = self._resolve_store_path(store, subpath)
+            if target_dir is None:
                 return {"success": False, "message": "Invalid path", "items": []}
             if not os.path.exists(target_dir):
                 return {"success": False, "message": f"Directory not found: {subpath or store}", "items": []}
             if not os.path.isdir(target_dir):
                 return {"success": False, "message": "Path is not a directory", "items": []}
-            items: list[dict[str, Any]] = []
-            for entry in sorted(os.listdir(target_dir)):
-                if entry.startswith("."):
-                    continue
-                entry_path = os.path.join(target_dir, entry)
-                rel_path = os.path.relpath(entry_path, store_dir)
-                stat_info = os.stat(entry_path)
-                is_dir = os.path.isdir(entry_path)
-                items.append(
-                    {
-                        "name": entry,
-                        "type": "directory" if is_dir else "file",
-                        "path": rel_path.replace("\\", "/"),
-                        "size": stat_info.st_size if not is_dir else None,
-                        "modified": stat_info.st_mtime,
-                    }
-                )
-            current_path = subpath.replace("\\", "/") if subpath else ""
+            depth = max(1, min(depth, _MAX_LIST_DEPTH))
+            entries = self._listings.list(target_dir, store_dir)
+            offset = max(0, offset)
+            page = entries[offset : offset + limit] if limit is not None else entries[offset:]
+            items = [self._with_children(i, store_dir, depth - 1) for i in page]
             return {
                 "success": True,
                 "message": "Directory listed successfully",
                 "store": store,
-                "path": current_path,
+                "path": subpath,
                 "items": items,
+                "total": len(entries),
+                "offset": offset,
+                "limit": limit,
+                "has_more": offset + len(page) < len(entries),
             }
         except Exception as e:  # noqa: BLE001
             logger.error("list_directory: %s", e, exc_info=True)
             return {"success": False, "message": str(e), "items": []}
 
+    def _with_children(self, item: dict[str, Any], store_dir: str, depth: int) -> dict[str, Any]:
+        if depth <= 0 or item["type"] != "directory":
+            return dict(item)
+        child_dir = os.path.realpath(os.path.join(store_dir, item["path"]))
+        try:
+            if os.path.commonpath([store_dir, child_dir]) != store_dir:
+                return dict(item)
+            children = self._listings.list(child_dir, store_dir)
+        except (OSError, ValueError):
+            return dict(item)
+        return {**item, "children": [self._with_children(c, store_dir, depth - 1) for c in children]}
+
     def download_file(self, store: str = WEBSITES_STORE, file_path: str = "") -> dict[str, Any]:
+        """只定位与 stat，不读内容：由路由以文件响应流式发送（支持 Range / 条件请求）。"""
         try:
-            store_dir = os.path.join(self.base_dir, store.capitalize())
-            file_path = file_path.lstrip("/").lstrip("\\")
-            file_path = os.path.normpath(file_path).replace("..", "")
-            target_file = os.path.join(store_dir, file_path)
-            target_file = os.path.abspath(target_file)
-            store_dir_abs = os.path.abspath(store_dir)
-            if not target_file.startswith(store_dir_abs):
-                return {"success": False, "message": "Invalid path", "content": None, "filename": None}
-            if not os.path.exists(target_file) or not os.path.isfile(target_file):
-                return {"success": False, "message": "File not found", "content": None, "filename": None}
-            with open(target_file, "rb") as f:
-                content = f.read()
+            target_file = self._resolve_store_path(store, file_path, allow_root=False)
+            if target_file is None:
+                return {"success": False, "message": "Invalid path", "path": None, "filename": None}
+            try:
+                st = os.stat(target_file)
+            except FileNotFoundError:
+                st = None
+            if st is None or not stat.S_ISREG(st.st_mode):
+                return {"success": False, "message": "File not found", "path": None, "filename": None}
             return {
                 "success": True,
-                "message": "File read successfully",
-                "content": content,
+                "message": "File located successfully",
+                "path": target_file,
+                "stat": st,
                 "filename": os.path.basename(target_file),
                 "mime_type": "application/octet-stream",
             }
         except Exception as e:  # noqa: BLE001
             logger.error("download_file: %s", e, exc_info=True)
-            return {"success": False, "message": str(e), "content": None, "filename": None}
+            return {"success": False, "message": str(e), "path": None, "filename": None}
 
-    def get_file_content(self, store: str = WEBSITES_STORE, file_path: str = "") -> dict[str, Any]:
+    def get_file_content(
+        self,
+        store: str = WEBSITES_STORE,
+        file_path: str = "",
+        offset: int = 0,
+        max_bytes: int = DEFAULT_PREVIEW_BYTES,
+    ) -> dict[str, Any]:
+        """预览 [offset, offset + max_bytes) 一段；`truncated` 时可用 `next_offset` 继续读取。"""
         try:
-            store_dir = os.path.join(self.base_dir, store.capitalize())
-            file_path = file_path.lstrip("/").lstrip("\\")
-            file_path = os.path.normpath(file_path).replace("..", "")
-            target_file = os.path.join(store_dir, file_path)
-            target_file = os.path.abspath(target_file)
-            store_dir_abs = os.path.abspath(store_dir)
-            if not target_file.startswith(store_dir_abs):
+            target_file = self._resolve_store_path(store, file_path, allow_root=False)
+            if target_file is None:
                 return {"success": False, "message": "Invalid path", "content": None, "filename": None}
-            if not os.path.exists(target_file) or not os.path.isfile(target_file):
+            if not os.path.isfile(target_file):
                 return {"success": False, "message": "File not found", "content": None, "filename": None}
-            try:
-                with open(target_file, encoding="utf-8") as f:
-                    content = f.read()
-            except UnicodeDecodeError:
-                with open(target_file, encoding="latin-1") as f:
-                    content = f.read()
+            p = read_preview(target_file, offset, max_bytes)
             return {
                 "success": True,
-                "message": "File read successfully",
-                "content": content,
+                "message": "Binary file, download to view" if p.binary else "File read successfully",
+                "content": p.content,
                 "filename": os.path.basename(target_file),
+                "size": p.size,
+                "offset": p.offset,
+                "next_offset": p.next_offset,
+                "truncated": p.truncated,
+                "binary": p.binary,
+                "encoding": p.encoding,
             }
         except Exception as e:  # noqa: BLE001
             logger.error("get_file_content: %s", e, exc_info=True)
@@ -497,16 +705,26 @@ class FileService:
 
     def delete_folder(self, store: str = WEBSITES_STORE, folder_name: str = "") -> dict[str, Any]:
         try:
-            store_dir = os.path.join(self.base_dir, store.capitalize())
-            folder_path = os.path.join(store_dir, folder_name)
-            if not os.path.exists(folder_path):
+            folder_path = self._resolve_store_path(store, folder_name, allow_root=False, follow_links=False)
+            if folder_path is None:
+                return {
+                    "success": False,
+                    "message": "Invalid path",
+                    "store": store,
+                    "folder_name": folder_name,
+                }
+            if not os.path.lexists(folder_path):
                 return {
                     "success": False,
                     "message": f"Folder not found: {folder_path}",
                     "store": store,
                     "folder_name": folder_name,
                 }
-            shutil.rmtree(folder_path)
+            if os.path.islink(folder_path):
+                os.unlink(folder_path)
+            else:
+                shutil.rmtree(folder_path)
+            self._listings.invalidate(folder_path)
             return {
                 "success": True,
                 "message": f"Successfully deleted folder: {store}/{folder_name}",
@@ -519,9 +737,16 @@ class FileService:
 
     def delete_file_or_folder_fs(self, store: str = WEBSITES_STORE, path: str = "", item_type: str = "") -> dict[str, Any]:
         try:
-            store_dir = os.path.join(self.base_dir, store.capitalize())
-            target_path = os.path.join(store_dir, path)
-            if not os.path.exists(target_path):
+            target_path = self._resolve_store_path(store, path, allow_root=False, follow_links=False)
+            if target_path is None:
+                return {
+                    "success": False,
+                    "message": "Invalid path",
+                    "store": store,
+                    "path": path,
+                    "item_type": item_type,
+                }
+            if not os.path.lexists(target_path):
                 return {
                     "success": False,
                     "message": f"Path not found: {path}",
@@ -529,7 +754,8 @@ class FileService:
                     "path": path,
                     "item_type": item_type,
                 }
-            is_file = os.path.isfile(target_path)
+            is_link = os.path.islink(target_path)
+            is_file = os.path.isfile(target_path) or (is_link and not os.path.exists(target_path))
             is_dir = os.path.isdir(target_path)
             if item_type == "file" and not is_file:
                 return {
@@ -547,10 +773,11 @@ class FileService:
                     "path": path,
                     "item_type": item_type,
                 }
-            if is_file:
+            if is_link or is_file:
                 os.remove(target_path)
             else:
                 shutil.rmtree(target_path)
+            self._listings.invalidate(target_path)
             return {
                 "success": True,
                 "message": f"Successfully deleted {item_type}: {store}/{path}",
@@ -4,12 +4,14 @@ from __future__ import annotations
 
 from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from pydantic import BaseModel, Field
 from starlette.responses import JSONResponse
 
 from apps.user.services.auth_service import AuthService
+from apps.user.services.avatar_storage import AvatarTooLarge
+from apps.user.services.password_hasher import PasswordHasherBusy
 
 router = APIRouter()
 _bearer = HTTPBearer(auto_error=False)
@@ -26,6 +28,16 @@ def _err(http_status: int, message: str, biz_code: int = 400) -> JSONResponse:
     )
 
 
+# multipart 边界与字段头的余量：Content-Length 超过「上限 + 余量」时不读请求体直接 413
+_MULTIPART_OVERHEAD_BYTES = 16 * 1024
+
+
+def _busy() -> JSONResponse:
+    resp = _err(429, "请求过多，请稍后重试", biz_code=429)
+    resp.headers["Retry-After"] = "1"
+    return resp
+
+
 def get_auth_service(request: Request) -> AuthService:
     svc = getattr(request.app.state, "auth_service", None)
     if svc is None:
@@ -91,12 +103,15 @@ async def signup(
     body: SignupBody,
     auth: AuthService = Depends(get_auth_service),
 ) -> JSONResponse:
-    data, msg = auth.signup(
-        body.email,
-        body.password,
-        body.verification_code,
-        body.display_name,
-    )
+    try:
+        data, msg = await auth.signup(
+            body.email,
+            body.password,
+            body.verification_code,
+            body.display_name,
+        )
+    except PasswordHasherBusy:
+        return _busy()
     if not data:
         return _err(400, msg)
     return _ok(data, msg)
@@ -107,7 +122,10 @@ async def login_email(
     body: LoginEmailBody,
     auth: AuthService = Depends(get_auth_service),
 ) -> JSONResponse:
-    data, msg = auth.login(body.email, body.password)
+    try:
+        data, msg = await auth.login(body.email, body.password)
+    except PasswordHasherBusy:
+        return _busy()
     if not data:
         return _err(401, msg, biz_code=401)
     return _ok(data, msg)
@@ -138,13 +156,25 @@ async def get_me(
 
 @router.post("/avatar/upload")
 async def upload_avatar_tmp(
+    request: Request,
     user_id: Annotated[str, Depends(_current_user_id)],
     auth: AuthService = Depends(get_auth_service),
-    file: UploadFile = File(...),
 ) -> JSONResponse:
-    """上传至 tmp 并写入 vault_images；PUT /me 传 `avatar_image_id` 后移至 avatar/（与 Pqttec image_id 流程一致）。"""
-    raw = await file.read()
-    image_id, msg = auth.save_avatar_tmp(user_id, file.filename or "avatar.bin", raw)
+    """上传至 tmp 并写入 vault_images；PUT /me 传 `avatar_image_id` 后移至 avatar/（与 Pqttec image_id 流程一致）。
+
+    multipart 字段 `file` 边收边写：超过上限即返回 413，不再读取剩余请求体。
+    """
+    too_large = f"图片过大（最大 {auth.avatar_max_bytes // (1024 * 1024)}MB）"
+    try:
+        declared = int(request.headers.get("content-length") or 0)
+    except ValueError:
+        declared = 0
+    if declared > auth.avatar_max_bytes + _MULTIPART_OVERHEAD_BYTES:
+        return _err(413, too_large, biz_code=413)
+    try:
+        image_id, msg = await auth.save_avatar_upload(user_id, request.headers, request.stream())
+    except AvatarTooLarge:
+        return _err(413, too_large, biz_code=413)
     if not image_id:
         return _err(400, msg)
     return _ok({"image_id": image_id}, msg)
@@ -169,7 +199,10 @@ async def update_password(
     user_id: Annotated[str, Depends(_current_user_id)],
     auth: AuthService = Depends(get_auth_service),
 ) -> JSONResponse:
-    ok, msg = auth.update_password(user_id, body.old_password, body.new_password)
+    try:
+        ok, msg = await auth.update_password(user_id, body.old_password, body.new_password)
+    except PasswordHasherBusy:
+        return _busy()
     if not ok:
         return _err(400, msg)
     return _ok(None, msg)
@@ -1,38 +1,60 @@
 # coding=utf-8
-"""公开 GET 头像/图片二进制：与 Pqttec ServeFile 一致，仅允许已落盘到 `avatar/` 的路径。"""
+"""公开 GET 头像/图片二进制：与 Pqttec ServeFile 一致，仅允许已落盘到 `avatar/` 的路径。
+
+文件名为随机 UUID、内容落盘后不变，故返回强 ETag + `immutable` 长缓存；条件请求命中返回 304。
+`?size=N` 返回不小于 N 的最小预生成缩略图（见 AvatarThumbnailer），超过最大变体时返回原图。
+"""
 from __future__ import annotations
 
+import asyncio
 import uuid
-from pathlib import Path
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from starlette.responses import Response
 
-from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import FileResponse
+from apps.user.services.image_file_cache import ImageFileCache, ImageFileEntry
+from utils import ZeroCopyFileResponse, is_not_modified
 
 router = APIRouter(prefix="/vault/images", tags=["images"])
 
+_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# 缩略图暂不可用、临时回退原图时使用
+_CACHE_CONTROL_FALLBACK = "no-cache"
+
+
+def _validators(entry: ImageFileEntry) -> dict[str, str]:
+    return {
+        "ETag": entry.etag,
+        "Last-Modified": entry.last_modified,
+        "Cache-Control": _CACHE_CONTROL if entry.final else _CACHE_CONTROL_FALLBACK,
+    }
+
 
 @router.get("/{image_id}/file")
-async def serve_vault_image_file(image_id: str, request: Request) -> FileResponse:
+async def serve_vault_image_file(
+    image_id: str,
+    request: Request,
+    size: Optional[int] = Query(default=None, ge=1, le=4096),
+) -> Response:
     try:
         uuid.UUID(image_id)
     except ValueError:
         raise HTTPException(status_code=404, detail="Not found") from None
-    repo = getattr(request.app.state, "image_repository", None)
-    data_dir = getattr(request.app.state, "vault_data_dir", None)
-    if repo is None or not data_dir:
+    cache: Optional[ImageFileCache] = getattr(request.app.state, "image_file_cache", None)
+    if cache is None:
         raise HTTPException(status_code=503, detail="服务未就绪")
-    img = repo.get_by_id(image_id)
-    if img is None:
-        raise HTTPException(status_code=404, detail="Not found")
-    rel = (img.file_path or "").strip().replace("\\", "/")
-    if not rel.startswith("avatar/"):
-        raise HTTPException(status_code=404, detail="Not found")
-    root = Path(data_dir).resolve()
-    full = (root / rel).resolve()
-    try:
-        full.relative_to(root)
-    except ValueError:
-        raise HTTPException(status_code=404, detail="Not found") from None
-    if not full.is_file():
+    entry = cache.get(image_id, size)
+    if entry is None:
+        # 未命中：查库 + 路径校验（+ 按需生成缩略图）为同步 IO
+        entry = await asyncio.to_thread(cache.resolve, image_id, size)
+    if entry is None:
         raise HTTPException(status_code=404, detail="Not found")
-    return FileResponse(str(full), media_type=img.mime_type or "application/octet-stream")
+    if is_not_modified(request.headers, entry.etag, entry.stat_result.st_mtime):
+        return Response(status_code=304, headers=_validators(entry))
+    return ZeroCopyFileResponse(
+        entry.path,
+        media_type=entry.mime_type,
+        headers=_validators(entry),
+        stat_result=entry.stat_result,
+    )
@@ -1,6 +1,7 @@
 # coding=utf-8
 from __future__ import annotations
 
+from datetime import datetime
 from typing import Optional
 
 from sqlalchemy import delete, select
@@ -61,3 +62,38 @@ class ImageRepository:
             return
         with self._mysql.get_session() as sess:
             sess.execute(delete(VaultImage).where(VaultImage.id == image_id))
+
+    def list_stale_tmp(self, created_before: datetime, limit: int) -> list[tuple[str, str]]:
+        """未确认（仍指向 `tmp/`）且早于 `created_before` 的 (id, file_path)，最旧在前。"""
+        if not self._mysql.enable_mysql:
+            return []
+        with self._mysql.get_session() as sess:
+            rows = sess.execute(
+                select(VaultImage.id, VaultImage.file_path)
+                .where(VaultImage.file_path.like("tmp/%"), VaultImage.created_at < created_before)
+                .order_by(VaultImage.created_at)
+                .limit(limit)
+            ).all()
+        return [(r[0], r[1]) for r in rows]
+
+    def delete_tmp_by_ids(self, image_ids: list[str]) -> int:
+        """只删仍指向 `tmp/` 的行：并发确认（tmp→avatar）后的行不受影响。"""
+        if not self._mysql.enable_mysql or not image_ids:
+            return 0
+        with self._mysql.get_session() as sess:
+            res = sess.execute(
+                delete(VaultImage).where(VaultImage.id.in_(image_ids), VaultImage.file_path.like("tmp/%"))
+            )
+            return int(res.rowcount or 0)
+
+    def delete_by_uploader_paths(self, uploader_id: str, file_paths: list[str]) -> int:
+        """按上传者（走 idx_vault_images_uploader）+ 路径批量删除。"""
+        if not self._mysql.enable_mysql or not file_paths:
+            return 0
+        with self._mysql.get_session() as sess:
+            res = sess.execute(
+                delete(VaultImage).where(
+                    VaultImage.uploader_id == uploader_id, VaultImage.file_path.in_(file_paths)
+                )
+            )
+            return int(res.rowcount or 0)
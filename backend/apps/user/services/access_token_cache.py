@@ -0,0 +1,56 @@
+# coding=utf-8
+"""已验签 access token 的有界 LRU：sha256(token) → (uid, exp)。
+
+JWT 在 exp 之前不可变，验签结果可安全复用；条目到 exp 即失效，不保存 token 原文。
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class AccessTokenCache:
+    def __init__(self, max_entries: int = 1024) -> None:
+        self.max_entries = max(0, max_entries)
+        self._entries: OrderedDict[bytes, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Optional[str]:
+        if not self.max_entries:
+            return None
+        key = self._key(token)
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is None:
+                self.misses += 1
+                return None
+            uid, exp = hit
+            if exp <= time.time():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return uid
+
+    def put(self, token: str, uid: str, exp: float) -> None:
+        if not self.max_entries or exp <= time.time():
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (uid, exp)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
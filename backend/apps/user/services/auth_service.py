@@ -1,24 +1,36 @@
 # coding=utf-8
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
-import mimetypes
 import re
+import time
 import uuid
-from pathlib import Path
-from typing import Any, Optional
+from typing import Any, AsyncIterator, Optional
 
-import bcrypt
 from sqlalchemy.exc import IntegrityError
+from starlette.datastructures import Headers
 
 from apps.user.models.vault_user import VaultUser
 from apps.user.repos.image_repository import ImageRepository
 from apps.user.repos.user_repository import UserRepository
-from apps.user.services.avatar_storage import AvatarStorageService
+from apps.user.services.access_token_cache import AccessTokenCache
+from apps.user.services.avatar_storage import AvatarStorageService, AvatarTmpUpload
 from apps.user.services.jwt_tokens import JwtTokenService, TokenPair
+from apps.user.services.mail_queue import MailQueue
+from apps.user.services.password_hasher import PasswordHasher
 from apps.user.services.mail_sender import SmtpMailSender, build_verification_email_html
 from apps.user.services.verification_code import VerificationCodeService
 from config.types import AuthConfig
+from utils import (
+    PART_DATA,
+    PART_END,
+    PART_START,
+    LatencyWindow,
+    MultipartStreamError,
+    iter_multipart_file,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +47,8 @@ class AuthService:
         jwt_svc: JwtTokenService,
         avatars: AvatarStorageService,
         images: ImageRepository,
+        hasher: Optional[PasswordHasher] = None,
+        mail_queue: Optional[MailQueue] = None,
     ) -> None:
         self._cfg = auth_config
         self._users = users
@@ -43,6 +57,14 @@ class AuthService:
         self._jwt = jwt_svc
         self._avatars = avatars
         self._images = images
+        self.token_cache = AccessTokenCache(auth_config.JWT_VERIFY_CACHE_SIZE)
+        self.hasher = hasher or PasswordHasher(
+            rounds=auth_config.BCRYPT_ROUNDS,
+            workers=auth_config.PASSWORD_HASH_WORKERS,
+            max_pending=auth_config.PASSWORD_HASH_MAX_PENDING,
+        )
+        self.login_latency = LatencyWindow()
+        self.mail_queue = mail_queue
 
     def send_signup_code(self, email: str) -> tuple[bool, str]:
         email = (email or "").strip().lower()
@@ -51,24 +73,31 @@ class AuthService:
         code = self._codes.generate_code()
         if not self._codes.save_code(email, code):
             return False, "验证码保存失败，请检查 Redis"
+        html = build_verification_email_html(code)
+        if self.mail_queue is not None and self.mail_queue.running:
+            # 验证码已落 Redis 即返回；SMTP 握手与重试在后台发送线程完成
+            if not self.mail_queue.enqueue(email, "NFX-Vault 邮箱验证码", html):
+                return False, "邮件发送繁忙，请稍后重试"
+            return True, "OK"
         try:
             self._mail.send_html(
                 email,
                 "NFX-Vault 邮箱验证码",
-                build_verification_email_html(code),
+                html,
             )
         except Exception as e:  # noqa: BLE001
             logger.exception("发送邮件失败")
             return False, f"邮件发送失败: {e!s}"
         return True, "OK"
 
-    def signup(
+    async def signup(
         self,
         email: str,
         password: str,
         verification_code: str,
         display_name: Optional[str] = None,
     ) -> tuple[Optional[dict[str, Any]], str]:
+        """bcrypt 过载时抛出 PasswordHasherBusy（由路由转 429）；先哈希再核销验证码，客户端按 Retry-After 重试时验证码仍有效。"""
         email = (email or "").strip().lower()
         if not _EMAIL_RE.match(email):
             return None, "邮箱格式无效"
@@ -76,12 +105,12 @@ class AuthService:
             return None, "密码至少 8 位"
         if not verification_code:
             return None, "请填写验证码"
-        if not self._codes.verify_and_consume(email, verification_code.strip()):
+        hashed = await self.hasher.hash(password)
+        if not await asyncio.to_thread(self._codes.verify_and_consume, email, verification_code.strip()):
             return None, "验证码无效或已过期"
-        if self._users.get_by_email(email):
+        if await asyncio.to_thread(self._users.get_by_email, email):
             return None, "该邮箱已注册"
         name = (display_name or "").strip() or email.split("@")[0]
-        hashed = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
         user = VaultUser(
             email=email,
             password_hash=hashed,
@@ -90,26 +119,42 @@ class AuthService:
             is_active=True,
         )
         try:
-            self._users.create(user)
+            await asyncio.to_thread(self._users.create, user)
         except IntegrityError:
             logger.warning("signup duplicate email (race or retry): %s", email)
             return None, "该邮箱已注册"
         pair = self._jwt.issue_pair(user.id, user.email, user.display_name)
         return self._login_payload(user, pair), "OK"
 
-    def login(self, email: str, password: str) -> tuple[Optional[dict[str, Any]], str]:
+    async def login(self, email: str, password: str) -> tuple[Optional[dict[str, Any]], str]:
+        """bcrypt 过载时抛出 PasswordHasherBusy（由路由转 429）。"""
+        started = time.perf_counter()
         email = (email or "").strip().lower()
-        user = self._users.get_by_email(email)
-        if not user or not user.is_active:
-            return None, "邮箱或密码错误"
+        ok = False
         try:
-            ok = bcrypt.checkpw(password.encode("utf-8"), user.password_hash.encode("utf-8"))
-        except ValueError:
-            return None, "邮箱或密码错误"
-        if not ok:
-            return None, "邮箱或密码错误"
-        pair = self._jwt.issue_pair(user.id, user.email, user.display_name)
-        return self._login_payload(user, pair), "OK"
+            user = await asyncio.to_thread(self._users.get_by_email, email)
+            if not user or not user.is_active:
+                return None, "邮箱或密码错误"
+            ok = await self.hasher.check(password, user.password_hash)
+            if not ok:
+                return None, "邮箱或密码错误"
+            pair = self._jwt.issue_pair(user.id, user.email, user.display_name)
+            return self._login_payload(user, pair), "OK"
+        finally:
+            elapsed = time.perf_counter() - started
+            self.login_latency.observe(elapsed)
+            logger.info(
+                json.dumps(
+                    {
+                        "task": "auth",
+                        "event": "login",
+                        "success": ok,
+                        "duration_ms": round(elapsed * 1000, 1),
+                        "hash_pending": self.hasher.pending,
+                    },
+                    ensure_ascii=False,
+                )
+            )
 
     def refresh(self, refresh_token: str) -> tuple[Optional[dict[str, Any]], str]:
         try:
@@ -134,25 +179,52 @@ class AuthService:
             return None, "用户不存在"
         return user.to_public_dict(), "OK"
 
-    def save_avatar_tmp(self, user_id: str, filename: str, raw: bytes) -> tuple[Optional[str], str]:
-        rel, msg = self._avatars.save_tmp_file(user_id, filename, raw)
+    @property
+    def avatar_max_bytes(self) -> int:
+        return self._avatars.max_bytes
+
+    async def save_avatar_upload(
+        self, user_id: str, headers: Headers, stream: AsyncIterator[bytes]
+    ) -> tuple[Optional[str], str]:
+        """流式接收 multipart 字段 `file` 写入 tmp：内存占用为单块大小，超限立即抛 AvatarTooLarge。"""
+        upload: Optional[AvatarTmpUpload] = None
+        try:
+            async for kind, value in iter_multipart_file(headers, stream, "file"):
+                if kind == PART_START:
+                    upload, msg = self._avatars.open_tmp_upload(user_id, str(value))
+                    if upload is None:
+                        return None, msg
+                elif kind == PART_DATA and upload is not None:
+                    err = await asyncio.to_thread(upload.write, value)
+                    if err:
+                        return None, err
+                elif kind == PART_END:
+                    break
+        except MultipartStreamError as e:
+            if upload is not None:
+                await asyncio.to_thread(upload.abort)
+            return None, str(e)
+        except OSError as e:
+            logger.exception("save_avatar_upload")
+            if upload is not None:
+                await asyncio.to_thread(upload.abort)
+            return None, f"保存失败: {e!s}"
+        except BaseException:
+            # AvatarTooLarge / 客户端断开：删除半截文件后交给上层
+            if upload is not None:
+                upload.abort()
+            raise
+        if upload is None:
+            return None, "缺少上传文件 file"
+        rel, msg = await asyncio.to_thread(upload.finish)
         if not rel:
             return None, msg
         image_id = str(uuid.uuid4())
-        mime, _enc = mimetypes.guess_type(filename or "")
-        if not mime:
-            ext = Path(filename or "").suffix.lower()
-            mime = {
-                ".jpg": "image/jpeg",
-                ".jpeg": "image/jpeg",
-                ".png": "image/png",
-                ".gif": "image/gif",
-                ".webp": "image/webp",
-            }.get(ext, "application/octet-stream")
-        self._images.create(
+        await asyncio.to_thread(
+            self._images.create,
             image_id=image_id,
             file_path=rel,
-            mime_type=mime,
+            mime_type=upload.mime_type or "application/octet-stream",
             uploader_id=user_id,
         )
         return image_id, "OK"
@@ -225,23 +297,43 @@ class AuthService:
             self._purge_image_row_and_file(oid)
         return updated.to_public_dict(), "OK"
 
-    def update_password(self, user_id: str, old_password: str, new_password: str) -> tuple[bool, str]:
+    async def update_password(self, user_id: str, old_password: str, new_password: str) -> tuple[bool, str]:
         if len(new_password or "") < 8:
             return False, "新密码至少 8 位"
-        user = self._users.get_by_id(user_id)
+        user = await asyncio.to_thread(self._users.get_by_id, user_id)
         if not user:
             return False, "用户不存在"
-        if not bcrypt.checkpw(old_password.encode("utf-8"), user.password_hash.encode("utf-8")):
+        if not await self.hasher.check(old_password, user.password_hash):
             return False, "原密码错误"
-        hashed = bcrypt.hashpw(new_password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
-        self._users.update_fields(user_id, password_hash=hashed)
+        hashed = await self.hasher.hash(new_password)
+        await asyncio.to_thread(self._users.update_fields, user_id, password_hash=hashed)
         return True, "OK"
 
+    def metrics_snapshot(self) -> dict[str, Any]:
+        return {
+            "login_latency": self.login_latency.snapshot(),
+            "password_hasher": self.hasher.snapshot(),
+            "token_cache": {
+                "size": len(self.token_cache),
+                "hits": self.token_cache.hits,
+                "misses": self.token_cache.misses,
+            },
+        }
+
     def verify_access_token(self, token: str) -> Optional[str]:
+        """命中缓存时跳过 jwt.decode（HMAC + JSON + claims 校验）；仅缓存验签通过且带 exp 的 token。"""
+        uid = self.token_cache.get(token)
+        if uid is not None:
+            return uid
         try:
             payload = self._jwt.decode_access(token)
             uid = payload.get("sub")
-            return uid if isinstance(uid, str) else None
+            if not isinstance(uid, str):
+                return None
+            exp = payload.get("exp")
+            if isinstance(exp, (int, float)):
+                self.token_cache.put(token, uid, float(exp))
+            return uid
         except Exception:  # noqa: BLE001
             return None
 
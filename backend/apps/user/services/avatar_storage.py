@@ -6,24 +6,127 @@ import os
 import re
 import uuid
 from pathlib import Path
+from typing import Optional
 
 import logging
 
+from apps.user.services.avatar_thumbnails import AvatarThumbnailer
+
 logger = logging.getLogger(__name__)
 
 _ALLOWED_EXT = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
 _MAX_BYTES = 5 * 1024 * 1024
 _TMP_PREFIX = "tmp"
 _AVATAR_PREFIX = "avatar"
+# 上传中的文件：`tmp/<user_id>/<hex>.upload`，写完嗅探类型后改名为 `<hex>.<ext>`
+_UPLOADING_SUFFIX = ".upload"
+_SNIFF_BYTES = 12
 _TMP_FILE_RE = re.compile(
     r"^tmp/([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})/([a-f0-9]{32}\.(?:jpg|jpeg|png|gif|webp))$",
     re.IGNORECASE,
 )
 
 
+class AvatarTooLarge(Exception):
+    """上传字节数超过上限（路由层返回 413）。"""
+
+
+def sniff_image_type(head: bytes) -> Optional[tuple[str, str]]:
+    """按文件头魔数识别 (扩展名, mime)；不是支持的图片返回 None。"""
+    if head.startswith(b"\xff\xd8\xff"):
+        return ".jpg", "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return ".png", "image/png"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return ".gif", "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ".webp", "image/webp"
+    return None
+
+
+class AvatarTmpUpload:
+    """流式写入 tmp 的单个上传：`write` 逐块追加并在超限 / 类型不符时立即失败，`finish` 改名定稿。
+
+    同步文件 IO，调用方在线程中执行。
+    """
+
+    def __init__(self, root: Path, user_id: str, max_bytes: int) -> None:
+        self._root = root
+        self._user_id = user_id
+        self._hex = uuid.uuid4().hex
+        self._path = root / _TMP_PREFIX / user_id / f"{self._hex}{_UPLOADING_SUFFIX}"
+        self._max_bytes = max_bytes
+        self._fh = None
+        self._head = b""
+        self.size = 0
+        self.kind: Optional[tuple[str, str]] = None
+
+    @property
+    def mime_type(self) -> Optional[str]:
+        return self.kind[1] if self.kind else None
+
+    def write(self, chunk: bytes) -> Optional[str]:
+        """返回错误信息表示应中止；超过字节上限抛 AvatarTooLarge。"""
+        self.size += len(chunk)
+        if self.size > self._max_bytes:
+            self.abort()
+            raise AvatarTooLarge(f"图片过大（最大 {self._max_bytes // (1024 * 1024)}MB）")
+        if self.kind is None:
+            self._head += chunk[: _SNIFF_BYTES - len(self._head)]
+            if len(self._head) >= _SNIFF_BYTES:
+                err = self._sniff()
+                if err:
+                    return err
+        if self._fh is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                self._fh = open(self._path, "wb")
+            except FileNotFoundError:
+                # 空用户目录恰好被 tmp 清理任务移除
+                self._path.parent.mkdir(parents=True, exist_ok=True)
+                self._fh = open(self._path, "wb")
+        self._fh.write(chunk)
+        return None
+
+    def finish(self) -> tuple[Optional[str], str]:
+        """返回相对路径 `tmp/<user_id>/<hex>.<ext>`。"""
+        if self.kind is None:
+            err = self._sniff()
+            if err:
+                return None, err
+        assert self.kind is not None and self._fh is not None
+        try:
+            self._fh.close()
+            self._fh = None
+            rel = f"{_TMP_PREFIX}/{self._user_id}/{self._hex}{self.kind[0]}"
+            os.replace(self._path, self._root / rel)
+        except OSError as e:
+            logger.exception("save_tmp_file")
+            self.abort()
+            return None, f"保存失败: {e!s}"
+        return rel, "OK"
+
+    def abort(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        try:
+            self._path.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+    def _sniff(self) -> Optional[str]:
+        self.kind = sniff_image_type(self._head)
+        if self.kind is None:
+            self.abort()
+            return f"文件内容不是支持的图片格式，允许：{', '.join(sorted(_ALLOWED_EXT))}"
+        return None
+
+
 class AvatarStorageService:
-    def __init__(self, data_dir: str) -> None:
+    def __init__(self, data_dir: str, thumbnailer: Optional[AvatarThumbnailer] = None) -> None:
         self._root = Path(data_dir).resolve()
+        self.thumbnailer = thumbnailer
         self._tmp_root = self._root / _TMP_PREFIX
         self._avatar_root = self._root / _AVATAR_PREFIX
 
@@ -35,22 +138,16 @@ class AvatarStorageService:
     def avatar_filesystem_dir(self) -> str:
         return str(self._avatar_root)
 
-    def save_tmp_file(self, user_id: str, original_filename: str, raw: bytes) -> tuple[str | None, str]:
-        if len(raw) > _MAX_BYTES:
-            return None, "图片过大（最大 5MB）"
+    @property
+    def max_bytes(self) -> int:
+        return _MAX_BYTES
+
+    def open_tmp_upload(self, user_id: str, original_filename: str) -> tuple[Optional[AvatarTmpUpload], str]:
+        """按文件名扩展名先行拒绝；实际类型以文件头魔数为准（落盘扩展名取嗅探结果）。"""
         ext = Path(original_filename or "").suffix.lower()
         if ext not in _ALLOWED_EXT:
             return None, f"不支持的格式，允许：{', '.join(sorted(_ALLOWED_EXT))}"
-        name = f"{uuid.uuid4().hex}{ext}"
-        rel = f"{_TMP_PREFIX}/{user_id}/{name}"
-        full = self._root / rel
-        try:
-            full.parent.mkdir(parents=True, exist_ok=True)
-            full.write_bytes(raw)
-        except OSError as e:
-            logger.exception("save_tmp_file")
-            return None, f"保存失败: {e!s}"
-        return rel.replace("\\", "/"), "OK"
+        return AvatarTmpUpload(self._root, user_id, _MAX_BYTES), "OK"
 
     def validate_tmp_rel_path(self, user_id: str, tmp_rel: str) -> Path | None:
         s = (tmp_rel or "").strip().replace("\\", "/")
@@ -80,6 +177,8 @@ class AvatarStorageService:
         except OSError as e:
             logger.exception("move_tmp_to_avatar")
             return None, f"移动头像失败: {e!s}"
+        if self.thumbnailer is not None:
+            self.thumbnailer.submit(dest_full)
         return dest_rel.replace("\\", "/"), "OK"
 
     def remove_file_if_under_data(self, rel: str) -> None:
@@ -99,3 +198,5 @@ class AvatarStorageService:
                 os.remove(full)
         except OSError:
             pass
+        if self.thumbnailer is not None and s.startswith(f"{_AVATAR_PREFIX}/"):
+            self.thumbnailer.remove_variants(full)
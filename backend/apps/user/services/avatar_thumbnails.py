@@ -0,0 +1,152 @@
+# coding=utf-8
+"""头像缩略图：原图移入 `avatar/` 后在线程池中生成等比缩放变体，与原图同目录落盘。
+
+`avatar/<user_id>/<hex>.png` → `avatar/<user_id>/<hex>.w64.webp`、`.w128.webp` …；
+Pillow 缺少 WebP 支持时改存 JPEG。Pillow 未安装时不生成变体，调用方退回原图。
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = (64, 128, 256)
+# 按需生成时等待线程池的上限，超时则本次返回原图
+_ENSURE_TIMEOUT_S = 10.0
+# 解码前按文件头中的尺寸拒绝：几 KB 的 PNG 也能声明数亿像素（解压炸弹），会长时间占住线程池
+_MAX_PIXELS = 40_000_000
+_MAX_SIDE = 12_000
+
+try:
+    from PIL import Image, ImageOps, features
+
+    _PIL_OK = True
+except ImportError:  # pragma: no cover - Pillow 为 requirements 依赖
+    _PIL_OK = False
+
+
+def _variant_format() -> tuple[str, str, str]:
+    """(Pillow 格式名, 扩展名, mime)。"""
+    if _PIL_OK and features.check("webp"):
+        return "WEBP", "webp", "image/webp"
+    return "JPEG", "jpg", "image/jpeg"
+
+
+class AvatarThumbnailer:
+    def __init__(self, sizes: tuple[int, ...] = DEFAULT_SIZES, workers: int = 2) -> None:
+        self.sizes = tuple(sorted({s for s in sizes if s > 0})) or DEFAULT_SIZES
+        self._format, self._ext, self.mime_type = _variant_format()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="avatar-thumb")
+        # 同一原图只生成一次：原图路径 → 进行中的 Future
+        self._inflight: dict[str, Future[bool]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return _PIL_OK
+
+    def variant_path(self, original: Path, size: int) -> Path:
+        return original.with_name(f"{original.stem}.w{size}.{self._ext}")
+
+    def variant_paths(self, original: Path) -> list[Path]:
+        return [self.variant_path(original, s) for s in self.sizes]
+
+    def pick_size(self, requested: int) -> Optional[int]:
+        """不小于请求尺寸的最小变体；比最大变体还大时返回 None（用原图）。"""
+        for s in self.sizes:
+            if s >= requested:
+                return s
+        return None
+
+    def submit(self, original: Path) -> Optional[Future[bool]]:
+        """异步生成全部变体（已在进行则复用同一任务）。"""
+        if not _PIL_OK:
+            return None
+        key = str(original)
+        with self._lock:
+            fut = self._inflight.get(key)
+            if fut is not None:
+                return fut
+            try:
+                fut = self._pool.submit(self._generate, original)
+            except RuntimeError:
+                # 线程池已关闭（进程退出中）
+                return None
+            self._inflight[key] = fut
+        fut.add_done_callback(lambda _f: self._forget(key))
+        return fut
+
+    def ensure(self, original: Path, size: int) -> Optional[Path]:
+        """返回已存在的变体；缺失时（历史头像 / 生成未完成）提交生成并有限等待。"""
+        path = self.variant_path(original, size)
+        if path.is_file():
+            return path
+        fut = self.submit(original)
+        if fut is None:
+            return None
+        try:
+            fut.result(timeout=_ENSURE_TIMEOUT_S)
+        except Exception as e:  # noqa: BLE001
+            logger.warning("等待头像缩略图生成失败 %s: %s", original, e)
+            return None
+        return path if path.is_file() else None
+
+    def remove_variants(self, original: Path) -> None:
+        for p in self.variant_paths(original):
+            try:
+                p.unlink(missing_ok=True)
+            except OSError:
+                pass
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _forget(self, key: str) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def _generate(self, original: Path) -> bool:
+        try:
+            with Image.open(original) as im:
+                width, height = im.size
+                if width > _MAX_SIDE or height > _MAX_SIDE or width * height > _MAX_PIXELS:
+                    logger.warning("头像尺寸过大，跳过缩略图 %s: %sx%s", original, width, height)
+                    return False
+                im.seek(0)
+                if im.format == "JPEG":
+                    # 让解码器直接按 1/2、1/4、1/8 缩小解码（不小于最大变体），不必先解出全尺寸
+                    longest_variant = self.sizes[-1]
+                    im.draft("RGB", (longest_variant, longest_variant))
+                base = ImageOps.exif_transpose(im)
+                has_alpha = base.mode in ("RGBA", "LA") or "transparency" in base.info
+                if self._format == "JPEG" or not has_alpha:
+                    base = base.convert("RGB")
+                else:
+                    base = base.convert("RGBA")
+                longest = max(base.size)
+                for size in self.sizes:
+                    frame = base.copy()
+                    if longest > size:
+                        frame.thumbnail((size, size), Image.Resampling.LANCZOS)
+                    self._write(frame, self.variant_path(original, size))
+        except Exception as e:  # noqa: BLE001
+            logger.warning("生成头像缩略图失败 %s: %s", original, e)
+            return False
+        return True
+
+    def _write(self, frame: "Image.Image", dest: Path) -> None:
+        # 先写临时文件再 rename，读者不会看到半个文件
+        tmp = dest.with_name(f".{dest.name}.{os.getpid()}.{threading.get_ident()}.part")
+        try:
+            opts: dict[str, int] = {"quality": 82}
+            if self._format == "WEBP":
+                opts["method"] = 4
+            frame.save(tmp, format=self._format, **opts)
+            os.replace(tmp, dest)
+        finally:
+            tmp.unlink(missing_ok=True)
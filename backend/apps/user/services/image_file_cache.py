@@ -0,0 +1,129 @@
+# coding=utf-8
+"""图片文件定位缓存：(image_id, 变体尺寸) → (路径, mime, mtime, size, ETag) 的有界 LRU。
+
+图片文件名为随机 UUID、落盘后内容不再变化，命中时只做一次 os.stat 校验（文件被删除或替换即失效），不查 MySQL。
+请求 `size` 时取不小于该尺寸的最小缩略图变体；变体不可用时退回原图且不缓存（`final=False`）。
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.utils import formatdate
+from pathlib import Path
+from typing import Optional
+
+from apps.user.repos.image_repository import ImageRepository
+from apps.user.services.avatar_thumbnails import AvatarThumbnailer
+
+
+@dataclass(frozen=True)
+class ImageFileEntry:
+    path: str
+    mime_type: str
+    stat_result: os.stat_result
+    etag: str
+    last_modified: str
+    # False：请求了缩略图但暂时只能给原图，调用方不应让客户端长缓存
+    final: bool = True
+
+    def matches(self, st: os.stat_result) -> bool:
+        return st.st_mtime_ns == self.stat_result.st_mtime_ns and st.st_size == self.stat_result.st_size
+
+
+class ImageFileCache:
+    def __init__(
+        self,
+        images: ImageRepository,
+        data_dir: str,
+        max_entries: int = 1024,
+        thumbnailer: Optional[AvatarThumbnailer] = None,
+    ) -> None:
+        self._images = images
+        self._thumbs = thumbnailer
+        self._root = Path(data_dir).resolve()
+        self.max_entries = max(1, max_entries)
+        self._entries: OrderedDict[tuple[str, int], ImageFileEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def variant_size(self, size: Optional[int]) -> int:
+        """请求尺寸 → 实际变体尺寸；0 表示原图。"""
+        if not size or self._thumbs is None:
+            return 0
+        return self._thumbs.pick_size(size) or 0
+
+    def get(self, image_id: str, size: Optional[int] = None) -> Optional[ImageFileEntry]:
+        """仅查缓存（一次 stat）；未命中返回 None，由调用方在线程中调用 `resolve`。"""
+        key = (image_id, self.variant_size(size))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            return None
+        try:
+            st = os.stat(entry.path)
+        except OSError:
+            st = None
+        if st is None or not entry.matches(st):
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+        return entry
+
+    def resolve(self, image_id: str, size: Optional[int] = None) -> Optional[ImageFileEntry]:
+        """查库 + 路径校验（仅允许 `avatar/` 下、不越出数据目录的普通文件），结果写入缓存。
+
+        缺失的缩略图在此按需生成（有限等待），因此应在线程中调用。
+        """
+        img = self._images.get_by_id(image_id)
+        if img is None:
+            return None
+        rel = (img.file_path or "").strip().replace("\\", "/")
+        if not rel.startswith("avatar/"):
+            return None
+        full = (self._root / rel).resolve()
+        try:
+            full.relative_to(self._root)
+            st = os.stat(full)
+        except (ValueError, OSError):
+            return None
+        if not os.path.isfile(full):
+            return None
+        mime = img.mime_type or "application/octet-stream"
+        variant = self.variant_size(size)
+        if variant:
+            assert self._thumbs is not None
+            thumb = self._thumbs.ensure(full, variant)
+            try:
+                st_thumb = os.stat(thumb) if thumb is not None else None
+            except OSError:
+                st_thumb = None
+            if thumb is None or st_thumb is None:
+                return self._entry(image_id, 0, full, mime, st, final=False)
+            return self._store((image_id, variant), self._entry(image_id, variant, thumb, self._thumbs.mime_type, st_thumb))
+        return self._store((image_id, 0), self._entry(image_id, 0, full, mime, st))
+
+    @staticmethod
+    def _entry(
+        image_id: str, variant: int, path: Path, mime: str, st: os.stat_result, final: bool = True
+    ) -> ImageFileEntry:
+        digest = hashlib.sha1(f"{image_id}:{variant}:{st.st_mtime_ns}:{st.st_size}".encode()).hexdigest()
+        return ImageFileEntry(
+            path=str(path),
+            mime_type=mime,
+            stat_result=st,
+            etag=f'"{digest}"',
+            last_modified=formatdate(st.st_mtime, usegmt=True),
+            final=final,
+        )
+
+    def _store(self, key: tuple[str, int], entry: ImageFileEntry) -> ImageFileEntry:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
@@ -0,0 +1,150 @@
+# coding=utf-8
+"""后台邮件队列：请求线程只入队即返回；单个发送线程经持久 SMTP 连接批量发送，失败按指数退避重试。"""
+from __future__ import annotations
+
+import json
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from apps.user.services.mail_sender import SmtpMailSender
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+# 空闲多久后主动 QUIT 持久连接
+_IDLE_CLOSE_S = 120.0
+
+
+@dataclass
+class OutgoingMail:
+    to_email: str
+    subject: str
+    html_body: str
+    attempts: int = 0
+    not_before: float = 0.0
+
+
+class MailQueue:
+    def __init__(
+        self,
+        sender: SmtpMailSender,
+        max_queue_size: int = 1000,
+        batch_size: int = 20,
+        max_attempts: int = 3,
+    ) -> None:
+        self.sender = sender
+        self.batch_size = max(1, batch_size)
+        self.max_attempts = max(1, max_attempts)
+        self._q: queue.Queue[object] = queue.Queue(maxsize=max(1, max_queue_size))
+        self._delayed: list[OutgoingMail] = []
+        self._thread: Optional[threading.Thread] = None
+        self.sent_total = 0
+        self.failed_total = 0
+
+    def start(self) -> bool:
+        if self._thread is not None:
+            return True
+        self._thread = threading.Thread(target=self._run, daemon=True, name="MailQueue")
+        self._thread.start()
+        return True
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def enqueue(self, to_email: str, subject: str, html_body: str) -> bool:
+        """线程安全；队列满或未启动返回 False。"""
+        if self._thread is None:
+            return False
+        try:
+            self._q.put_nowait(OutgoingMail(to_email, subject, html_body))
+            return True
+        except queue.Full:
+            logger.warning("邮件队列已满，拒绝 to=%s", to_email)
+            return False
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            try:
+                first = self._q.get(timeout=self._wait_timeout())
+            except queue.Empty:
+                first = None
+            batch: list[OutgoingMail] = []
+            if first is _STOP:
+                stopping = True
+            elif first is not None:
+                batch.append(first)  # type: ignore[arg-type]
+            while not stopping and len(batch) < self.batch_size:
+                try:
+                    nxt = self._q.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    stopping = True
+                else:
+                    batch.append(nxt)  # type: ignore[arg-type]
+            now = time.monotonic()
+            due = [m for m in self._delayed if m.not_before <= now]
+            if due:
+                self._delayed = [m for m in self._delayed if m.not_before > now]
+                batch.extend(due)
+            if batch:
+                self._send(batch)
+            else:
+                self.sender.close_if_idle(_IDLE_CLOSE_S)
+        if self._delayed:
+            logger.warning("邮件队列停止，放弃 %s 封待重试邮件", len(self._delayed))
+        self.sender.close()
+
+    def _wait_timeout(self) -> float:
+        if not self._delayed:
+            return 5.0
+        return max(0.05, min(m.not_before for m in self._delayed) - time.monotonic())
+
+    def _send(self, batch: list[OutgoingMail]) -> None:
+        sent = failed = 0
+        for mail in batch:
+            try:
+                self.sender.send_html_pooled(mail.to_email, mail.subject, mail.html_body)
+                sent += 1
+            except Exception as e:  # noqa: BLE001
+                mail.attempts += 1
+                if mail.attempts >= self.max_attempts:
+                    failed += 1
+                    logger.error("邮件发送失败，已放弃 to=%s attempts=%s: %s", mail.to_email, mail.attempts, e)
+                else:
+                    mail.not_before = time.monotonic() + 2**mail.attempts
+                    self._delayed.append(mail)
+                    logger.warning("邮件发送失败，稍后重试 to=%s attempts=%s: %s", mail.to_email, mail.attempts, e)
+        self.sent_total += sent
+        self.failed_total += failed
+        if len(batch) > 1 or failed:
+            logger.info(
+                json.dumps(
+                    {
+                        "task": "mail_queue",
+                        "event": "batch_sent",
+                        "batch": len(batch),
+                        "sent": sent,
+                        "failed": failed,
+                        "retrying": len(self._delayed),
+                    },
+                    ensure_ascii=False,
+                )
+            )
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """发送完已入队的邮件后退出（最多等待 `timeout` 秒）。"""
+        if self._thread is None:
+            return
+        try:
+            self._q.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning("邮件队列停止超时，仍有 %s 封未发送", self._q.qsize())
+        self._thread.join(timeout=timeout)
+        self._thread = None
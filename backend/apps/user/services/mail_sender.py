@@ -4,11 +4,17 @@ from __future__ import annotations
 
 import logging
 import smtplib
+import threading
+import time
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# 复用前空闲超过该秒数的连接先 NOOP 探活（服务端常在数分钟后断开空闲连接）
+_NOOP_AFTER_IDLE_S = 30.0
+
 
 def build_verification_email_html(code: str) -> str:
     return f"""<!DOCTYPE html>
@@ -32,16 +38,86 @@ class SmtpMailSender:
         self._port = port
         self._user = user
         self._password = password
+        # 持久连接（仅 `send_html_pooled` / `close` 使用），断开后下次发送自动重连
+        self._conn: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
 
-    def send_html(self, to_email: str, subject: str, html_body: str) -> None:
+    def _build(self, to_email: str, subject: str, html_body: str) -> str:
         msg = MIMEMultipart("alternative")
         msg["Subject"] = subject
         msg["From"] = self._user
         msg["To"] = to_email
         msg.attach(MIMEText(html_body, "html", "utf-8"))
+        return msg.as_string()
 
-        with smtplib.SMTP(self._host, self._port, timeout=30) as server:
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self._host, self._port, timeout=30)
+        try:
             server.starttls()
             server.login(self._user, self._password)
-            server.sendmail(self._user, [to_email], msg.as_string())
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    def send_html(self, to_email: str, subject: str, html_body: str) -> None:
+        """一次性连接发送（握手 + STARTTLS + 登录 + 发送 + 断开）。"""
+        with self._connect() as server:
+            server.sendmail(self._user, [to_email], self._build(to_email, subject, html_body))
+        logger.info("验证码邮件已发送至 %s", to_email)
+
+    def send_html_pooled(self, to_email: str, subject: str, html_body: str) -> None:
+        """经持久连接发送；连接已被服务端关闭时重连后重试一次。"""
+        payload = self._build(to_email, subject, html_body)
+        with self._lock:
+            for attempt in (1, 2):
+                server = self._ensure_conn()
+                try:
+                    server.sendmail(self._user, [to_email], payload)
+                    self._last_used = time.monotonic()
+                    break
+                except (smtplib.SMTPServerDisconnected, OSError):
+                    self._drop_conn()
+                    if attempt == 2:
+                        raise
         logger.info("验证码邮件已发送至 %s", to_email)
+
+    def _ensure_conn(self) -> smtplib.SMTP:
+        if self._conn is not None and time.monotonic() - self._last_used > _NOOP_AFTER_IDLE_S:
+            try:
+                if self._conn.noop()[0] != 250:
+                    self._drop_conn()
+            except (smtplib.SMTPException, OSError):
+                self._drop_conn()
+        if self._conn is None:
+            self._conn = self._connect()
+            self._last_used = time.monotonic()
+        return self._conn
+
+    def _drop_conn(self) -> None:
+        if self._conn is None:
+            return
+        try:
+            self._conn.close()
+        except Exception:  # noqa: BLE001
+            pass
+        self._conn = None
+
+    def close_if_idle(self, idle_s: float) -> None:
+        with self._lock:
+            if self._conn is not None and time.monotonic() - self._last_used > idle_s:
+                self._quit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._quit()
+
+    def _quit(self) -> None:
+        if self._conn is None:
+            return
+        try:
+            self._conn.quit()
+        except Exception:  # noqa: BLE001
+            pass
+        self._drop_conn()
@@ -0,0 +1,99 @@
+# coding=utf-8
+"""bcrypt 专用线程池：哈希 / 校验不占事件环；排队超过上限直接拒绝（路由返回 429）。
+
+bcrypt 计算期间释放 GIL，线程池即可并行；`workers` 决定同时占用的 CPU 核数。
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+import bcrypt
+
+from utils import LatencyWindow
+
+T = TypeVar("T")
+
+
+class PasswordHasherBusy(Exception):
+    """排队中的 bcrypt 任务已达上限。"""
+
+
+class PasswordHasher:
+    def __init__(self, rounds: int = 12, workers: int = 2, max_pending: int = 32) -> None:
+        # bcrypt 允许 4..31
+        self.rounds = min(31, max(4, rounds))
+        self.workers = max(1, workers)
+        self.max_pending = max(self.workers, max_pending)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.rejected_total = 0
+        self.wait = LatencyWindow()
+        self.compute = LatencyWindow()
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(
+            lambda: bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(self.rounds)).decode("utf-8")
+        )
+
+    async def check(self, password: str, hashed: str) -> bool:
+        """格式错误的哈希视为不匹配。"""
+
+        def run() -> bool:
+            try:
+                return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+            except ValueError:
+                return False
+
+        return await self._submit(run)
+
+    async def _submit(self, fn: Callable[[], T]) -> T:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected_total += 1
+                raise PasswordHasherBusy()
+            self._pending += 1
+        queued = time.perf_counter()
+
+        def timed() -> T:
+            started = time.perf_counter()
+            self.wait.observe(started - queued)
+            try:
+                return fn()
+            finally:
+                self.compute.observe(time.perf_counter() - started)
+
+        try:
+            fut = self._pool.submit(timed)
+        except RuntimeError:
+            self._release()
+            raise
+        # 以线程任务结束为准释放名额：调用方被取消时 bcrypt 仍在占用 worker
+        fut.add_done_callback(lambda _f: self._release())
+        return await asyncio.wrap_future(fut)
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "rounds": self.rounds,
+            "workers": self.workers,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "rejected_total": self.rejected_total,
+            "queue_wait": self.wait.snapshot(),
+            "compute": self.compute.snapshot(),
+        }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
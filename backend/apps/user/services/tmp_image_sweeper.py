@@ -0,0 +1,130 @@
+# coding=utf-8
+"""清理未确认的上传：`tmp/<user_id>/` 下超过 TTL 的文件及其 vault_images 行。
+
+两轮，每批一个短事务：
+1. 库内：仍指向 `tmp/` 且 created_at 早于截止时间的行，按主键删行后删文件；
+2. 磁盘：os.scandir 扫 tmp/，mtime 早于截止时间的孤儿文件（含中断上传留下的 `.upload`），
+   按 (uploader_id, file_path) 删残留行后删文件，空的用户目录一并移除。
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from apps.user.repos.image_repository import ImageRepository
+
+logger = logging.getLogger(__name__)
+
+_TMP_PREFIX = "tmp"
+
+
+@dataclass
+class SweepStats:
+    rows_deleted: int = 0
+    files_deleted: int = 0
+    bytes_reclaimed: int = 0
+    dirs_removed: int = 0
+    batches: int = 0
+
+
+class TmpImageSweeper:
+    def __init__(
+        self,
+        images: ImageRepository,
+        data_dir: str,
+        ttl_hours: int = 24,
+        batch_size: int = 200,
+    ) -> None:
+        self._images = images
+        self._root = Path(data_dir).resolve()
+        self._tmp_root = self._root / _TMP_PREFIX
+        self.ttl_s = max(1, ttl_hours) * 3600
+        self.batch_size = max(1, batch_size)
+
+    def sweep(self) -> dict:
+        started = time.monotonic()
+        stats = SweepStats()
+        self._sweep_rows(datetime.now() - timedelta(seconds=self.ttl_s), stats)
+        self._sweep_files(time.time() - self.ttl_s, stats)
+        summary = {
+            "success": True,
+            "message": f"Reclaimed {stats.bytes_reclaimed} bytes",
+            **asdict(stats),
+            "ttl_hours": self.ttl_s / 3600,
+            "duration_s": round(time.monotonic() - started, 2),
+        }
+        logger.info(json.dumps({"task": "tmp_image_sweep", "event": "finished", **summary}, ensure_ascii=False))
+        return summary
+
+    def _sweep_rows(self, cutoff: datetime, stats: SweepStats) -> None:
+        while True:
+            batch = self._images.list_stale_tmp(cutoff, self.batch_size)
+            if not batch:
+                return
+            deleted = self._images.delete_tmp_by_ids([image_id for image_id, _ in batch])
+            stats.rows_deleted += deleted
+            stats.batches += 1
+            for _image_id, rel in batch:
+                self._unlink(rel, stats)
+            # 整批都没删掉（并发确认 / 库不可写）时不再重试同一批
+            if deleted == 0 or len(batch) < self.batch_size:
+                return
+
+    def _sweep_files(self, cutoff_ts: float, stats: SweepStats) -> None:
+        try:
+            user_dirs = [e for e in os.scandir(self._tmp_root) if e.is_dir(follow_symlinks=False)]
+        except FileNotFoundError:
+            return
+        for d in user_dirs:
+            try:
+                uuid.UUID(d.name)
+            except ValueError:
+                continue
+            pending: list[tuple[str, int]] = []
+            with os.scandir(d.path) as it:
+                for entry in it:
+                    try:
+                        if not entry.is_file(follow_symlinks=False):
+                            continue
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if st.st_mtime >= cutoff_ts:
+                        continue
+                    pending.append((f"{_TMP_PREFIX}/{d.name}/{entry.name}", st.st_size))
+                    if len(pending) >= self.batch_size:
+                        self._flush(d.name, pending, stats)
+                        pending = []
+            if pending:
+                self._flush(d.name, pending, stats)
+            try:
+                # 只移除空目录；并发上传会在写入前重新 mkdir
+                os.rmdir(d.path)
+                stats.dirs_removed += 1
+            except OSError:
+                pass
+
+    def _flush(self, uploader_id: str, pending: list[tuple[str, int]], stats: SweepStats) -> None:
+        stats.rows_deleted += self._images.delete_by_uploader_paths(uploader_id, [rel for rel, _ in pending])
+        stats.batches += 1
+        for rel, _size in pending:
+            self._unlink(rel, stats)
+
+    def _unlink(self, rel: str, stats: SweepStats) -> None:
+        s = (rel or "").replace("\\", "/")
+        if not s.startswith(f"{_TMP_PREFIX}/") or ".." in s:
+            return
+        full = self._root / s
+        try:
+            size = full.stat().st_size
+            full.unlink()
+        except OSError:
+            return
+        stats.files_deleted += 1
+        stats.bytes_reclaimed += size
@@ -1,25 +1,40 @@
 # coding=utf-8
 """
-依赖组装：MySQL / Redis / Kafka(Producer+Consumer) / Repos / Services / Kafka 路由。
+依赖组装：MySQL / Redis / Kafka(Producer+Consumer) 或本地事件总线 / Repos / Services / 事件路由。
 """
 from __future__ import annotations
 
 import logging
+import os
 from dataclasses import dataclass
 from typing import Optional
 
 from config.types import AuthConfig, CertConfig, DatabaseConfig, VaultDataConfig
 from apps.certificate.models.base import Base
 from apps.certificate.kafka.certificate_pipeline import CertificatePipeline
-from utils import ACMEChallengeStorage, KafkaClient, KafkaEventConsumer, MySQLSession, RedisClient
+from utils import (
+    ACMEChallengeStorage,
+    KafkaClient,
+    KafkaEventConsumer,
+    LocalEventBus,
+    MySQLSession,
+    RedisClient,
+    StartupReadiness,
+    default_process_runner,
+)
 
 from apps.analysis.services.analysis_service import AnalysisService
 from apps.certificate.kafka.certificate_kafka_handler import CertificateKafkaHandler
 from apps.certificate.kafka.event_router import KafkaEventRouter, setup_kafka_routes
+from apps.certificate.kafka.outbox_relay import OutboxRelay
 from apps.certificate.repos.certificate_cache_repo import CertificateCacheRepo
 from apps.certificate.repos.certificate_repository import CertificateRepository
+from apps.certificate.repos.event_outbox_repository import EventOutboxRepository
 from apps.certificate.repos.tls_issue_repository import TlsIssueRepository
 from apps.certificate.services.certificate_service import CertificateService
+from apps.certificate.services.issuance_queue import IssuanceQueue
+from apps.certificate.services.renewal_planner import RenewalPlanner
+from apps.certificate.services.san_consolidation import SanConsolidationPlanner
 from apps.file.services.file_service import FileService
 from apps.user.models.vault_image import VaultImage  # noqa: F401 — 注册 metadata
 from apps.user.models.vault_user import VaultUser  # noqa: F401 — 注册 metadata
@@ -28,11 +43,17 @@ from apps.user.repos.user_repository import UserRepository
 from apps.user.services.avatar_storage import AvatarStorageService
 from apps.user.services.auth_service import AuthService
 from apps.user.services.jwt_tokens import JwtTokenService
+from apps.user.services.avatar_thumbnails import AvatarThumbnailer
+from apps.user.services.image_file_cache import ImageFileCache
+from apps.user.services.mail_queue import MailQueue
+from apps.user.services.tmp_image_sweeper import TmpImageSweeper
 from apps.user.services.mail_sender import SmtpMailSender
 from apps.user.services.verification_code import VerificationCodeService
 
 logger = logging.getLogger(__name__)
 
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sql", "migrations")
+
 
 @dataclass
 class ApplicationStack:
@@ -40,13 +61,23 @@ class ApplicationStack:
     redis: RedisClient
     kafka: KafkaClient
     kafka_consumer: Optional[KafkaEventConsumer]
+    local_bus: Optional[LocalEventBus]
+    outbox_relay: Optional[OutboxRelay]
+    issuance_queue: IssuanceQueue
+    renewal_planner: Optional[RenewalPlanner]
+    san_consolidator: SanConsolidationPlanner
     certificate_service: CertificateService
     file_service: FileService
     analysis_service: AnalysisService
     acme_storage: ACMEChallengeStorage
     event_router: Optional[KafkaEventRouter]
     image_repository: ImageRepository
+    image_file_cache: ImageFileCache
+    avatar_thumbnailer: AvatarThumbnailer
+    tmp_image_sweeper: TmpImageSweeper
     auth_service: AuthService
+    mail_queue: MailQueue
+    readiness: StartupReadiness
 
 
 def build_application_stack(
@@ -55,39 +86,71 @@ def build_application_stack(
     auth_config: AuthConfig,
     vault_data_config: VaultDataConfig,
 ) -> ApplicationStack:
-    mysql = MySQLSession(
-        host=db_config.MYSQL_HOST,
-        port=db_config.MYSQL_PORT,
-        database=db_config.MYSQL_DATABASE,
-        user=db_config.MYSQL_USER,
-        password=db_config.MYSQL_PASSWORD,
-        enable_mysql=True,
-    )
-    try:
-        mysql.create_database()
-        mysql.create_tables(Base)
-    except Exception:  # noqa: BLE001
-        logger.exception("create_tables")
-
+    # Redis / Kafka 在后台线程并发连接，与 schema 校验重叠；FAST_BOOT 时不等待连接结果即继续装配
+    readiness = StartupReadiness()
     redis_client = RedisClient(
         host=db_config.REDIS_HOST,
         port=db_config.REDIS_PORT,
         db=db_config.REDIS_DB,
         password=db_config.REDIS_PASSWORD or None,
         enable_redis=True,
+        connect=False,
     )
-
     kafka_client = KafkaClient(
         bootstrap_servers=db_config.KAFKA_BOOTSTRAP_SERVERS,
         enable_kafka=True,
+        codec=db_config.KAFKA_EVENT_CODEC,
+        connect=False,
     )
-    if kafka_client.enable_kafka:
+
+    def _connect_kafka() -> bool:
+        if not kafka_client.connect():
+            return False
         kafka_client.ensure_topic_exists(db_config.KAFKA_EVENT_TOPIC)
+        return True
+
+    readiness.submit("redis", redis_client.connect)
+    readiness.submit("kafka", _connect_kafka)
+
+    mysql = MySQLSession(
+        host=db_config.MYSQL_HOST,
+        port=db_config.MYSQL_PORT,
+        database=db_config.MYSQL_DATABASE,
+        user=db_config.MYSQL_USER,
+        password=db_config.MYSQL_PASSWORD,
+        enable_mysql=True,
+    )
+    readiness.record("mysql", lambda: mysql.migrate(Base, MIGRATIONS_DIR).get("success", False))
+    if not db_config.FAST_BOOT:
+        readiness.wait()
+    # FAST_BOOT 下 Kafka 尚在连接时按「将会可用」装配消费者；连上之前事件先走本地总线
+    kafka_expected = kafka_client.enable_kafka or not readiness.is_done("kafka")
 
     db_repo = CertificateRepository(mysql)
     cache_repo = CertificateCacheRepo(redis_client)
-    pipeline = CertificatePipeline(db_config=db_config, kafka_client=kafka_client)
+    local_bus: Optional[LocalEventBus] = None
+    if db_config.LOCAL_EVENT_BUS_ENABLED and not kafka_client.enable_kafka:
+        local_bus = LocalEventBus(
+            max_queue_size=db_config.LOCAL_EVENT_BUS_QUEUE_SIZE,
+            workers=db_config.LOCAL_EVENT_BUS_WORKERS,
+            journal_path=db_config.LOCAL_EVENT_BUS_JOURNAL or None,
+            coalesce_window_ms=db_config.KAFKA_COALESCE_WINDOW_MS,
+        )
+    pipeline = CertificatePipeline(db_config=db_config, kafka_client=kafka_client, local_bus=local_bus)
+    default_process_runner().set_max_concurrency(cert_config.PROCESS_MAX_CONCURRENCY)
     tls_repo = TlsIssueRepository(cert_config)
+    issuance_queue = IssuanceQueue(
+        workers=cert_config.ISSUANCE_WORKERS,
+        rate_limit_per_week=cert_config.ISSUANCE_RATE_LIMIT_PER_WEEK,
+    )
+    outbox_relay: Optional[OutboxRelay] = None
+    if mysql.enable_mysql and (pipeline.has_destination or kafka_expected):
+        outbox_relay = OutboxRelay(
+            EventOutboxRepository(mysql),
+            pipeline,
+            batch_size=db_config.OUTBOX_RELAY_BATCH_SIZE,
+            interval_ms=db_config.OUTBOX_RELAY_INTERVAL_MS,
+        )
 
     certificate_service = CertificateService(
         database_repo=db_repo,
@@ -96,7 +159,24 @@ def build_application_stack(
         tls_repo=tls_repo,
         db_config=db_config,
         cert_config=cert_config,
+        outbox_relay=outbox_relay,
+        issuance_queue=issuance_queue,
+    )
+
+    san_consolidator = SanConsolidationPlanner(
+        certificate_service,
+        issuance_queue,
+        max_names=cert_config.SAN_CONSOLIDATION_MAX_NAMES,
     )
+    renewal_planner: Optional[RenewalPlanner] = None
+    if cert_config.RENEW_ENABLED:
+        renewal_planner = RenewalPlanner(
+            certificate_service,
+            issuance_queue,
+            renew_before_days=cert_config.RENEW_BEFORE_DAYS,
+            spread_hours=cert_config.RENEW_SPREAD_HOURS,
+            consolidator=san_consolidator if cert_config.SAN_CONSOLIDATION_ENABLED else None,
+        )
 
     file_service = FileService(
         base_dir=cert_config.BASE_DIR,
@@ -106,10 +186,24 @@ def build_application_stack(
     )
 
     analysis_service = AnalysisService()
-    acme_storage = ACMEChallengeStorage(challenge_dir=cert_config.ACME_CHALLENGE_DIR)
+    acme_storage = ACMEChallengeStorage(
+        challenge_dir=cert_config.ACME_CHALLENGE_DIR,
+        redis_client=redis_client,
+        ttl_seconds=cert_config.ACME_CHALLENGE_TTL_SECONDS,
+    )
 
     user_repo = UserRepository(mysql)
     image_repo = ImageRepository(mysql)
+    avatar_thumbnailer = AvatarThumbnailer(
+        vault_data_config.AVATAR_THUMB_SIZES,
+        workers=vault_data_config.AVATAR_THUMB_WORKERS,
+    )
+    image_file_cache = ImageFileCache(
+        image_repo,
+        vault_data_config.DATA_DIR,
+        vault_data_config.IMAGE_CACHE_SIZE,
+        thumbnailer=avatar_thumbnailer,
+    )
     verification = VerificationCodeService(redis_client, auth_config.EMAIL_VERIFICATION_CODE_TTL_SECONDS)
     mailer = SmtpMailSender(
         auth_config.EMAIL_SMTP_HOST,
@@ -122,8 +216,20 @@ def build_application_stack(
         auth_config.JWT_ACCESS_EXPIRE_MINUTES,
         auth_config.JWT_REFRESH_EXPIRE_DAYS,
     )
-    avatar_storage = AvatarStorageService(vault_data_config.DATA_DIR)
+    avatar_storage = AvatarStorageService(vault_data_config.DATA_DIR, thumbnailer=avatar_thumbnailer)
+    tmp_image_sweeper = TmpImageSweeper(
+        image_repo,
+        vault_data_config.DATA_DIR,
+        ttl_hours=vault_data_config.TMP_SWEEP_TTL_HOURS,
+        batch_size=vault_data_config.TMP_SWEEP_BATCH_SIZE,
+    )
     avatar_storage.ensure_dirs()
+    mail_queue = MailQueue(
+        mailer,
+        max_queue_size=auth_config.MAIL_QUEUE_SIZE,
+        batch_size=auth_config.MAIL_BATCH_SIZE,
+        max_attempts=auth_config.MAIL_MAX_ATTEMPTS,
+    )
     auth_service = AuthService(
         auth_config,
         user_repo,
@@ -132,33 +238,50 @@ def build_application_stack(
         jwt_tokens,
         avatar_storage,
         image_repo,
+        mail_queue=mail_queue,
     )
 
     kafka_consumer: Optional[KafkaEventConsumer] = None
     event_router = None
-    if kafka_client.enable_kafka:
+    if kafka_expected:
         kafka_consumer = KafkaEventConsumer(
             bootstrap_servers=db_config.KAFKA_BOOTSTRAP_SERVERS,
             topic=db_config.KAFKA_EVENT_TOPIC,
             group_id=db_config.KAFKA_CONSUMER_GROUP_ID,
+            coalesce_window_ms=db_config.KAFKA_COALESCE_WINDOW_MS,
         )
+    event_sinks = [s for s in (kafka_consumer, local_bus) if s is not None]
+    if event_sinks:
         kafka_handler = CertificateKafkaHandler(certificate_service, file_service)
         event_router = setup_kafka_routes(kafka_handler)
-        for et, fn in event_router.routes.items():
-            kafka_consumer.register_handler(et, fn)
+        for event_sink in event_sinks:
+            for et, fn in event_router.routes.items():
+                event_sink.register_handler(et, fn)
+            for et, key_fn in event_router.coalesce_keys.items():
+                event_sink.register_coalescing(et, key_fn)
 
     return ApplicationStack(
         mysql=mysql,
         redis=redis_client,
         kafka=kafka_client,
         kafka_consumer=kafka_consumer,
+        local_bus=local_bus,
+        outbox_relay=outbox_relay,
+        issuance_queue=issuance_queue,
+        renewal_planner=renewal_planner,
+        san_consolidator=san_consolidator,
         certificate_service=certificate_service,
         file_service=file_service,
         analysis_service=analysis_service,
         acme_storage=acme_storage,
         event_router=event_router,
         image_repository=image_repo,
+        image_file_cache=image_file_cache,
+        avatar_thumbnailer=avatar_thumbnailer,
+        tmp_image_sweeper=tmp_image_sweeper,
         auth_service=auth_service,
+        mail_queue=mail_queue,
+        readiness=readiness,
     )
 
 
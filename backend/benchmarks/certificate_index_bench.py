@@ -0,0 +1,146 @@
+# coding=utf-8
+"""tls_certificates 热点查询：对比只有主键 / 唯一约束与加上迁移 20261020 二级索引后的 EXPLAIN 与延迟。
+
+在 backend/ 下运行（读取 .env 中的 MySQL 配置）：
+`python -m benchmarks.certificate_index_bench [--rows 100000] [--repeat 50]`
+数据写入独立的 `bench_tls_certificates` 表，结束后删除，不触碰业务表。
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import MetaData, create_engine, text
+
+from apps.certificate.models import TLSCertificate
+from config import load_repo_dotenv
+from config.database_config import load_database_config
+
+_TABLE = "bench_tls_certificates"
+
+_INDEXES = (
+    f"CREATE INDEX idx_bench_created_at_id ON {_TABLE} (created_at, id)",
+    f"CREATE INDEX idx_bench_not_after ON {_TABLE} (not_after)",
+    f"CREATE INDEX idx_bench_status_not_after ON {_TABLE} (status, not_after)",
+    f"CREATE INDEX idx_bench_is_valid_not_after ON {_TABLE} (is_valid, not_after)",
+    f"CREATE INDEX idx_bench_folder_name ON {_TABLE} (folder_name)",
+)
+
+_QUERIES = {
+    "list_page": f"SELECT id, domain, status, not_after FROM {_TABLE} ORDER BY created_at DESC, id DESC LIMIT 20",
+    "list_deep_page": f"SELECT id, domain, status, not_after FROM {_TABLE} ORDER BY created_at DESC, id DESC LIMIT 20 OFFSET 5000",
+    "renewal_due": f"SELECT id, domain, not_after FROM {_TABLE} "
+    "WHERE not_after IS NOT NULL AND not_after < :due ORDER BY not_after LIMIT 500",
+    "status_fail": f"SELECT id, domain, not_after FROM {_TABLE} WHERE status = 'FAIL' ORDER BY not_after LIMIT 50",
+    "expired": f"SELECT id, domain, not_after FROM {_TABLE} WHERE is_valid = 0 ORDER BY not_after LIMIT 50",
+    "by_folder": f"SELECT id, domain FROM {_TABLE} WHERE folder_name = :folder",
+}
+
+
+def _populate(conn, rows: int) -> str:
+    now = datetime.now()
+    rnd = random.Random(42)
+    statuses = ["SUCCESS"] * 8 + ["FAIL", "PROCESS"]
+    batch: list[dict] = []
+    probe_folder = ""
+    for i in range(rows):
+        not_after = now + timedelta(days=rnd.randint(-30, 90), seconds=rnd.randint(0, 86400))
+        folder = f"site-{i:07d}"
+        if i == rows // 2:
+            probe_folder = folder
+        batch.append(
+            {
+                "id": str(uuid.uuid4()),
+                "domain": f"{folder}.example.com",
+                "folder_name": folder,
+                "status": rnd.choice(statuses),
+                "not_after": not_after,
+                "is_valid": not_after > now,
+                "created_at": now - timedelta(seconds=rows - i),
+            }
+        )
+        if len(batch) >= 5000:
+            _insert(conn, batch)
+            batch = []
+    if batch:
+        _insert(conn, batch)
+    conn.commit()
+    return probe_folder
+
+
+def _insert(conn, batch: list[dict]) -> None:
+    conn.execute(
+        text(
+            f"INSERT INTO {_TABLE} (id, domain, folder_name, status, not_after, is_valid, sans_changed, created_at, updated_at) "
+            "VALUES (:id, :domain, :folder_name, :status, :not_after, :is_valid, 0, :created_at, :created_at)"
+        ),
+        batch,
+    )
+
+
+def _measure(conn, params: dict, repeat: int) -> dict[str, tuple[float, list]]:
+    out: dict[str, tuple[float, list]] = {}
+    for name, sql in _QUERIES.items():
+        plan = [dict(r._mapping) for r in conn.execute(text("EXPLAIN " + sql), params)]
+        conn.execute(text(sql), params).all()
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            conn.execute(text(sql), params).all()
+            samples.append((time.perf_counter() - start) * 1000)
+        out[name] = (statistics.median(samples), plan)
+    return out
+
+
+def _fmt_plan(plan: list) -> str:
+    return "; ".join(
+        f"type={p.get('type')} key={p.get('key')} rows={p.get('rows')} extra={p.get('Extra')}" for p in plan
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    load_repo_dotenv()
+    cfg = load_database_config()
+    engine = create_engine(
+        f"mysql+pymysql://{cfg.MYSQL_USER}:{cfg.MYSQL_PASSWORD}@{cfg.MYSQL_HOST}:{cfg.MYSQL_PORT}/{cfg.MYSQL_DATABASE}"
+    )
+    # 与 tls_certificates 同列，但只保留主键 + 唯一约束，二级索引由下面手工创建
+    md = MetaData()
+    table = TLSCertificate.__table__.to_metadata(md, name=_TABLE)
+    for idx in list(table.indexes):
+        table.indexes.discard(idx)
+    md.drop_all(engine)
+    md.create_all(engine)
+    try:
+        with engine.connect() as conn:
+            start = time.perf_counter()
+            folder = _populate(conn, args.rows)
+            print(f"rows={args.rows} populate={time.perf_counter() - start:.1f}s repeat={args.repeat}")
+            params = {"due": datetime.now() + timedelta(days=30), "folder": folder}
+            conn.execute(text(f"ANALYZE TABLE {_TABLE}")).all()
+            before = _measure(conn, params, args.repeat)
+            for ddl in _INDEXES:
+                conn.execute(text(ddl))
+            conn.execute(text(f"ANALYZE TABLE {_TABLE}")).all()
+            after = _measure(conn, params, args.repeat)
+        for name in _QUERIES:
+            b_ms, b_plan = before[name]
+            a_ms, a_plan = after[name]
+            print(f"\n[{name}] {b_ms:8.2f} ms -> {a_ms:8.2f} ms  ({b_ms / a_ms if a_ms else 0:.1f}x)")
+            print(f"  before: {_fmt_plan(b_plan)}")
+            print(f"  after:  {_fmt_plan(a_plan)}")
+    finally:
+        md.drop_all(engine)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
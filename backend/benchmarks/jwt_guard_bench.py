@@ -0,0 +1,82 @@
+# coding=utf-8
+"""vault_jwt_guard 单请求开销微基准：对比关闭 / 开启 access token 缓存。
+
+在 backend/ 下运行：`python -m benchmarks.jwt_guard_bench [--iterations N]`
+直接以 ASGI scope 调用中间件函数，`call_next` 立即返回，测得的即鉴权本身的开销。
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+import apps.wiring  # noqa: F401 — 先完成模块装配，避免证书域循环导入
+from apps.user.services.auth_service import AuthService
+from apps.user.services.jwt_tokens import JwtTokenService
+from config.types import AuthConfig
+from main import vault_jwt_guard
+
+
+def _auth_service(cache_size: int, jwt_svc: JwtTokenService) -> AuthService:
+    cfg = AuthConfig(
+        JWT_SECRET="bench-secret",
+        JWT_ACCESS_EXPIRE_MINUTES=30,
+        JWT_REFRESH_EXPIRE_DAYS=7,
+        EMAIL_SMTP_HOST="",
+        EMAIL_SMTP_PORT=0,
+        EMAIL_SMTP_USER="",
+        EMAIL_SMTP_PASSWORD="",
+        EMAIL_VERIFICATION_CODE_TTL_SECONDS=600,
+        JWT_VERIFY_CACHE_SIZE=cache_size,
+    )
+    return AuthService(cfg, None, None, None, jwt_svc, None, None)  # type: ignore[arg-type]
+
+
+def _request(app: SimpleNamespace, token: str) -> Request:
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/vault/tls/list/websites",
+        "raw_path": b"/vault/tls/list/websites",
+        "query_string": b"",
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+        "app": app,
+    }
+    return Request(scope)
+
+
+async def _run(auth_svc: AuthService, token: str, iterations: int) -> float:
+    app = SimpleNamespace(state=SimpleNamespace(auth_service=auth_svc))
+    ok = Response()
+
+    async def call_next(_request: Request) -> Response:
+        return ok
+
+    for _ in range(1000):
+        await vault_jwt_guard(_request(app, token), call_next)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        resp = await vault_jwt_guard(_request(app, token), call_next)
+        assert resp is ok
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=50000)
+    args = parser.parse_args()
+    jwt_svc = JwtTokenService("bench-secret", 30, 7)
+    token = jwt_svc.issue_pair("bench-user", "bench@example.com", "bench").access_token
+    before = asyncio.run(_run(_auth_service(0, jwt_svc), token, args.iterations))
+    after = asyncio.run(_run(_auth_service(1024, jwt_svc), token, args.iterations))
+    print(f"iterations={args.iterations}")
+    print(f"guard without cache: {before:8.2f} us/request")
+    print(f"guard with cache:    {after:8.2f} us/request  ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
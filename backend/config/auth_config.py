@@ -49,4 +49,11 @@ def load_auth_config() -> AuthConfig:
         EMAIL_SMTP_USER=require_env("EMAIL_SMTP_USER"),
         EMAIL_SMTP_PASSWORD=require_env("EMAIL_SMTP_PASSWORD"),
         EMAIL_VERIFICATION_CODE_TTL_SECONDS=get_int_env("EMAIL_VERIFICATION_CODE_TTL_SECONDS", 600),
+        JWT_VERIFY_CACHE_SIZE=get_int_env("JWT_VERIFY_CACHE_SIZE", 1024),
+        BCRYPT_ROUNDS=get_int_env("BCRYPT_ROUNDS", 12),
+        PASSWORD_HASH_WORKERS=get_int_env("PASSWORD_HASH_WORKERS", 2),
+        PASSWORD_HASH_MAX_PENDING=get_int_env("PASSWORD_HASH_MAX_PENDING", 32),
+        MAIL_QUEUE_SIZE=get_int_env("MAIL_QUEUE_SIZE", 1000),
+        MAIL_BATCH_SIZE=get_int_env("MAIL_BATCH_SIZE", 20),
+        MAIL_MAX_ATTEMPTS=get_int_env("MAIL_MAX_ATTEMPTS", 3),
     )
@@ -17,10 +17,14 @@ def load_cert_config() -> CertConfig:
             sys.exit(1)
         return value
 
-    def get_bool_env(key: str) -> bool:
+    def get_bool_env(key: str, default: bool | None = None) -> bool:
+        if default is not None and not get_env(key):
+            return default
         return require_env(key).lower() in ("true", "1")
 
-    def get_int_env(key: str) -> int:
+    def get_int_env(key: str, default: int | None = None) -> int:
+        if default is not None and not get_env(key):
+            return default
         value = require_env(key)
         try:
             return int(value)
@@ -36,4 +40,13 @@ def load_cert_config() -> CertConfig:
         CERT_MAX_WAIT_TIME=get_int_env("CERT_MAX_WAIT_TIME"),
         READ_ON_STARTUP=get_bool_env("READ_ON_STARTUP"),
         SCHEDULE_ENABLED=get_bool_env("SCHEDULE_ENABLED"),
+        ISSUANCE_WORKERS=get_int_env("ISSUANCE_WORKERS", 2),
+        ISSUANCE_RATE_LIMIT_PER_WEEK=get_int_env("ISSUANCE_RATE_LIMIT_PER_WEEK", 50),
+        PROCESS_MAX_CONCURRENCY=get_int_env("PROCESS_MAX_CONCURRENCY", 4),
+        RENEW_ENABLED=get_bool_env("RENEW_ENABLED", True),
+        RENEW_BEFORE_DAYS=get_int_env("RENEW_BEFORE_DAYS", 30),
+        RENEW_SPREAD_HOURS=get_int_env("RENEW_SPREAD_HOURS", 6),
+        SAN_CONSOLIDATION_ENABLED=get_bool_env("SAN_CONSOLIDATION_ENABLED", False),
+        SAN_CONSOLIDATION_MAX_NAMES=get_int_env("SAN_CONSOLIDATION_MAX_NAMES", 100),
+        ACME_CHALLENGE_TTL_SECONDS=get_int_env("ACME_CHALLENGE_TTL_SECONDS", 3600),
     )
@@ -16,7 +16,15 @@ def load_database_config() -> DatabaseConfig:
             sys.exit(1)
         return value
 
-    def get_int_env(key: str) -> int:
+    def get_bool_env(key: str, default: bool) -> bool:
+        raw = get_env(key)
+        if not raw:
+            return default
+        return raw.lower() in ("true", "1")
+
+    def get_int_env(key: str, default: int | None = None) -> int:
+        if default is not None and not get_env(key):
+            return default
         value = require_env(key)
         try:
             return int(value)
@@ -39,4 +47,13 @@ def load_database_config() -> DatabaseConfig:
         KAFKA_EVENT_TOPIC=require_env("KAFKA_EVENT_TOPIC"),
         KAFKA_EVENT_POISON_TOPIC=require_env("KAFKA_EVENT_POISON_TOPIC"),
         KAFKA_CONSUMER_GROUP_ID=require_env("KAFKA_CONSUMER_GROUP_ID"),
+        KAFKA_COALESCE_WINDOW_MS=get_int_env("KAFKA_COALESCE_WINDOW_MS", 200),
+        KAFKA_EVENT_CODEC=get_env("KAFKA_EVENT_CODEC") or "json",
+        LOCAL_EVENT_BUS_ENABLED=get_bool_env("LOCAL_EVENT_BUS_ENABLED", True),
+        LOCAL_EVENT_BUS_QUEUE_SIZE=get_int_env("LOCAL_EVENT_BUS_QUEUE_SIZE", 1000),
+        LOCAL_EVENT_BUS_WORKERS=get_int_env("LOCAL_EVENT_BUS_WORKERS", 4),
+        LOCAL_EVENT_BUS_JOURNAL=get_env("LOCAL_EVENT_BUS_JOURNAL"),
+        OUTBOX_RELAY_BATCH_SIZE=get_int_env("OUTBOX_RELAY_BATCH_SIZE", 100),
+        OUTBOX_RELAY_INTERVAL_MS=get_int_env("OUTBOX_RELAY_INTERVAL_MS", 1000),
+        FAST_BOOT=get_bool_env("FAST_BOOT", False),
     )
@@ -9,6 +9,15 @@ class CertConfig:
     CERT_MAX_WAIT_TIME: int
     READ_ON_STARTUP: bool
     SCHEDULE_ENABLED: bool
+    ISSUANCE_WORKERS: int = 2
+    ISSUANCE_RATE_LIMIT_PER_WEEK: int = 50
+    PROCESS_MAX_CONCURRENCY: int = 4
+    RENEW_ENABLED: bool = True
+    RENEW_BEFORE_DAYS: int = 30
+    RENEW_SPREAD_HOURS: int = 6
+    SAN_CONSOLIDATION_ENABLED: bool = False
+    SAN_CONSOLIDATION_MAX_NAMES: int = 100
+    ACME_CHALLENGE_TTL_SECONDS: int = 3600
 
 
 @dataclass
@@ -27,6 +36,15 @@ class DatabaseConfig:
     KAFKA_EVENT_TOPIC: str
     KAFKA_EVENT_POISON_TOPIC: str
     KAFKA_CONSUMER_GROUP_ID: str
+    KAFKA_COALESCE_WINDOW_MS: int = 200
+    KAFKA_EVENT_CODEC: str = "json"
+    LOCAL_EVENT_BUS_ENABLED: bool = True
+    LOCAL_EVENT_BUS_QUEUE_SIZE: int = 1000
+    LOCAL_EVENT_BUS_WORKERS: int = 4
+    LOCAL_EVENT_BUS_JOURNAL: str = ""
+    OUTBOX_RELAY_BATCH_SIZE: int = 100
+    OUTBOX_RELAY_INTERVAL_MS: int = 1000
+    FAST_BOOT: bool = False
 
 
 @dataclass
@@ -34,6 +52,11 @@ class VaultDataConfig:
     """本地用户头像：`data/tmp/<user_id>/` 上传暂存，`data/avatar/<user_id>/` 正式文件（对齐 Pqttec tmp→avatar，无环境分子目录）。"""
 
     DATA_DIR: str
+    IMAGE_CACHE_SIZE: int = 1024
+    AVATAR_THUMB_SIZES: tuple[int, ...] = (64, 128, 256)
+    AVATAR_THUMB_WORKERS: int = 2
+    TMP_SWEEP_TTL_HOURS: int = 24
+    TMP_SWEEP_BATCH_SIZE: int = 200
 
 
 @dataclass
@@ -48,3 +71,10 @@ class AuthConfig:
     EMAIL_SMTP_USER: str
     EMAIL_SMTP_PASSWORD: str
     EMAIL_VERIFICATION_CODE_TTL_SECONDS: int
+    JWT_VERIFY_CACHE_SIZE: int = 1024
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    MAIL_QUEUE_SIZE: int = 1000
+    MAIL_BATCH_SIZE: int = 20
+    MAIL_MAX_ATTEMPTS: int = 3
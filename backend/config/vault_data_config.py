@@ -5,6 +5,7 @@
 from __future__ import annotations
 
 import os
+import sys
 from pathlib import Path
 
 from .types import VaultDataConfig
@@ -19,12 +20,46 @@ def _layout_base_dir() -> Path:
     return here.parents[1]
 
 
+def _get_int_env(key: str, default: int) -> int:
+    raw = os.environ.get(key, "").strip()
+    if not raw:
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        print(f"{key} 必须是整数", file=sys.stderr)
+        sys.exit(1)
+
+
+def _get_sizes_env(key: str, default: tuple[int, ...]) -> tuple[int, ...]:
+    """逗号分隔的像素边长，例如 `64,128,256`。"""
+    raw = os.environ.get(key, "").strip()
+    if not raw:
+        return default
+    try:
+        sizes = tuple(sorted({int(x) for x in raw.split(",") if x.strip()}))
+    except ValueError:
+        print(f"{key} 必须是逗号分隔的整数", file=sys.stderr)
+        sys.exit(1)
+    if not sizes or min(sizes) <= 0:
+        print(f"{key} 必须是正整数", file=sys.stderr)
+        sys.exit(1)
+    return sizes
+
+
 def load_vault_data_config() -> VaultDataConfig:
     base = _layout_base_dir()
     raw = os.environ.get("VAULT_DATA_DIR", "").strip()
     if raw:
         p = Path(raw)
-        if p.is_absolute():
-            return VaultDataConfig(DATA_DIR=str(p.resolve()))
-        return VaultDataConfig(str((base / p).resolve()))
-    return VaultDataConfig(str((base / "data").resolve()))
+        data_dir = p.resolve() if p.is_absolute() else (base / p).resolve()
+    else:
+        data_dir = (base / "data").resolve()
+    return VaultDataConfig(
+        DATA_DIR=str(data_dir),
+        IMAGE_CACHE_SIZE=_get_int_env("IMAGE_CACHE_SIZE", 1024),
+        AVATAR_THUMB_SIZES=_get_sizes_env("AVATAR_THUMB_SIZES", (64, 128, 256)),
+        AVATAR_THUMB_WORKERS=_get_int_env("AVATAR_THUMB_WORKERS", 2),
+        TMP_SWEEP_TTL_HOURS=_get_int_env("TMP_SWEEP_TTL_HOURS", 24),
+        TMP_SWEEP_BATCH_SIZE=_get_int_env("TMP_SWEEP_BATCH_SIZE", 200),
+    )
@@ -10,6 +10,7 @@ import json
 import logging
 import os
 import signal
+import time
 from contextlib import asynccontextmanager
 from typing import Any, Optional
 
@@ -41,46 +42,60 @@ logger = logging.getLogger(__name__)
 _stack: Optional[ApplicationStack] = None
 _scheduler: Any = None
 _consumer_thread: Optional[KafkaConsumerThread] = None
+_stopping = False
+_boot_timing: dict[str, Any] = {}
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global _stack, _scheduler, _consumer_thread
+    global _stack, _scheduler, _consumer_thread, _stopping
+    boot_started = time.monotonic()
+    _stopping = False
     cert_cfg, db_cfg, auth_cfg, data_cfg = load_config()
     _stack = build_application_stack(cert_cfg, db_cfg, auth_cfg, data_cfg)
+    build_ms = round((time.monotonic() - boot_started) * 1000, 1)
 
     app.state.certificate_service = _stack.certificate_service
+    app.state.san_consolidator = _stack.san_consolidator
     app.state.file_service = _stack.file_service
     app.state.analysis_service = _stack.analysis_service
     app.state.acme_storage = _stack.acme_storage
     app.state.auth_service = _stack.auth_service
     app.state.image_repository = _stack.image_repository
+    app.state.image_file_cache = _stack.image_file_cache
     app.state.vault_data_dir = data_cfg.DATA_DIR
     app.state.cert_config = cert_cfg
     app.state.db_config = db_cfg
     app.state.auth_config = auth_cfg
 
-    if _stack.kafka_consumer and _stack.kafka_consumer.start():
-        _consumer_thread = KafkaConsumerThread(_stack.kafka_consumer)
-        _consumer_thread.start()
+    if _stack.kafka_consumer:
+        # FAST_BOOT 下 Kafka 可能仍在后台连接：连上后在连接线程里启动消费者
+        _stack.readiness.when_done("kafka", _start_kafka_consumer)
+    else:
+        _start_kafka_consumer(False)
+    if _stack.local_bus and _stack.local_bus.start():
         logger.info(
             json.dumps(
-                {"task": "kafka_consumer", "event": "thread_started"},
+                {"task": "local_event_bus", "event": "started", "workers": _stack.local_bus.workers},
                 ensure_ascii=False,
             )
         )
-    else:
+    if _stack.outbox_relay and _stack.outbox_relay.start():
         logger.info(
             json.dumps(
                 {
-                    "task": "kafka_consumer",
-                    "event": "not_started",
-                    "reason": "kafka_unavailable_or_unconfigured",
+                    "task": "outbox_relay",
+                    "event": "started",
+                    "batch_size": _stack.outbox_relay.batch_size,
                 },
                 ensure_ascii=False,
             )
         )
 
+    _stack.issuance_queue.start()
+    _stack.acme_storage.start()
+    _stack.mail_queue.start()
+
     if cert_cfg.READ_ON_STARTUP:
         logger.info(
             json.dumps(
@@ -125,7 +140,12 @@ async def lifespan(app: FastAPI):
                 exc_info=True,
             )
 
-    _scheduler = setup_scheduler(cert_cfg, _stack.certificate_service)
+    _scheduler = setup_scheduler(
+        cert_cfg,
+        _stack.certificate_service,
+        _stack.renewal_planner,
+        tmp_image_sweeper=_stack.tmp_image_sweeper,
+    )
 
     logger.info(
         json.dumps(
@@ -135,18 +155,43 @@ async def lifespan(app: FastAPI):
                 "mysql": getattr(_stack.mysql, "enable_mysql", False),
                 "redis": getattr(_stack.redis, "enable_redis", False),
                 "kafka": getattr(_stack.kafka, "enable_kafka", False),
+                "local_event_bus": _stack.local_bus is not None,
             },
             ensure_ascii=False,
         )
     )
+    _boot_timing.clear()
+    _boot_timing.update(
+        {
+            "fast_boot": db_cfg.FAST_BOOT,
+            "build_ms": build_ms,
+            "boot_ms": round((time.monotonic() - boot_started) * 1000, 1),
+        }
+    )
+    logger.info(
+        json.dumps(
+            {"task": "startup", "event": "boot_finished", **_boot_timing, **_stack.readiness.snapshot()},
+            ensure_ascii=False,
+        )
+    )
 
     yield
 
+    _stopping = True
     shutdown_scheduler(_scheduler)
+    _stack.issuance_queue.stop()
+    _stack.acme_storage.stop()
+    _stack.auth_service.hasher.shutdown()
+    _stack.mail_queue.stop()
+    _stack.avatar_thumbnailer.shutdown()
+    if _stack.outbox_relay:
+        _stack.outbox_relay.stop()
     if _stack.kafka_consumer:
         _stack.kafka_consumer.stop()
     if _consumer_thread:
         _consumer_thread.join(timeout=5)
+    if _stack.local_bus:
+        _stack.local_bus.stop()
     if _stack.kafka:
         _stack.kafka.close()
     if _stack.redis:
@@ -229,10 +274,59 @@ async def root() -> dict:
     }
 
 
+def _start_kafka_consumer(kafka_ok: bool) -> None:
+    global _consumer_thread
+    consumer = _stack.kafka_consumer if _stack else None
+    if kafka_ok and consumer and not _stopping and consumer.start():
+        _consumer_thread = KafkaConsumerThread(consumer)
+        _consumer_thread.start()
+        logger.info(
+            json.dumps(
+                {"task": "kafka_consumer", "event": "thread_started"},
+                ensure_ascii=False,
+            )
+        )
+    else:
+        logger.info(
+            json.dumps(
+                {
+                    "task": "kafka_consumer",
+                    "event": "not_started",
+                    "reason": "kafka_unavailable_or_unconfigured",
+                },
+                ensure_ascii=False,
+            )
+        )
+
+
+def _readiness() -> dict:
+    if _stack is None:
+        return {"ready": False, "degraded": [], "components": {}}
+    return _stack.readiness.snapshot()
+
+
+@app.get("/health/live")
+async def health_live() -> dict:
+    """存活：进程能响应即 200（不检查外部依赖）。"""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def health_ready() -> JSONResponse:
+    """就绪：启动装配完成且 Redis / Kafka 连接已有结果（失败即降级，仍算就绪），否则 503。"""
+    r = _readiness()
+    return JSONResponse(status_code=200 if r["ready"] else 503, content={**r, "boot": _boot_timing})
+
+
 @app.get("/health")
 async def health() -> dict:
+    r = _readiness()
     return {
         "status": "healthy",
+        "ready": r["ready"],
+        "degraded": r["degraded"],
+        "components": r["components"],
+        "boot": _boot_timing,
         "service": "backend",
         "database": "connected"
         if _stack and getattr(_stack.mysql, "enable_mysql", False)
@@ -243,9 +337,29 @@ async def health() -> dict:
         "kafka": "connected"
         if _stack and getattr(_stack.kafka, "enable_kafka", False)
         else "disconnected",
+        "event_bus": _event_bus_mode(),
     }
 
 
+@app.get("/vault/metrics")
+async def vault_metrics() -> dict:
+    """进程内运行指标（经 vault_jwt_guard 鉴权）：登录延迟、bcrypt 线程池排队与拒绝数、自动续签。"""
+    if _stack is None:
+        raise HTTPException(status_code=503, detail="not ready")
+    out = {"auth": _stack.auth_service.metrics_snapshot()}
+    if _stack.renewal_planner is not None:
+        out["renewal"] = _stack.renewal_planner.metrics_snapshot()
+    return out
+
+
+def _event_bus_mode() -> str:
+    if _stack and getattr(_stack.kafka, "enable_kafka", False):
+        return "kafka"
+    if _stack and _stack.local_bus and _stack.local_bus.running:
+        return "local"
+    return "none"
+
+
 def _on_signal(sig, frame) -> None:
     logger.info("收到停止信号")
 
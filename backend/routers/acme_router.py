@@ -3,7 +3,6 @@
 from __future__ import annotations
 
 import logging
-import os
 
 from fastapi import APIRouter, Depends, HTTPException, Request, Response
 
@@ -29,15 +28,6 @@ async def acme_challenge(
     logger.info("ACME challenge request token=%s", token)
     key_authorization = storage.get_challenge(token)
     if not key_authorization:
-        wk_path = os.path.join(
-            storage.challenge_dir, ".well-known", "acme-challenge", token
-        )
-        logger.warning(
-            "ACME challenge HTTP 404 token=%s challenge_dir=%s expected_file=%s exists=%s",
-            token,
-            storage.challenge_dir,
-            wk_path,
-            os.path.exists(wk_path),
-        )
+        logger.warning("ACME challenge HTTP 404 token=%s challenge_dir=%s", token, storage.challenge_dir)
         raise HTTPException(status_code=404, detail="Challenge token not found")
     return Response(content=key_authorization, media_type="text/plain")
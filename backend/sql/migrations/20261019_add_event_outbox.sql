@@ -0,0 +1,14 @@
+-- 事务性 outbox：证书写入与待发送事件同事务提交，后台 relay 批量投递 Kafka / 本地事件总线。
+-- Run against the NFX-Vault MySQL database after backup（新库由 create_all 自动建表）。
+
+CREATE TABLE IF NOT EXISTS event_outbox (
+  id BIGINT NOT NULL AUTO_INCREMENT,
+  event_type VARCHAR(64) NOT NULL,
+  payload JSON NOT NULL,
+  attempts INT NOT NULL DEFAULT 0,
+  last_error TEXT NULL,
+  available_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (id),
+  KEY idx_event_outbox_available (available_at, id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,4 @@
+-- 自动续签规划按 not_after 范围查询即将到期证书。
+-- Run against the NFX-Vault MySQL database after backup.
+
+CREATE INDEX idx_tls_certificates_not_after ON tls_certificates (not_after);
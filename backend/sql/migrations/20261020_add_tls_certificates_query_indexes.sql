@@ -0,0 +1,16 @@
+-- 证书列表 / 到期查询的二级索引；domain 已有唯一约束 uq_tls_certificates_domain，重复的普通索引删除。
+-- 启动时由内置迁移自动执行（utils/mysql/migrations.py），也可在备份后手工执行。
+
+DROP INDEX idx_tls_certificates_domain ON tls_certificates;
+
+-- 列表 / 搜索：ORDER BY created_at DESC LIMIT n（id 作为同一时间戳内的稳定次序）
+CREATE INDEX idx_tls_certificates_created_at_id ON tls_certificates (created_at, id);
+
+-- 按状态过滤并按到期时间排序（续签 / 失败重试视图）
+CREATE INDEX idx_tls_certificates_status_not_after ON tls_certificates (status, not_after);
+
+-- 按有效性过滤并按到期时间排序（已过期 / 有效证书视图）
+CREATE INDEX idx_tls_certificates_is_valid_not_after ON tls_certificates (is_valid, not_after);
+
+-- 按目录名精确查找（导出 / 磁盘导入对账）
+CREATE INDEX idx_tls_certificates_folder_name ON tls_certificates (folder_name);
@@ -0,0 +1,16 @@
+# coding=utf-8
+"""定时：规划自动续签（到期前 RENEW_BEFORE_DAYS 天内的证书错峰提交到签发队列）。"""
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+def renew_certificates_job(renewal_planner) -> dict[str, Any]:
+    try:
+        return renewal_planner.plan()
+    except Exception as e:  # noqa: BLE001
+        logger.error("renew_certificates_job: %s", e, exc_info=True)
+        return {"success": False, "message": str(e), "submitted": 0}
@@ -1,5 +1,5 @@
 # coding=utf-8
-"""APScheduler：每日更新证书剩余天数（仅 DB，不读磁盘目录）。"""
+"""APScheduler：每日更新证书剩余天数（仅 DB，不读磁盘目录），随后规划自动续签；每小时清理未确认的 tmp 头像。"""
 from __future__ import annotations
 
 import json
@@ -10,7 +10,11 @@ from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 
 from apps.certificate.services.certificate_service import CertificateService
+from apps.certificate.services.renewal_planner import RenewalPlanner
+from apps.user.services.tmp_image_sweeper import TmpImageSweeper
 from config.types import CertConfig
+from tasks.renew_certificates_task import renew_certificates_job
+from tasks.sweep_tmp_images_task import sweep_tmp_images_job
 from tasks.update_days_remaining_task import update_days_remaining_job
 
 logger = logging.getLogger(__name__)
@@ -19,6 +23,8 @@ logger = logging.getLogger(__name__)
 def setup_scheduler(
     cert_config: CertConfig,
     certificate_service: CertificateService,
+    renewal_planner: Optional[RenewalPlanner] = None,
+    tmp_image_sweeper: Optional[TmpImageSweeper] = None,
 ) -> Optional[BackgroundScheduler]:
     if not cert_config.SCHEDULE_ENABLED:
         logger.info(
@@ -41,6 +47,50 @@ def setup_scheduler(
         id=job_id,
         replace_existing=True,
     )
+    if renewal_planner is not None:
+        scheduler.add_job(
+            renew_certificates_job,
+            CronTrigger(hour=1, minute=30),
+            args=[renewal_planner],
+            id="daily_renew_certificates",
+            replace_existing=True,
+        )
+        logger.info(
+            json.dumps(
+                {
+                    "task": "scheduler",
+                    "event": "job_added",
+                    "job_id": "daily_renew_certificates",
+                    "cron": {"hour": 1, "minute": 30},
+                    "renew_before_days": renewal_planner.renew_before_days,
+                    "spread_hours": renewal_planner.spread_s / 3600,
+                },
+                ensure_ascii=False,
+            )
+        )
+    if tmp_image_sweeper is not None:
+        scheduler.add_job(
+            sweep_tmp_images_job,
+            CronTrigger(minute=15),
+            args=[tmp_image_sweeper],
+            id="hourly_sweep_tmp_images",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+        )
+        logger.info(
+            json.dumps(
+                {
+                    "task": "scheduler",
+                    "event": "job_added",
+                    "job_id": "hourly_sweep_tmp_images",
+                    "cron": {"minute": 15},
+                    "ttl_hours": tmp_image_sweeper.ttl_s / 3600,
+                    "batch_size": tmp_image_sweeper.batch_size,
+                },
+                ensure_ascii=False,
+            )
+        )
     scheduler.start()
     logger.info(
         json.dumps(
@@ -0,0 +1,16 @@
+# coding=utf-8
+"""定时：清理超过 TTL 仍未确认的 tmp 头像文件及其 vault_images 行。"""
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+def sweep_tmp_images_job(sweeper) -> dict[str, Any]:
+    try:
+        return sweeper.sweep()
+    except Exception as e:  # noqa: BLE001
+        logger.error("sweep_tmp_images_job: %s", e, exc_info=True)
+        return {"success": False, "message": str(e), "bytes_reclaimed": 0}
@@ -2,10 +2,17 @@
 """utils 统一导出入口；子目录不放置 __init__.py（Python 3.12+ 可按路径加载子模块）。"""
 
 from .acme.challenge_storage import ACMEChallengeStorage
+from .aio.loop_thread import BackgroundLoop
+from .eventbus.local_bus import LocalEventBus
+from .fs.atomic_writer import AtomicFileWriter, AtomicWriteBatch
+from .health.readiness import StartupReadiness
 from .kafka.client import KafkaClient
 from .kafka.consumer import KafkaConsumerThread, KafkaEventConsumer
+from .metrics.latency import LatencyWindow
 from .mysql.session import MySQLSession
-from .pem.parse import extract_cert_info_from_pem_sync
+from .pem.parse import extract_cert_info_from_pem, extract_cert_info_from_pem_sync
+from .process.runner import AsyncProcessRunner, ProcessResult, default_process_runner
+from .ratelimit.token_bucket import KeyedTokenBucket
 from .redis.client import RedisClient
 from .response.api_response import (
     ApiResponse,
@@ -15,19 +22,46 @@ from .response.api_response import (
     error_server,
     success,
 )
+from .response.file_response import ZeroCopyFileResponse, file_etag, is_not_modified
+from .upload.multipart_stream import (
+    PART_DATA,
+    PART_END,
+    PART_START,
+    MultipartStreamError,
+    iter_multipart_file,
+)
 
 __all__ = [
     "ACMEChallengeStorage",
     "ApiResponse",
+    "AsyncProcessRunner",
+    "AtomicFileWriter",
+    "AtomicWriteBatch",
+    "BackgroundLoop",
     "KafkaClient",
     "KafkaConsumerThread",
     "KafkaEventConsumer",
+    "KeyedTokenBucket",
+    "LatencyWindow",
+    "LocalEventBus",
+    "MultipartStreamError",
     "MySQLSession",
+    "PART_DATA",
+    "PART_END",
+    "PART_START",
+    "ProcessResult",
     "RedisClient",
+    "StartupReadiness",
+    "ZeroCopyFileResponse",
     "bad_request",
     "created",
+    "default_process_runner",
     "error_not_found",
     "error_server",
+    "extract_cert_info_from_pem",
     "extract_cert_info_from_pem_sync",
+    "file_etag",
+    "is_not_modified",
+    "iter_multipart_file",
     "success",
 ]
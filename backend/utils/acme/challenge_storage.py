@@ -1,18 +1,41 @@
 # coding=utf-8
-"""ACME HTTP-01 挑战存储（由原 backend 迁入）。"""
+"""ACME HTTP-01 挑战存储（由原 backend 迁入）。
+
+查询走进程内 dict：certbot --webroot 写入的 token 文件由目录监听（inotify / 轮询）载入，
+同时以 TTL 写入 Redis，多实例部署时任一节点都能应答 Let's Encrypt 多个验证点的并发请求。
+内存与 Redis 均未命中时才回退读盘（监听尚未送达的极短窗口）。
+"""
 from __future__ import annotations
 
 import logging
 import os
+import re
+import threading
+import time
 from typing import Optional
 
+from utils.acme.dir_watcher import DirectoryWatcher
+from utils.redis.client import RedisClient
+
 logger = logging.getLogger(__name__)
 
+_REDIS_KEY_PREFIX = "acme:challenge:"
+# ACME token 为 base64url 字符；其余输入直接拒绝（也杜绝路径穿越）
+_TOKEN_RE = re.compile(r"^[A-Za-z0-9_-]{1,256}$")
+
 
 class ACMEChallengeStorage:
-    def __init__(self, challenge_dir: str = "/tmp/acme-challenges") -> None:
+    def __init__(
+        self,
+        challenge_dir: str = "/tmp/acme-challenges",
+        redis_client: Optional[RedisClient] = None,
+        ttl_seconds: int = 3600,
+    ) -> None:
         self.challenge_dir = challenge_dir
+        self.redis_client = redis_client
+        self.ttl_seconds = max(1, ttl_seconds)
         wk = os.path.join(self.challenge_dir, ".well-known", "acme-challenge")
+        self.token_dir = wk
         os.makedirs(wk, exist_ok=True, mode=0o755)
         logger.info(
             "ACME challenge storage: root=%s token_dir=%s",
@@ -25,44 +48,59 @@ class ACMEChallengeStorage:
                 logger.debug("ACME storage chmod ok: %s", path)
             except OSError as e:
                 logger.warning("ACME storage chmod 跳过: %s — %s", path, e)
+        # token -> (key_authorization, 过期时间 monotonic)
+        self._tokens: dict[str, tuple[str, float]] = {}
+        self._lock = threading.Lock()
+        self._watcher = DirectoryWatcher([wk, self.challenge_dir], self._on_file_change)
+
+    def start(self) -> None:
+        """开始监听 webroot 并载入磁盘上已有 token（先监听后扫描，中间写入的文件不会漏掉）。"""
+        self._watcher.start()
+        for directory in (self.token_dir, self.challenge_dir):
+            try:
+                names = [e.name for e in os.scandir(directory) if e.is_file(follow_symlinks=False)]
+            except OSError:
+                continue
+            for name in names:
+                self._on_file_change(directory, name, True)
+
+    def stop(self) -> None:
+        self._watcher.stop()
 
     def store_challenge(self, token: str, key_authorization: str) -> bool:
+        if not _TOKEN_RE.match(token or ""):
+            return False
         try:
             challenge_file = os.path.join(self.challenge_dir, token)
             with open(challenge_file, "w", encoding="utf-8") as f:
                 f.write(key_authorization)
+            self._remember(token, key_authorization.strip(), replicate=True)
             return True
         except Exception as e:  # noqa: BLE001
             logger.error("store_challenge: %s", e, exc_info=True)
             return False
 
     def get_challenge(self, token: str) -> Optional[str]:
-        challenge_file = os.path.join(
-            self.challenge_dir, ".well-known", "acme-challenge", token
-        )
-        fallback_file = os.path.join(self.challenge_dir, token)
-        try:
-            if os.path.exists(challenge_file):
-                with open(challenge_file, encoding="utf-8") as f:
-                    return f.read().strip()
-            if os.path.exists(fallback_file):
-                with open(fallback_file, encoding="utf-8") as f:
-                    return f.read().strip()
-            logger.warning(
-                "ACME challenge not on disk token=%s root=%s primary=%s exists=%s fallback=%s exists=%s",
-                token,
-                self.challenge_dir,
-                challenge_file,
-                False,
-                fallback_file,
-                False,
-            )
-            return None
-        except Exception as e:  # noqa: BLE001
-            logger.error("get_challenge: %s", e, exc_info=True)
+        if not _TOKEN_RE.match(token or ""):
             return None
+        now = time.monotonic()
+        with self._lock:
+            hit = self._tokens.get(token)
+        if hit and hit[1] > now:
+            return hit[0]
+        if self.redis_client is not None:
+            value, pttl_ms = self.redis_client.get_with_pttl(_REDIS_KEY_PREFIX + token)
+            if value:
+                # 本地副本与 Redis 同时过期，而不是从现在起重新计满 TTL
+                ttl_s = pttl_ms / 1000.0 if pttl_ms is not None and pttl_ms > 0 else None
+                self._remember(token, value, replicate=False, ttl_s=ttl_s)
+                return value
+        return self._read_disk(token)
 
     def remove_challenge(self, token: str) -> bool:
+        if not _TOKEN_RE.match(token or ""):
+            return False
+        self._forget(token)
         try:
             challenge_file = os.path.join(self.challenge_dir, token)
             if os.path.exists(challenge_file):
@@ -72,3 +110,57 @@ class ACMEChallengeStorage:
         except Exception as e:  # noqa: BLE001
             logger.error("remove_challenge: %s", e, exc_info=True)
             return False
+
+    def _read_disk(self, token: str) -> Optional[str]:
+        challenge_file = os.path.join(self.token_dir, token)
+        fallback_file = os.path.join(self.challenge_dir, token)
+        for path in (challenge_file, fallback_file):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    value = f.read().strip()
+            except FileNotFoundError:
+                continue
+            except Exception as e:  # noqa: BLE001
+                logger.error("get_challenge: %s", e, exc_info=True)
+                return None
+            if value:
+                self._remember(token, value, replicate=True)
+                return value
+        logger.warning(
+            "ACME challenge not found token=%s root=%s primary=%s fallback=%s",
+            token,
+            self.challenge_dir,
+            challenge_file,
+            fallback_file,
+        )
+        return None
+
+    def _on_file_change(self, directory: str, name: str, exists: bool) -> None:
+        if not _TOKEN_RE.match(name):
+            return
+        if not exists:
+            self._forget(name)
+            return
+        try:
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                value = f.read().strip()
+        except OSError:
+            return
+        if value:
+            self._remember(name, value, replicate=True)
+
+    def _remember(self, token: str, value: str, replicate: bool, ttl_s: Optional[float] = None) -> None:
+        with self._lock:
+            self._tokens[token] = (value, time.monotonic() + (self.ttl_seconds if ttl_s is None else ttl_s))
+            if len(self._tokens) > 1024:
+                now = time.monotonic()
+                for t in [t for t, (_v, exp) in self._tokens.items() if exp <= now]:
+                    del self._tokens[t]
+        if replicate and self.redis_client is not None:
+            self.redis_client.setex(_REDIS_KEY_PREFIX + token, self.ttl_seconds, value)
+
+    def _forget(self, token: str) -> None:
+        with self._lock:
+            self._tokens.pop(token, None)
+        if self.redis_client is not None:
+            self.redis_client.delete(_REDIS_KEY_PREFIX + token)
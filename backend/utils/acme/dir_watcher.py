@@ -0,0 +1,140 @@
+# coding=utf-8
+"""目录文件变更监听：Linux 上用 inotify（ctypes，无额外依赖），不可用时（非 Linux / NAS 网络文件系统）退化为轮询。
+
+只监听给定目录本层的普通文件；回调 `on_change(directory, name, exists)` 在监听线程中执行。
+"""
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import threading
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+ChangeFn = Callable[[str, str, bool], None]
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _snapshot(directory: str) -> dict[str, tuple[int, int]]:
+    out: dict[str, tuple[int, int]] = {}
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_file(follow_symlinks=False):
+                    st = entry.stat(follow_symlinks=False)
+                    out[entry.name] = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        pass
+    return out
+
+
+class DirectoryWatcher:
+    def __init__(self, directories: list[str], on_change: ChangeFn, poll_interval_s: float = 1.0) -> None:
+        self.directories = [os.path.abspath(d) for d in directories]
+        self.on_change = on_change
+        self.poll_interval_s = max(0.1, poll_interval_s)
+        self.mode: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        fd, wds = self._inotify_open()
+        if fd is not None:
+            self.mode = "inotify"
+            target = lambda: self._inotify_loop(fd, wds)  # noqa: E731
+        else:
+            self.mode = "poll"
+            # 在 start 内取基线，避免线程启动前写入的文件被当作既有文件
+            seen = {d: _snapshot(d) for d in self.directories}
+            target = lambda: self._poll_loop(seen)  # noqa: E731
+        self._thread = threading.Thread(target=target, name="DirectoryWatcher", daemon=True)
+        self._thread.start()
+        logger.info("目录监听已启动 mode=%s dirs=%s", self.mode, self.directories)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _emit(self, directory: str, name: str, exists: bool) -> None:
+        try:
+            self.on_change(directory, name, exists)
+        except Exception as e:  # noqa: BLE001
+            logger.error("目录变更回调失败 %s/%s: %s", directory, name, e, exc_info=True)
+
+    def _inotify_open(self) -> tuple[Optional[int], dict[int, str]]:
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None, {}
+        if fd < 0:
+            return None, {}
+        wds: dict[int, str] = {}
+        for d in self.directories:
+            wd = libc.inotify_add_watch(fd, os.fsencode(d), _WATCH_MASK)
+            if wd < 0:
+                logger.warning("inotify_add_watch 失败 dir=%s errno=%s，改用轮询", d, ctypes.get_errno())
+                os.close(fd)
+                return None, {}
+            wds[wd] = d
+        return fd, wds
+
+    def _inotify_loop(self, fd: int, wds: dict[int, str]) -> None:
+        try:
+            while not self._stop.is_set():
+                ready, _, _ = select.select([fd], [], [], 1.0)
+                if not ready:
+                    continue
+                try:
+                    buf = os.read(fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                offset = 0
+                while offset + _EVENT_HEADER.size <= len(buf):
+                    wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(buf, offset)
+                    offset += _EVENT_HEADER.size
+                    name = buf[offset : offset + length].split(b"\0", 1)[0].decode("utf-8", "replace")
+                    offset += length
+                    if mask & _IN_Q_OVERFLOW:
+                        logger.warning("inotify 队列溢出，全量重扫")
+                        for d in self.directories:
+                            for n in _snapshot(d):
+                                self._emit(d, n, True)
+                        continue
+                    directory = wds.get(wd)
+                    if directory is None or not name:
+                        continue
+                    self._emit(directory, name, bool(mask & (_IN_CLOSE_WRITE | _IN_MOVED_TO)))
+        finally:
+            os.close(fd)
+
+    def _poll_loop(self, seen: dict[str, dict[str, tuple[int, int]]]) -> None:
+        while not self._stop.wait(self.poll_interval_s):
+            for d in self.directories:
+                now = _snapshot(d)
+                before = seen[d]
+                for name, sig in now.items():
+                    if before.get(name) != sig:
+                        self._emit(d, name, True)
+                for name in before.keys() - now.keys():
+                    self._emit(d, name, False)
+                seen[d] = now
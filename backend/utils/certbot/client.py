@@ -1,4 +1,4 @@
-"""Certbot webroot 申请证书（手写迁入，依赖系统 certbot + openssl）。"""
+"""Certbot webroot 申请证书（手写迁入，依赖系统 certbot；现有 PEM 的有效期在进程内解析判定）。"""
 from __future__ import annotations
 
 import logging
@@ -6,9 +6,15 @@ import os
 import re
 import shlex
 import subprocess
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from typing import Any, Optional
 
+from cryptography import x509
+
 from enums.certificate_status import CertificateStatus
+from utils.process.runner import AsyncProcessRunner, default_process_runner
 
 logger = logging.getLogger(__name__)
 
@@ -17,8 +23,56 @@ def _shell_join(cmd: list[str]) -> str:
     return " ".join(shlex.quote(c) for c in cmd)
 
 
+# 剩余有效期不足该值的现有证书不复用（等价于原 `openssl x509 -checkend 86400`）
+_REUSE_MIN_VALIDITY = timedelta(days=1)
+
+
+def _file_sig(path: str) -> Optional[tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _pem_not_after(cert_pem: str) -> Optional[datetime]:
+    """fullchain.pem 中第一张（叶子）证书的 not_after（UTC）；解析失败返回 None。"""
+    try:
+        return x509.load_pem_x509_certificate(cert_pem.encode("utf-8")).not_valid_after_utc
+    except Exception:  # noqa: BLE001
+        return None
+
+
+@dataclass
+class _ExistingPem:
+    """live/<name> 下 PEM 的内存副本；以 (mtime_ns, size) 判定文件是否变化。"""
+
+    cert_sig: tuple[int, int]
+    key_sig: tuple[int, int]
+    certificate: str
+    private_key: str
+    not_after: Optional[datetime]
+
+
+@dataclass
+class _CertbotPlan:
+    folder_name: str
+    force_renewal: bool
+    domains: list[str]
+    cmd: list[str]
+    config_dir: str
+    work_dir: str
+    logs_dir: str
+
+
 class CertbotClient:
-    def __init__(self, challenge_dir: str, certs_dir: str, max_wait_time: int) -> None:
+    def __init__(
+        self,
+        challenge_dir: str,
+        certs_dir: str,
+        max_wait_time: int,
+        runner: Optional[AsyncProcessRunner] = None,
+    ) -> None:
         if not challenge_dir or not certs_dir:
             raise ValueError("challenge_dir and certs_dir required")
         if not isinstance(max_wait_time, int) or max_wait_time <= 0:
@@ -26,6 +80,9 @@ class CertbotClient:
         self.challenge_dir = challenge_dir
         self.certs_dir = certs_dir
         self.max_wait_time = max_wait_time
+        self.runner = runner or default_process_runner()
+        self._pem_cache: dict[str, _ExistingPem] = {}
+        self._pem_cache_lock = threading.Lock()
         self._ensure_acme_webroot_tree()
         os.makedirs(self.certs_dir, exist_ok=True)
 
@@ -53,28 +110,36 @@ class CertbotClient:
                     e,
                 )
 
+    def _live_paths(self, folder_name: str) -> tuple[str, str]:
+        live = os.path.join(self.certs_dir, ".certbot", "config", "live", folder_name)
+        return os.path.join(live, "fullchain.pem"), os.path.join(live, "privkey.pem")
+
     def _existing_pem(self, folder_name: str) -> Optional[dict[str, Any]]:
-        cfg = os.path.join(self.certs_dir, ".certbot", "config")
-        live = os.path.join(cfg, "live", folder_name)
-        cfile, kfile = os.path.join(live, "fullchain.pem"), os.path.join(live, "privkey.pem")
-        if not (os.path.exists(cfile) and os.path.exists(kfile)):
+        """现有 PEM 及其是否仍可复用；文件未变时只做两次 stat，不读文件、不 fork openssl。"""
+        cfile, kfile = self._live_paths(folder_name)
+        cert_sig, key_sig = _file_sig(cfile), _file_sig(kfile)
+        if cert_sig is None or key_sig is None:
+            with self._pem_cache_lock:
+                self._pem_cache.pop(folder_name, None)
             return None
-        with open(cfile, encoding="utf-8") as f:
-            cert = f.read()
-        with open(kfile, encoding="utf-8") as f:
-            key = f.read()
-        is_valid = True
-        try:
-            r = subprocess.run(
-                ["openssl", "x509", "-in", cfile, "-noout", "-checkend", "86400"],
-                capture_output=True,
-                text=True,
-                timeout=10,
-            )
-            is_valid = r.returncode == 0
-        except Exception:  # noqa: BLE001
-            pass
-        return {"certificate": cert, "private_key": key, "is_valid": is_valid}
+        with self._pem_cache_lock:
+            entry = self._pem_cache.get(folder_name)
+        if entry is None or entry.cert_sig != cert_sig or entry.key_sig != key_sig:
+            try:
+                with open(cfile, encoding="utf-8") as f:
+                    cert = f.read()
+                with open(kfile, encoding="utf-8") as f:
+                    key = f.read()
+            except OSError:
+                return None
+            entry = _ExistingPem(cert_sig, key_sig, cert, key, _pem_not_after(cert))
+            with self._pem_cache_lock:
+                self._pem_cache[folder_name] = entry
+        is_valid = (
+            entry.not_after is not None
+            and entry.not_after - datetime.now(timezone.utc) > _REUSE_MIN_VALIDITY
+        )
+        return {"certificate": entry.certificate, "private_key": entry.private_key, "is_valid": is_valid}
 
     @staticmethod
     def _rate_limit(msg: str) -> tuple[bool, Optional[str]]:
@@ -85,15 +150,27 @@ class CertbotClient:
         )
         return (True, m.group(1)) if m else (False, None)
 
-    def issue_certificate(
+    @staticmethod
+    def _reuse_result(ex: dict[str, Any], message: str) -> dict[str, Any]:
+        return {
+            "success": True,
+            "message": message,
+            "certificate": ex["certificate"],
+            "private_key": ex["private_key"],
+            "status": CertificateStatus.SUCCESS.value,
+            "error": None,
+            "issued": False,
+        }
+
+    def _plan(
         self,
         domain: str,
         email: str,
-        sans: Optional[list[str]] = None,
-        folder_name: Optional[str] = None,
-        force_renewal: bool = False,
-        webroot: Optional[str] = None,
-    ) -> dict[str, Any]:
+        sans: Optional[list[str]],
+        folder_name: Optional[str],
+        force_renewal: bool,
+        webroot: Optional[str],
+    ) -> _CertbotPlan:
         if webroot and os.path.normpath(webroot) != os.path.normpath(self.challenge_dir):
             logger.warning(
                 "certbot ignores ui webroot=%s; using ACME_CHALLENGE_DIR=%s (align nginx with this path)",
@@ -102,26 +179,9 @@ class CertbotClient:
             )
         if not folder_name:
             folder_name = domain.replace(".", "_")
-        if not force_renewal:
-            ex = self._existing_pem(folder_name)
-            if ex and ex.get("is_valid", True):
-                logger.info(
-                    "certbot skip cert_name=%s (reuse existing PEM, force_renewal=False)",
-                    folder_name,
-                )
-                return {
-                    "success": True,
-                    "message": "Using existing certificate",
-                    "certificate": ex["certificate"],
-                    "private_key": ex["private_key"],
-                    "status": CertificateStatus.SUCCESS.value,
-                    "error": None,
-                }
         custom_config_dir = os.path.join(self.certs_dir, ".certbot", "config")
         custom_work_dir = os.path.join(self.certs_dir, ".certbot", "work")
         custom_logs_dir = os.path.join(self.certs_dir, ".certbot", "logs")
-        for d in (custom_config_dir, custom_work_dir, custom_logs_dir):
-            os.makedirs(d, exist_ok=True)
         raw = [domain, *(sans or [])]
         seen: set[str] = set()
         domains: list[str] = []
@@ -152,30 +212,60 @@ class CertbotClient:
             cmd.append("--force-renewal")
         for d in domains:
             cmd.extend(["-d", d])
+        return _CertbotPlan(
+            folder_name=folder_name,
+            force_renewal=force_renewal,
+            domains=domains,
+            cmd=cmd,
+            config_dir=custom_config_dir,
+            work_dir=custom_work_dir,
+            logs_dir=custom_logs_dir,
+        )
+
+    def _before_run(self, plan: _CertbotPlan) -> None:
+        for d in (plan.config_dir, plan.work_dir, plan.logs_dir):
+            os.makedirs(d, exist_ok=True)
         self._ensure_acme_webroot_tree()
         logger.info(
             "certbot certonly start cert_name=%s force_renewal=%s timeout_s=%s domains=%s",
-            folder_name,
-            force_renewal,
+            plan.folder_name,
+            plan.force_renewal,
             self.max_wait_time,
-            domains,
+            plan.domains,
         )
         logger.info("certbot --webroot-path=%s", self.challenge_dir)
         logger.info(
             "certbot dirs config_dir=%s work_dir=%s logs_dir=%s",
-            custom_config_dir,
-            custom_work_dir,
-            custom_logs_dir,
+            plan.config_dir,
+            plan.work_dir,
+            plan.logs_dir,
         )
-        logger.info("certbot cmd: %s", _shell_join(cmd))
-        try:
-            r = subprocess.run(cmd, capture_output=True, text=True, timeout=self.max_wait_time)
-        except subprocess.TimeoutExpired:
+        logger.info("certbot cmd: %s", _shell_join(plan.cmd))
+
+    def _needs_rate_limit_fallback(
+        self, plan: _CertbotPlan, returncode: Optional[int], stdout: str, stderr: str
+    ) -> bool:
+        if returncode == 0 or plan.force_renewal:
+            return False
+        err = (stderr or "").strip() or (stdout or "").strip()
+        return self._rate_limit(err)[0]
+
+    def _finish(
+        self,
+        plan: _CertbotPlan,
+        returncode: Optional[int],
+        stdout: str,
+        stderr: str,
+        timed_out: bool,
+        rate_limit_fallback: Optional[dict[str, Any]] = None,
+    ) -> dict[str, Any]:
+        folder_name = plan.folder_name
+        if timed_out:
             logger.error(
                 "certbot timeout after %ss cert_name=%s cmd=%s",
                 self.max_wait_time,
                 folder_name,
-                _shell_join(cmd),
+                _shell_join(plan.cmd),
             )
             return {
                 "success": False,
@@ -185,30 +275,21 @@ class CertbotClient:
                 "status": CertificateStatus.FAIL.value,
                 "error": "timeout",
             }
-        if r.returncode != 0:
-            out, err = (r.stdout or "").strip(), (r.stderr or "").strip()
+        if returncode != 0:
+            out, err = (stdout or "").strip(), (stderr or "").strip()
             logger.error(
                 "certbot failed rc=%s cert_name=%s\n--- stderr (%s B) ---\n%s\n--- stdout (%s B) ---\n%s",
-                r.returncode,
+                returncode,
                 folder_name,
-                len(r.stderr or ""),
-                r.stderr or "",
-                len(r.stdout or ""),
-                r.stdout or "",
+                len(stderr or ""),
+                stderr or "",
+                len(stdout or ""),
+                stdout or "",
             )
             err = err or out or ""
             is_rl, retry_after = self._rate_limit(err)
-            if is_rl and not force_renewal:
-                ex = self._existing_pem(folder_name)
-                if ex:
-                    return {
-                        "success": True,
-                        "message": "rate limit, using existing",
-                        "certificate": ex["certificate"],
-                        "private_key": ex["private_key"],
-                        "status": CertificateStatus.SUCCESS.value,
-                        "error": None,
-                    }
+            if is_rl and rate_limit_fallback:
+                return self._reuse_result(rate_limit_fallback, "rate limit, using existing")
             if is_rl:
                 return {
                     "success": False,
@@ -228,8 +309,8 @@ class CertbotClient:
                 "status": CertificateStatus.FAIL.value,
                 "error": err,
             }
-        cdir = os.path.join(custom_config_dir, "live", folder_name)
-        cf, kf = os.path.join(cdir, "fullchain.pem"), os.path.join(cdir, "privkey.pem")
+        cf, kf = self._live_paths(folder_name)
+        cdir = os.path.dirname(cf)
         if not (os.path.exists(cf) and os.path.exists(kf)):
             logger.error(
                 "certbot rc=0 but PEM missing cert_name=%s cdir=%s fullchain=%s privkey=%s",
@@ -247,15 +328,84 @@ class CertbotClient:
                 "error": "no pem",
             }
         logger.info("certbot success cert_name=%s live_dir=%s", folder_name, cdir)
-        with open(cf, encoding="utf-8") as f:
-            cert = f.read()
-        with open(kf, encoding="utf-8") as f:
-            pk = f.read()
+        # 顺带刷新内存副本，下次复用判定只需 stat
+        ex = self._existing_pem(folder_name)
+        if ex is None:
+            return {
+                "success": False,
+                "message": "pem unreadable after certbot",
+                "certificate": None,
+                "private_key": None,
+                "status": CertificateStatus.FAIL.value,
+                "error": "no pem",
+            }
         return {
             "success": True,
             "message": "ok",
-            "certificate": cert,
-            "private_key": pk,
+            "certificate": ex["certificate"],
+            "private_key": ex["private_key"],
             "status": CertificateStatus.SUCCESS.value,
             "error": None,
+            # certbot 本次确实签发（供签发队列扣减 Let's Encrypt 配额）；未到期时 certbot 不做任何事
+            "issued": "not yet due for renewal" not in (stdout or ""),
         }
+
+    def issue_certificate(
+        self,
+        domain: str,
+        email: str,
+        sans: Optional[list[str]] = None,
+        folder_name: Optional[str] = None,
+        force_renewal: bool = False,
+        webroot: Optional[str] = None,
+    ) -> dict[str, Any]:
+        """同步版本：阻塞当前线程直至 certbot 结束（供无事件环的调用方）。"""
+        plan = self._plan(domain, email, sans, folder_name, force_renewal, webroot)
+        if not force_renewal:
+            ex = self._existing_pem(plan.folder_name)
+            if ex and ex.get("is_valid", True):
+                logger.info(
+                    "certbot skip cert_name=%s (reuse existing PEM, force_renewal=False)",
+                    plan.folder_name,
+                )
+                return self._reuse_result(ex, "Using existing certificate")
+        self._before_run(plan)
+        try:
+            r = subprocess.run(plan.cmd, capture_output=True, text=True, timeout=self.max_wait_time)
+        except subprocess.TimeoutExpired:
+            return self._finish(plan, None, "", "", timed_out=True)
+        fallback = None
+        if self._needs_rate_limit_fallback(plan, r.returncode, r.stdout, r.stderr):
+            fallback = self._existing_pem(plan.folder_name)
+        return self._finish(plan, r.returncode, r.stdout or "", r.stderr or "", False, fallback)
+
+    async def issue_certificate_async(
+        self,
+        domain: str,
+        email: str,
+        sans: Optional[list[str]] = None,
+        folder_name: Optional[str] = None,
+        force_renewal: bool = False,
+        webroot: Optional[str] = None,
+    ) -> dict[str, Any]:
+        """异步版本：经 AsyncProcessRunner 运行 certbot，逐行输出实时写日志，不占用线程。"""
+        plan = self._plan(domain, email, sans, folder_name, force_renewal, webroot)
+        if not force_renewal:
+            ex = self._existing_pem(plan.folder_name)
+            if ex and ex.get("is_valid", True):
+                logger.info(
+                    "certbot skip cert_name=%s (reuse existing PEM, force_renewal=False)",
+                    plan.folder_name,
+                )
+                return self._reuse_result(ex, "Using existing certificate")
+        self._before_run(plan)
+        r = await self.runner.run(
+            plan.cmd,
+            timeout=self.max_wait_time,
+            log_name=f"certbot:{plan.folder_name}",
+            stream_log=True,
+        )
+        fallback = None
+        if not r.timed_out and self._needs_rate_limit_fallback(plan, r.returncode, r.stdout, r.stderr):
+            fallback = self._existing_pem(plan.folder_name)
+        return self._finish(plan, r.returncode, r.stdout, r.stderr, r.timed_out, fallback)
@@ -0,0 +1,241 @@
+"""进程内事件总线：Kafka 不可用时替代 Producer+Consumer，复用同一套 event_type → handler 路由。
+
+- 有界队列：超过 `max_queue_size` 的 publish 直接返回 False（与 Kafka 发送失败语义一致）；
+- `workers` 个 worker 并发消费：同步 handler 进线程池，async handler 直接在总线事件环上 await；
+- 可选 SQLite journal：publish 先落盘、处理完成后删除，重启时重放未完成事件。
+"""
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from utils.aio.loop_thread import BackgroundLoop
+from utils.kafka.coalescer import CoalesceKeyFn, EventCoalescer
+from utils.kafka.codec import CODEC_MSGPACK_V1, decode_event, encode_event
+from utils.kafka.consumer import EventHandler
+
+logger = logging.getLogger(__name__)
+
+_JOURNAL_ID_KEY = "_journal_id"
+
+
+class _SqliteJournal:
+    def __init__(self, path: str) -> None:
+        self.path = os.path.abspath(os.path.expanduser(path))
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS local_events ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "event_type TEXT NOT NULL, "
+            "payload BLOB NOT NULL, "
+            "created_at REAL NOT NULL)"
+        )
+
+    def append(self, event_type: str, data: dict[str, Any]) -> int:
+        payload = encode_event(data, CODEC_MSGPACK_V1)
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO local_events (event_type, payload, created_at) VALUES (?, ?, ?)",
+                (event_type, payload, time.time()),
+            )
+            return int(cur.lastrowid)
+
+    def remove(self, row_id: int) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM local_events WHERE id = ?", (row_id,))
+
+    def pending(self) -> list[tuple[int, str, dict[str, Any]]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, event_type, payload FROM local_events ORDER BY id"
+            ).fetchall()
+        out: list[tuple[int, str, dict[str, Any]]] = []
+        for row_id, event_type, payload in rows:
+            try:
+                out.append((int(row_id), str(event_type), decode_event(payload, CODEC_MSGPACK_V1)))
+            except Exception as e:  # noqa: BLE001
+                logger.error("本地事件 journal 解码失败 id=%s: %s", row_id, e)
+                self.remove(int(row_id))
+        return out
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class LocalEventBus:
+    def __init__(
+        self,
+        max_queue_size: int = 1000,
+        workers: int = 4,
+        journal_path: Optional[str] = None,
+        coalesce_window_ms: int = 200,
+    ) -> None:
+        self.max_queue_size = max(1, max_queue_size)
+        self.workers = max(1, workers)
+        self.handlers: dict[str, EventHandler] = {}
+        self.coalescer = EventCoalescer(window_ms=coalesce_window_ms, on_drop=self._on_coalesced_drop)
+        self.journal: Optional[_SqliteJournal] = _SqliteJournal(journal_path) if journal_path else None
+        self._bg = BackgroundLoop("LocalEventBus")
+        self._queue: Optional[asyncio.Queue[tuple[str, dict[str, Any], bool]]] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._size = 0
+        self._size_lock = threading.Lock()
+        self.running = False
+
+    def register_handler(self, event_type: str, handler: EventHandler) -> None:
+        self.handlers[event_type] = handler
+
+    def register_coalescing(self, event_type: str, key_fn: Optional[CoalesceKeyFn] = None) -> None:
+        self.coalescer.register(event_type, key_fn)
+
+    def start(self) -> bool:
+        if self.running:
+            return True
+        self._bg.start()
+        self._bg.submit(self._start_workers()).result(timeout=5)
+        self.running = True
+        replayed = 0
+        if self.journal:
+            for row_id, event_type, data in self.journal.pending():
+                data[_JOURNAL_ID_KEY] = row_id
+                if self._enqueue(event_type, data):
+                    replayed += 1
+        logger.info(
+            "本地事件总线启动: workers=%s max_queue=%s journal=%s replayed=%s",
+            self.workers,
+            self.max_queue_size,
+            self.journal.path if self.journal else None,
+            replayed,
+        )
+        return True
+
+    async def _start_workers(self) -> None:
+        self._queue = asyncio.Queue()
+        self._wakeup = asyncio.Event()
+        for i in range(self.workers):
+            asyncio.create_task(self._worker(), name=f"local-bus-worker-{i}")
+        asyncio.create_task(self._flusher(), name="local-bus-flusher")
+
+    def publish(self, event_type: str, data: dict[str, Any]) -> bool:
+        """线程安全；入队成功返回 True，总线未启动或队列满返回 False。"""
+        if not self.running:
+            logger.warning("本地事件总线未启动，丢弃 event_type=%s", event_type)
+            return False
+        if event_type not in self.handlers:
+            logger.warning("本地事件总线未注册的事件类型: %s", event_type)
+            return False
+        data = dict(data)
+        if self.journal:
+            try:
+                data[_JOURNAL_ID_KEY] = self.journal.append(event_type, data)
+            except Exception as e:  # noqa: BLE001
+                logger.error("本地事件 journal 写入失败: %s", e)
+        if not self._enqueue(event_type, data):
+            self._forget(data)
+            return False
+        logger.info("本地总线已投递 event_type=%s", event_type)
+        return True
+
+    def _enqueue(self, event_type: str, data: dict[str, Any], preclaimed: bool = False) -> bool:
+        with self._size_lock:
+            if self._size >= self.max_queue_size:
+                logger.warning(
+                    "本地事件总线队列已满(%s)，拒绝 event_type=%s", self.max_queue_size, event_type
+                )
+                return False
+            self._size += 1
+        assert self._queue is not None
+        self._bg.call_soon(self._queue.put_nowait, (event_type, data, preclaimed))
+        return True
+
+    async def _worker(self) -> None:
+        assert self._queue is not None and self._wakeup is not None
+        while True:
+            event_type, data, preclaimed = await self._queue.get()
+            with self._size_lock:
+                self._size -= 1
+            try:
+                if not preclaimed and not self.coalescer.offer(event_type, data):
+                    self._wakeup.set()
+                    continue
+                await self._dispatch(event_type, data)
+            finally:
+                self._queue.task_done()
+
+    async def _dispatch(self, event_type: str, data: dict[str, Any]) -> None:
+        handler = self.handlers.get(event_type)
+        payload = {k: v for k, v in data.items() if k != _JOURNAL_ID_KEY}
+        try:
+            if handler is None:
+                logger.warning("本地事件总线未注册的事件类型: %s", event_type)
+            elif inspect.iscoroutinefunction(handler):
+                await handler(payload)
+            else:
+                result = await asyncio.to_thread(handler, payload)
+                if inspect.isawaitable(result):
+                    await result
+            logger.info("本地总线已消费 event_type=%s", event_type)
+        except Exception as e:  # noqa: BLE001
+            logger.error("本地事件处理失败: %s %s", event_type, e, exc_info=True)
+        finally:
+            self.coalescer.done(event_type, data)
+            self._forget(data)
+            if self.coalescer.is_coalesced(event_type) and self._wakeup is not None:
+                self._wakeup.set()
+
+    async def _flusher(self) -> None:
+        """合并事件的 trailing 执行：窗口到期后重新入队（preclaimed，跳过 offer）。"""
+        assert self._wakeup is not None
+        while True:
+            wait = self.coalescer.next_due_in()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=wait if wait is not None else None)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            for event_type, data, merged in self.coalescer.due():
+                if not self._enqueue(event_type, data, preclaimed=True):
+                    self.coalescer.done(event_type, data)
+                    continue
+                logger.info(
+                    "本地总线合并事件已入队 event_type=%s coalesced=%s coalesced_total=%s",
+                    event_type,
+                    merged,
+                    self.coalescer.stats.coalesced_total,
+                )
+
+    def _on_coalesced_drop(self, _event_type: str, data: dict[str, Any]) -> None:
+        self._forget(data)
+
+    def _forget(self, data: dict[str, Any]) -> None:
+        row_id = data.get(_JOURNAL_ID_KEY)
+        if self.journal and row_id is not None:
+            try:
+                self.journal.remove(int(row_id))
+            except Exception as e:  # noqa: BLE001
+                logger.error("本地事件 journal 删除失败 id=%s: %s", row_id, e)
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        self.running = False
+        self._bg.stop()
+        if self.journal:
+            self.journal.close()
+        stats = self.coalescer.stats
+        logger.info(
+            "本地事件总线已停止: coalesced_total=%s executed_total=%s",
+            stats.coalesced_total,
+            stats.executed_total,
+        )
@@ -0,0 +1,217 @@
+# coding=utf-8
+"""原子、批量落盘的文件写入（证书导出用）。
+
+- 每个文件先写同目录下的隐藏临时文件并 fsync，`commit()` 时统一 os.replace：
+  读者（nginx 等）只会看到旧文件或完整的新文件，同一批内的 cert / key 几乎同时切换；
+- 目录项的持久化在 `commit()` 里按目录 fsync 一次，而不是每个文件一次；
+- 写入前比较内容摘要，与磁盘上一致的文件直接跳过（不产生写入、不改 mtime）。
+  摘要按 (inode, mtime_ns, size) 缓存，重复导出同一批证书只需一次 stat。
+"""
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional, Union
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_MODE = 0o644
+_MAX_CACHED_DIGESTS = 4096
+
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.sha256(data).digest()
+
+
+def _stat_key(st: os.stat_result) -> tuple[int, int, int]:
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+@dataclass
+class _Staged:
+    tmp: str
+    path: str
+    stat_key: tuple[int, int, int]
+    digest: bytes
+
+
+@dataclass
+class WriteBatchStats:
+    written: int = 0
+    skipped: int = 0
+    dirs_synced: int = 0
+    bytes_written: int = 0
+    paths: list[str] = field(default_factory=list)
+
+
+class AtomicWriteBatch:
+    """由 `AtomicFileWriter.batch()` 创建；`write()` 可在多个线程中并发调用。
+
+    作为上下文管理器使用时正常退出即 `commit()`，异常退出则 `abort()`（删除临时文件，磁盘保持原样）。
+    """
+
+    def __init__(self, writer: AtomicFileWriter) -> None:
+        self._writer = writer
+        self._staged: list[_Staged] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self.stats = WriteBatchStats()
+
+    def write(self, path: str, data: Union[str, bytes]) -> bool:
+        """暂存一次写入；内容与磁盘上一致时返回 False（不写）。"""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        digest = _digest(data)
+        current = self._writer.current_digest(path)
+        if current == digest:
+            with self._lock:
+                self.stats.skipped += 1
+            return False
+        staged = self._writer.stage(path, data, digest)
+        with self._lock:
+            if self._closed:
+                _unlink_quietly(staged.tmp)
+                raise RuntimeError("write batch already closed")
+            self._staged.append(staged)
+            self.stats.bytes_written += len(data)
+        return True
+
+    def commit(self) -> WriteBatchStats:
+        with self._lock:
+            if self._closed:
+                return self.stats
+            self._closed = True
+            staged, self._staged = self._staged, []
+        dirs: dict[str, None] = {}
+        try:
+            while staged:
+                s = staged[0]
+                os.replace(s.tmp, s.path)
+                staged.pop(0)
+                self._writer.remember(s.path, s.stat_key, s.digest)
+                dirs[os.path.dirname(s.path)] = None
+                self.stats.written += 1
+                self.stats.paths.append(s.path)
+        finally:
+            for s in staged:
+                _unlink_quietly(s.tmp)
+            if self._writer.durable:
+                for d in dirs:
+                    _fsync_dir(d)
+                    self.stats.dirs_synced += 1
+        return self.stats
+
+    def abort(self) -> None:
+        with self._lock:
+            self._closed = True
+            staged, self._staged = self._staged, []
+        for s in staged:
+            _unlink_quietly(s.tmp)
+
+    def __enter__(self) -> AtomicWriteBatch:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+
+class AtomicFileWriter:
+    """长期持有（进程内单例即可）：负责临时文件落盘与内容摘要缓存。
+
+    `durable=False` 时不做任何 fsync（测试 / 临时目录），仍保证原子替换。
+    """
+
+    def __init__(self, durable: bool = True, max_cached: int = _MAX_CACHED_DIGESTS, mode: int = _DEFAULT_MODE) -> None:
+        self.durable = durable
+        self.mode = mode
+        self._max_cached = max(1, max_cached)
+        self._digests: OrderedDict[str, tuple[tuple[int, int, int], bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def batch(self) -> AtomicWriteBatch:
+        return AtomicWriteBatch(self)
+
+    def write(self, path: str, data: Union[str, bytes]) -> bool:
+        """单文件写入（一个文件的批次）。"""
+        with self.batch() as b:
+            return b.write(path, data)
+
+    def current_digest(self, path: str) -> Optional[bytes]:
+        """磁盘上 `path` 的内容摘要；不存在返回 None。stat 未变时直接用缓存。"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        key = _stat_key(st)
+        with self._lock:
+            cached = self._digests.get(path)
+            if cached is not None and cached[0] == key:
+                self._digests.move_to_end(path)
+                return cached[1]
+        try:
+            with open(path, "rb") as f:
+                st = os.fstat(f.fileno())
+                digest = _digest(f.read())
+        except OSError:
+            return None
+        self.remember(path, _stat_key(st), digest)
+        return digest
+
+    def remember(self, path: str, stat_key: tuple[int, int, int], digest: bytes) -> None:
+        with self._lock:
+            self._digests[path] = (stat_key, digest)
+            self._digests.move_to_end(path)
+            while len(self._digests) > self._max_cached:
+                self._digests.popitem(last=False)
+
+    def stage(self, path: str, data: bytes, digest: bytes) -> _Staged:
+        """写入同目录临时文件并 fsync 数据，返回待 `os.replace` 的暂存项。"""
+        directory = os.path.dirname(path) or "."
+        fd, tmp = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                if self.durable:
+                    os.fsync(f.fileno())
+                os.fchmod(f.fileno(), self._target_mode(path))
+                st = os.fstat(f.fileno())
+        except BaseException:
+            _unlink_quietly(tmp)
+            raise
+        return _Staged(tmp=tmp, path=path, stat_key=_stat_key(st), digest=digest)
+
+    def _target_mode(self, path: str) -> int:
+        """已有文件沿用其权限，新文件用 `mode`（mkstemp 固定为 0600）。"""
+        try:
+            return os.stat(path).st_mode & 0o7777
+        except OSError:
+            return self.mode
+
+
+def _fsync_dir(path: str) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+    except OSError as e:
+        logger.warning("fsync dir %s: %s", path, e)
+        return
+    try:
+        os.fsync(fd)
+    except OSError as e:
+        logger.warning("fsync dir %s: %s", path, e)
+    finally:
+        os.close(fd)
+
+
+def _unlink_quietly(path: str) -> None:
+    with contextlib.suppress(OSError):
+        os.unlink(path)
@@ -0,0 +1,120 @@
+# coding=utf-8
+"""启动期外部依赖的就绪状态（供 `/health` 区分存活与就绪）。
+
+每个组件一个后台守护线程执行连接函数（返回 bool），记录 pending / ready / failed 与耗时；
+failed 表示降级运行（与此前连接失败时关闭对应功能一致），不阻塞就绪。
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+READY = "ready"
+FAILED = "failed"
+
+
+@dataclass
+class _Component:
+    state: str = PENDING
+    duration_ms: Optional[float] = None
+    error: Optional[str] = None
+
+
+class StartupReadiness:
+    def __init__(self) -> None:
+        self._started = time.monotonic()
+        self._components: dict[str, _Component] = {}
+        self._callbacks: dict[str, list[Callable[[bool], None]]] = {}
+        self._lock = threading.Lock()
+        self._all_done = threading.Event()
+        self._all_done.set()
+
+    def record(self, name: str, fn: Callable[[], bool]) -> bool:
+        """在当前线程执行并记录耗时。"""
+        with self._lock:
+            self._components[name] = _Component()
+            self._all_done.clear()
+        return self._run(name, fn)
+
+    def submit(self, name: str, fn: Callable[[], bool]) -> None:
+        """在后台守护线程执行（不阻塞启动）。"""
+        with self._lock:
+            self._components[name] = _Component()
+            self._all_done.clear()
+        threading.Thread(target=self._run, args=(name, fn), name=f"boot-{name}", daemon=True).start()
+
+    def when_done(self, name: str, callback: Callable[[bool], None]) -> None:
+        """组件完成后回调 `callback(ok)`；已完成则立即在当前线程回调。"""
+        with self._lock:
+            comp = self._components.get(name)
+            if comp is not None and comp.state == PENDING:
+                self._callbacks.setdefault(name, []).append(callback)
+                return
+            ok = comp is not None and comp.state == READY
+        callback(ok)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._all_done.wait(timeout)
+
+    def is_done(self, name: str) -> bool:
+        with self._lock:
+            comp = self._components.get(name)
+            return comp is not None and comp.state != PENDING
+
+    @property
+    def ready(self) -> bool:
+        return self._all_done.is_set()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            components = {
+                name: {"state": c.state, "duration_ms": c.duration_ms, **({"error": c.error} if c.error else {})}
+                for name, c in self._components.items()
+            }
+        return {
+            "ready": self.ready,
+            "degraded": sorted(n for n, c in components.items() if c["state"] == FAILED),
+            "components": components,
+        }
+
+    def _run(self, name: str, fn: Callable[[], bool]) -> bool:
+        started = time.monotonic()
+        error: Optional[str] = None
+        try:
+            ok = bool(fn())
+        except Exception as e:  # noqa: BLE001
+            logger.error("startup %s: %s", name, e, exc_info=True)
+            ok, error = False, str(e)
+        with self._lock:
+            comp = self._components[name]
+            comp.state = READY if ok else FAILED
+            comp.duration_ms = round((time.monotonic() - started) * 1000, 1)
+            comp.error = error
+            callbacks = self._callbacks.pop(name, [])
+            finished = all(c.state != PENDING for c in self._components.values())
+        for cb in callbacks:
+            try:
+                cb(ok)
+            except Exception as e:  # noqa: BLE001
+                logger.error("startup %s callback: %s", name, e, exc_info=True)
+        if finished and not self._all_done.is_set():
+            self._all_done.set()
+            logger.info(
+                json.dumps(
+                    {
+                        "task": "startup",
+                        "event": "dependencies_ready",
+                        "since_boot_ms": round((time.monotonic() - self._started) * 1000, 1),
+                        **self.snapshot(),
+                    },
+                    ensure_ascii=False,
+                )
+            )
+        return ok
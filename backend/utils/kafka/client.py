@@ -1,7 +1,6 @@
 """Kafka 生产者 + Admin（与原先 backend_old 行为一致，自旧树手写迁入）。"""
 from __future__ import annotations
 
-import json
 import logging
 from datetime import datetime
 from typing import Any, Optional
@@ -10,35 +9,55 @@ from kafka import KafkaProducer
 from kafka.admin import KafkaAdminClient, NewTopic
 from kafka.errors import KafkaError, TopicAlreadyExistsError
 
+from .codec import CODEC_HEADER_KEY, CODEC_JSON, SUPPORTED_CODECS, encode_event
+
 logger = logging.getLogger(__name__)
 
 
 class KafkaClient:
     EVENT_TYPE_HEADER_KEY = "event_type"
 
-    def __init__(self, bootstrap_servers: str, enable_kafka: bool = False) -> None:
+    def __init__(
+        self,
+        bootstrap_servers: str,
+        enable_kafka: bool = False,
+        codec: str = CODEC_JSON,
+        connect: bool = True,
+    ) -> None:
+        """`connect=False` 时由调用方稍后（可在后台线程）调用 `connect()`；连上之前 `enable_kafka` 为 False。"""
         self.bootstrap_servers = bootstrap_servers
-        self.enable_kafka = enable_kafka
+        self.enable_kafka = False
+        self._wanted = enable_kafka
+        if codec not in SUPPORTED_CODECS:
+            logger.warning("未知 Kafka codec=%s，回退 %s", codec, CODEC_JSON)
+            codec = CODEC_JSON
+        self.codec = codec
         self.producer = None
         self.admin_client = None
-        if self.enable_kafka:
+        if connect:
+            self.connect()
+
+    def connect(self) -> bool:
+        if self._wanted:
             logging.getLogger("kafka").setLevel(logging.WARNING)
             try:
                 self.admin_client = KafkaAdminClient(
-                    bootstrap_servers=bootstrap_servers,
+                    bootstrap_servers=self.bootstrap_servers,
                     client_id="nfx-vault-admin",
                     request_timeout_ms=10000,
                 )
                 self.producer = KafkaProducer(
-                    bootstrap_servers=bootstrap_servers,
-                    value_serializer=lambda v: json.dumps(v, ensure_ascii=False).encode("utf-8"),
+                    bootstrap_servers=self.bootstrap_servers,
+                    value_serializer=lambda v: encode_event(v, self.codec),
                     key_serializer=lambda k: k.encode("utf-8") if k and isinstance(k, str) else k,
                     request_timeout_ms=30000,
                     retries=3,
                 )
+                self.enable_kafka = True
             except Exception as e:  # noqa: BLE001
                 logger.error("Kafka 初始化失败: %s", e)
                 self.enable_kafka = False
+        return self.enable_kafka
 
     def ensure_topic_exists(
         self,
@@ -85,9 +104,10 @@ class KafkaClient:
         if ensure_topic:
             self.ensure_topic_exists(topic)
         try:
-            if "_timestamp" not in data:
+            # 紧凑编码下依赖 Kafka record 自带时间戳，不再重复写 `_timestamp`
+            if self.codec == CODEC_JSON and "_timestamp" not in data:
                 data["_timestamp"] = datetime.now().isoformat()
-            kafka_headers = []
+            kafka_headers = [(CODEC_HEADER_KEY, self.codec.encode("utf-8"))]
             if headers:
                 for k, v in headers.items():
                     kafka_headers.append((str(k), v.encode("utf-8") if isinstance(v, str) else v))
@@ -95,7 +115,7 @@ class KafkaClient:
                 topic=topic,
                 key=key if not isinstance(key, bytes) else key.decode(),
                 value=data,
-                headers=kafka_headers or None,
+                headers=kafka_headers,
             )
             future.get(timeout=10)
             et = "-"
@@ -0,0 +1,137 @@
+"""幂等事件合并：同一 (event_type, key) 在窗口内/执行中只保留最后一条，窗口到期后补跑一次（trailing）。"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+CoalesceKeyFn = Callable[[dict[str, Any]], str]
+DropFn = Callable[[str, dict[str, Any]], None]
+
+
+@dataclass
+class _Slot:
+    running: bool = False
+    last_done: float = 0.0
+    pending: Optional[dict[str, Any]] = None
+    merged: int = 0
+
+
+@dataclass
+class CoalescerStats:
+    coalesced_total: int = 0
+    executed_total: int = 0
+    by_event_type: dict[str, int] = field(default_factory=dict)
+
+
+class EventCoalescer:
+    """线程安全；只对 `register` 过的 event_type 生效，其余事件 `offer` 恒返回 True。
+
+    - `offer` 返回 True：调用方立即执行，执行完必须调用 `done`；
+    - 返回 False：事件已被吸收为 pending，稍后由 `due` 取出补跑。
+    """
+
+    def __init__(self, window_ms: int = 200, on_drop: Optional[DropFn] = None) -> None:
+        self.window_s = max(0, window_ms) / 1000.0
+        # 被后到事件替换掉的 pending 回调（如本地总线删除其 journal 行）
+        self.on_drop = on_drop
+        self._keys: dict[str, CoalesceKeyFn] = {}
+        self._slots: dict[tuple[str, str], _Slot] = {}
+        self._lock = threading.Lock()
+        self.stats = CoalescerStats()
+
+    def register(self, event_type: str, key_fn: Optional[CoalesceKeyFn] = None) -> None:
+        self._keys[event_type] = key_fn or (lambda _data: "")
+
+    def is_coalesced(self, event_type: str) -> bool:
+        return event_type in self._keys
+
+    def _slot_key(self, event_type: str, data: dict[str, Any]) -> tuple[str, str]:
+        try:
+            key = str(self._keys[event_type](data))
+        except Exception:  # noqa: BLE001
+            key = ""
+        return event_type, key
+
+    def offer(self, event_type: str, data: dict[str, Any]) -> bool:
+        if event_type not in self._keys:
+            return True
+        sk = self._slot_key(event_type, data)
+        now = time.monotonic()
+        dropped: Optional[dict[str, Any]] = None
+        with self._lock:
+            slot = self._slots.setdefault(sk, _Slot())
+            if slot.running or slot.pending is not None or now - slot.last_done < self.window_s:
+                if slot.pending is not None:
+                    dropped = slot.pending
+                    slot.merged += 1
+                    self._count_coalesced(event_type)
+                slot.pending = data
+            else:
+                slot.running = True
+                self.stats.executed_total += 1
+                return True
+        if dropped is not None and self.on_drop:
+            try:
+                self.on_drop(event_type, dropped)
+            except Exception:  # noqa: BLE001
+                pass
+        return False
+
+    def done(self, event_type: str, data: dict[str, Any]) -> None:
+        if event_type not in self._keys:
+            return
+        sk = self._slot_key(event_type, data)
+        with self._lock:
+            slot = self._slots.get(sk)
+            if slot:
+                slot.running = False
+                slot.last_done = time.monotonic()
+
+    def due(self) -> list[tuple[str, dict[str, Any], int]]:
+        """取出窗口已过、且当前未在执行的 pending：(event_type, data, 被合并条数)；取出即视为开始执行。"""
+        now = time.monotonic()
+        out: list[tuple[str, dict[str, Any], int]] = []
+        with self._lock:
+            for (event_type, _key), slot in self._slots.items():
+                if slot.pending is None or slot.running:
+                    continue
+                if now - slot.last_done < self.window_s:
+                    continue
+                out.append((event_type, slot.pending, slot.merged))
+                slot.pending = None
+                slot.merged = 0
+                slot.running = True
+                self.stats.executed_total += 1
+        return out
+
+    def drain(self) -> list[tuple[str, dict[str, Any], int]]:
+        """停机时取出全部 pending（不等窗口到期），语义同 `due`。"""
+        out: list[tuple[str, dict[str, Any], int]] = []
+        with self._lock:
+            for (event_type, _key), slot in self._slots.items():
+                if slot.pending is None or slot.running:
+                    continue
+                out.append((event_type, slot.pending, slot.merged))
+                slot.pending = None
+                slot.merged = 0
+                slot.running = True
+                self.stats.executed_total += 1
+        return out
+
+    def next_due_in(self) -> Optional[float]:
+        """最近一条 pending 还需等待的秒数；无 pending 时为 None（供 poll 超时收紧）。"""
+        now = time.monotonic()
+        best: Optional[float] = None
+        with self._lock:
+            for slot in self._slots.values():
+                if slot.pending is None or slot.running:
+                    continue
+                wait = max(0.0, slot.last_done + self.window_s - now)
+                best = wait if best is None else min(best, wait)
+        return best
+
+    def _count_coalesced(self, event_type: str) -> None:
+        self.stats.coalesced_total += 1
+        self.stats.by_event_type[event_type] = self.stats.by_event_type.get(event_type, 0) + 1
@@ -0,0 +1,76 @@
+"""Kafka 事件 value 编解码：header `codec` 选择格式，缺省视为旧 JSON 消息。
+
+- `json`：`json.dumps(..., ensure_ascii=False)`（历史格式）；
+- `msgpack.v1`：msgpack，`timestamp` / `_timestamp` 的 ISO 字符串压缩为 epoch 微秒整数，
+  解码时还原为 UTC ISO 字符串（带 `+00:00`；无时区的输入按本地时间换算）。
+
+生产端默认仍写 `json`：滚动升级期间未升级的消费者无法解码 msgpack，全部消费者都能识别 `codec` header 后再切换。
+"""
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+import msgpack
+
+CODEC_HEADER_KEY = "codec"
+CODEC_JSON = "json"
+CODEC_MSGPACK_V1 = "msgpack.v1"
+SUPPORTED_CODECS = (CODEC_JSON, CODEC_MSGPACK_V1)
+
+_TIMESTAMP_FIELDS = ("timestamp", "_timestamp")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class UnsupportedCodecError(ValueError):
+    pass
+
+
+def _iso_to_micros(value: Any) -> Any:
+    if not isinstance(value, str):
+        return value
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        return value
+    if dt.tzinfo is None:
+        dt = dt.astimezone()
+    return (dt - _EPOCH) // _MICROSECOND
+
+
+def _micros_to_iso(value: Any) -> Any:
+    if not isinstance(value, int) or isinstance(value, bool):
+        return value
+    return (_EPOCH + value * _MICROSECOND).isoformat()
+
+
+def encode_event(data: dict[str, Any], codec: str = CODEC_JSON) -> bytes:
+    if codec == CODEC_JSON:
+        return json.dumps(data, ensure_ascii=False).encode("utf-8")
+    if codec == CODEC_MSGPACK_V1:
+        packed = dict(data)
+        for f in _TIMESTAMP_FIELDS:
+            if f in packed:
+                packed[f] = _iso_to_micros(packed[f])
+        return msgpack.packb(packed, use_bin_type=True, default=str)
+    raise UnsupportedCodecError(codec)
+
+
+def decode_event(raw: Optional[bytes], codec: Optional[str] = None) -> dict[str, Any]:
+    """`codec` 为 header 原值；None/空 → JSON（兼容加 header 之前写入 topic 的消息）。"""
+    if not raw:
+        return {}
+    codec = codec or CODEC_JSON
+    if codec == CODEC_JSON:
+        data = json.loads(raw.decode("utf-8"))
+    elif codec == CODEC_MSGPACK_V1:
+        data = msgpack.unpackb(raw, raw=False)
+        if isinstance(data, dict):
+            for f in _TIMESTAMP_FIELDS:
+                if f in data:
+                    data[f] = _micros_to_iso(data[f])
+    else:
+        raise UnsupportedCodecError(codec)
+    return data if isinstance(data, dict) else {}
@@ -1,15 +1,21 @@
 """Kafka 事件消费者（由原 backend resources.kafka.consumer 迁入）。"""
 from __future__ import annotations
 
-import json
+import asyncio
+import inspect
 import logging
 import threading
-from typing import Any, Callable, Optional
+from typing import Any, Awaitable, Callable, Optional, Union
 
 from kafka import KafkaConsumer
 
+from .coalescer import CoalesceKeyFn, EventCoalescer
+from .codec import CODEC_HEADER_KEY, decode_event
+
 logger = logging.getLogger(__name__)
 
+EventHandler = Callable[[dict[str, Any]], Union[None, Awaitable[None]]]
+
 
 class KafkaEventConsumer:
     EVENT_TYPE_HEADER_KEY = "event_type"
@@ -20,6 +26,7 @@ class KafkaEventConsumer:
         topic: str = "events",
         group_id: str = "nfx-vault",
         enable_auto_commit: bool = True,
+        coalesce_window_ms: int = 200,
     ) -> None:
         self.bootstrap_servers = bootstrap_servers
         self.topic = topic
@@ -27,20 +34,30 @@ class KafkaEventConsumer:
         self.enable_auto_commit = enable_auto_commit
         self.consumer: Optional[KafkaConsumer] = None
         self.running = False
-        self.handlers: dict[str, Callable[[dict[str, Any]], None]] = {}
+        self.handlers: dict[str, EventHandler] = {}
+        # Consumer 线程独占的长生命周期事件环：async handler 直接在其上运行，不再每条消息取/建 loop
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        # consume_loop 运行中时由消费线程在退出前补跑合并事件并关闭 consumer（offset 已自动提交，不能丢）
+        self._consuming = False
+        self._close_lock = threading.Lock()
+        self.coalescer = EventCoalescer(window_ms=coalesce_window_ms)
         for name in ("kafka", "kafka.conn", "kafka.coordinator", "kafka.consumer", "kafka.cluster"):
             logging.getLogger(name).setLevel(logging.WARNING)
 
-    def register_handler(self, event_type: str, handler: Callable[[dict[str, Any]], None]) -> None:
+    def register_handler(self, event_type: str, handler: EventHandler) -> None:
         self.handlers[event_type] = handler
 
+    def register_coalescing(self, event_type: str, key_fn: Optional[CoalesceKeyFn] = None) -> None:
+        """声明 event_type 为幂等事件：窗口内/执行中的重复事件按 key 合并为一次。"""
+        self.coalescer.register(event_type, key_fn)
+
     def start(self) -> bool:
         try:
             self.consumer = KafkaConsumer(
                 self.topic,
                 bootstrap_servers=self.bootstrap_servers,
                 group_id=self.group_id,
-                value_deserializer=lambda m: json.loads(m.decode("utf-8")),
+                # 不在拉取时反序列化：value 保持 bytes，路由命中后再按 `codec` header 解码
                 enable_auto_commit=self.enable_auto_commit,
                 auto_offset_reset="latest",
                 consumer_timeout_ms=1000,
@@ -56,56 +73,150 @@ class KafkaEventConsumer:
         if not self.consumer:
             logger.error("消费者未初始化")
             return
+        with self._close_lock:
+            if not self.running:
+                return
+            self._consuming = True
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self._poll_forever()
+        finally:
+            try:
+                self._flush_coalesced(drain=True)
+            finally:
+                self._close_loop()
+                self._close_consumer()
+
+    def _poll_forever(self) -> None:
+        assert self.consumer
         while self.running:
             try:
-                message_pack = self.consumer.poll(timeout_ms=1000)
-                if not message_pack:
-                    continue
-                for _tp, messages in message_pack.items():
+                message_pack = self.consumer.poll(timeout_ms=self._poll_timeout_ms())
+                for _tp, messages in (message_pack or {}).items():
                     for message in messages:
                         try:
                             self._handle_message(message)
                         except Exception as e:  # noqa: BLE001
                             logger.error("处理消息失败: %s", e, exc_info=True)
+                self._flush_coalesced()
             except Exception as e:  # noqa: BLE001
                 if self.running:
                     logger.error("消费出错: %s", e, exc_info=True)
                 break
 
+    @staticmethod
+    def _headers(message: Any) -> dict[str, str]:
+        out: dict[str, str] = {}
+        for header_key, header_value in message.headers or ():
+            try:
+                key_str = header_key.decode("utf-8") if isinstance(header_key, bytes) else header_key
+                out[key_str] = (
+                    header_value.decode("utf-8") if isinstance(header_value, bytes) else header_value
+                )
+            except (UnicodeDecodeError, AttributeError):
+                continue
+        return out
+
     def _handle_message(self, message: Any) -> None:
-        event_type: str | None = None
-        if message.headers:
-            for header_key, header_value in message.headers:
-                try:
-                    key_str = header_key.decode("utf-8") if isinstance(header_key, bytes) else header_key
-                    if key_str == self.EVENT_TYPE_HEADER_KEY:
-                        event_type = (
-                            header_value.decode("utf-8")
-                            if isinstance(header_value, bytes)
-                            else header_value
-                        )
-                        break
-                except (UnicodeDecodeError, AttributeError):
-                    continue
+        headers = self._headers(message)
+        event_type = headers.get(self.EVENT_TYPE_HEADER_KEY)
         if not event_type:
             logger.warning("消息缺少 event_type header offset=%s", getattr(message, "offset", ""))
             return
-        event_data = message.value if message.value else {}
         handler = self.handlers.get(event_type)
-        if handler:
-            try:
-                handler(event_data)
-                logger.info("Kafka 已消费 event_type=%s offset=%s", event_type, getattr(message, "offset", ""))
-            except Exception as e:  # noqa: BLE001
-                logger.error("事件处理失败: %s %s", event_type, e, exc_info=True)
-        else:
+        if not handler:
             logger.warning("未注册的事件类型: %s", event_type)
+            return
+        try:
+            event_data = decode_event(message.value, headers.get(CODEC_HEADER_KEY))
+        except Exception as e:  # noqa: BLE001
+            logger.error(
+                "事件解码失败 event_type=%s codec=%s offset=%s: %s",
+                event_type,
+                headers.get(CODEC_HEADER_KEY) or "json",
+                getattr(message, "offset", ""),
+                e,
+            )
+            return
+        if not self.coalescer.offer(event_type, event_data):
+            logger.debug("Kafka 事件已合并 event_type=%s offset=%s", event_type, getattr(message, "offset", ""))
+            return
+        self._dispatch(event_type, handler, event_data)
+        logger.info("Kafka 已消费 event_type=%s offset=%s", event_type, getattr(message, "offset", ""))
+
+    def _dispatch(
+        self,
+        event_type: str,
+        handler: EventHandler,
+        event_data: dict[str, Any],
+    ) -> None:
+        try:
+            result = handler(event_data)
+            if inspect.isawaitable(result):
+                if self.loop is None or self.loop.is_closed():
+                    raise RuntimeError("consumer event loop not running")
+                self.loop.run_until_complete(result)
+        except Exception as e:  # noqa: BLE001
+            logger.error("事件处理失败: %s %s", event_type, e, exc_info=True)
+        finally:
+            self.coalescer.done(event_type, event_data)
+
+    def _flush_coalesced(self, drain: bool = False) -> None:
+        batch = self.coalescer.drain() if drain else self.coalescer.due()
+        for event_type, event_data, merged in batch:
+            handler = self.handlers.get(event_type)
+            if not handler:
+                self.coalescer.done(event_type, event_data)
+                continue
+            self._dispatch(event_type, handler, event_data)
+            logger.info(
+                "Kafka 合并事件已执行 event_type=%s coalesced=%s coalesced_total=%s",
+                event_type,
+                merged,
+                self.coalescer.stats.coalesced_total,
+            )
+
+    def _poll_timeout_ms(self) -> int:
+        wait = self.coalescer.next_due_in()
+        if wait is None:
+            return 1000
+        return max(10, min(1000, int(wait * 1000)))
+
+    def _close_loop(self) -> None:
+        loop = self.loop
+        if loop is None:
+            return
+        try:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.run_until_complete(loop.shutdown_default_executor())
+        except Exception as e:  # noqa: BLE001
+            logger.error("关闭 consumer 事件环: %s", e)
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+            self.loop = None
 
     def stop(self) -> None:
         self.running = False
-        if self.consumer:
+        stats = self.coalescer.stats
+        if stats.coalesced_total:
+            logger.info(
+                "Kafka 事件合并统计: coalesced_total=%s executed_total=%s by_event_type=%s",
+                stats.coalesced_total,
+                stats.executed_total,
+                stats.by_event_type,
+            )
+        with self._close_lock:
+            consuming = self._consuming
+        if not consuming:
+            self._close_consumer()
+
+    def _close_consumer(self) -> None:
+        consumer, self.consumer = self.consumer, None
+        if consumer:
             try:
-                self.consumer.close()
+                consumer.close()
             except Exception as e:  # noqa: BLE001
                 logger.error("关闭 consumer: %s", e)
 
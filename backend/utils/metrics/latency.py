@@ -0,0 +1,43 @@
+# coding=utf-8
+"""滑动窗口延迟统计：最近 N 次观测的分位数 + 累计计数（线程安全，无外部依赖）。"""
+from __future__ import annotations
+
+import threading
+from collections import deque
+from typing import Any
+
+
+class LatencyWindow:
+    def __init__(self, size: int = 1024) -> None:
+        self._samples: deque[float] = deque(maxlen=max(1, size))
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+            self.total_s += seconds
+            if seconds > self.max_s:
+                self.max_s = seconds
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            samples = sorted(self._samples)
+            count, total, peak = self.count, self.total_s, self.max_s
+
+        def pct(p: float) -> float:
+            if not samples:
+                return 0.0
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 1)
+
+        return {
+            "count": count,
+            "mean_ms": round(total / count * 1000, 1) if count else 0.0,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+            "max_ms": round(peak * 1000, 1),
+        }
@@ -0,0 +1,192 @@
+# coding=utf-8
+"""启动时的内置 schema 迁移：按文件名顺序执行 `sql/migrations/*.sql`，已执行的版本记录在 `schema_migrations`。
+
+- 首次运行（库里还没有 `schema_migrations`）时先 `metadata.create_all` 补齐缺失的表，
+  之后每次启动先比对版本戳（`schema_migrations` 的行数 + 最大版本 vs 迁移文件名），一致即跳过，
+  不建临时连接、不加锁、不 create_all；
+- 迁移文件此前是手工执行的，老库里可能已经有对应的列 / 索引：
+  「已存在 / 不存在」类错误（1050 / 1060 / 1061 / 1091）视为该语句已生效，继续执行；
+- 多实例同时启动时用 MySQL `GET_LOCK` 串行化，只有一个实例真正执行迁移。
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_TABLE = "schema_migrations"
+_LOCK_NAME = "nfxvault_schema_migrations"
+_LOCK_TIMEOUT_S = 60
+# ER_TABLE_EXISTS_ERROR / ER_DUP_FIELDNAME / ER_DUP_KEYNAME / ER_CANT_DROP_FIELD_OR_KEY
+_ALREADY_APPLIED_ERRORS = frozenset({1050, 1060, 1061, 1091})
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: str
+    path: str
+    checksum: str
+    statements: tuple[str, ...]
+
+
+def _split_statements(sql: str) -> list[str]:
+    """去掉整行 `--` 注释后按行尾 `;` 切分（迁移文件不含存储过程 / 字符串内分号）。"""
+    lines = [ln for ln in sql.splitlines() if not ln.lstrip().startswith("--")]
+    out: list[str] = []
+    buf: list[str] = []
+    for ln in lines:
+        buf.append(ln)
+        if ln.rstrip().endswith(";"):
+            stmt = "\n".join(buf).strip().rstrip(";").strip()
+            if stmt:
+                out.append(stmt)
+            buf = []
+    tail = "\n".join(buf).strip()
+    if tail:
+        out.append(tail)
+    return out
+
+
+def _migration_files(directory: str) -> list[str]:
+    try:
+        return sorted(n for n in os.listdir(directory) if n.endswith(".sql"))
+    except FileNotFoundError:
+        return []
+
+
+def load_migrations(directory: str) -> list[Migration]:
+    out: list[Migration] = []
+    for name in _migration_files(directory):
+        path = os.path.join(directory, name)
+        with open(path, encoding="utf-8") as f:
+            sql = f.read()
+        out.append(
+            Migration(
+                version=name[: -len(".sql")],
+                path=path,
+                checksum=hashlib.sha256(sql.encode("utf-8")).hexdigest(),
+                statements=tuple(_split_statements(sql)),
+            )
+        )
+    return out
+
+
+def _mysql_errno(e: DBAPIError) -> Optional[int]:
+    args = getattr(e.orig, "args", ())
+    return args[0] if args and isinstance(args[0], int) else None
+
+
+class SchemaMigrator:
+    def __init__(self, engine: Engine, metadata: Any, directory: str) -> None:
+        self.engine = engine
+        self.metadata = metadata
+        self.directory = directory
+
+    def is_current(self) -> bool:
+        """版本戳校验（只列目录、一条查询）；库或 `schema_migrations` 不存在时抛出。"""
+        versions = [n[: -len(".sql")] for n in _migration_files(self.directory)]
+        with self.engine.connect() as conn:
+            count, head = conn.execute(text(f"SELECT COUNT(*), MAX(version) FROM {MIGRATIONS_TABLE}")).one()
+        return count == len(versions) and head == (versions[-1] if versions else None)
+
+    def migrate(self) -> dict[str, Any]:
+        started = time.monotonic()
+        migrations = load_migrations(self.directory)
+        with self.engine.connect() as conn:
+            locked = self._acquire_lock(conn)
+            try:
+                bootstrapped = self._ensure_table(conn)
+                applied = self._applied(conn)
+                for m in migrations:
+                    if m.version in applied and applied[m.version] != m.checksum:
+                        logger.warning("migration %s changed after it was applied", m.version)
+                pending = [m for m in migrations if m.version not in applied]
+                for m in pending:
+                    self._apply(conn, m)
+            finally:
+                if locked:
+                    conn.execute(text("SELECT RELEASE_LOCK(:n)"), {"n": _LOCK_NAME})
+                    conn.commit()
+        summary = {
+            "success": True,
+            "message": f"Applied {len(pending)} migrations",
+            "bootstrapped": bootstrapped,
+            "applied": [m.version for m in pending],
+            "head": migrations[-1].version if migrations else None,
+            "duration_s": round(time.monotonic() - started, 3),
+        }
+        logger.info(json.dumps({"task": "schema_migrate", "event": "finished", **summary}, ensure_ascii=False))
+        return summary
+
+    def _acquire_lock(self, conn: Connection) -> bool:
+        if conn.dialect.name != "mysql":
+            return False
+        got = conn.execute(
+            text("SELECT GET_LOCK(:n, :t)"), {"n": _LOCK_NAME, "t": _LOCK_TIMEOUT_S}
+        ).scalar()
+        conn.commit()
+        if got != 1:
+            raise RuntimeError(f"timed out waiting for {_LOCK_NAME}")
+        return True
+
+    def _ensure_table(self, conn: Connection) -> bool:
+        """没有 `schema_migrations` 时先 create_all 补齐模型表，再建记录表；返回是否为首次引导。"""
+        if inspect(conn).has_table(MIGRATIONS_TABLE):
+            return False
+        self.metadata.create_all(bind=conn)
+        conn.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} ("
+                "version VARCHAR(255) NOT NULL PRIMARY KEY, "
+                "checksum CHAR(64) NOT NULL, "
+                "applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+            )
+        )
+        conn.commit()
+        return True
+
+    def _applied(self, conn: Connection) -> dict[str, str]:
+        rows = conn.execute(text(f"SELECT version, checksum FROM {MIGRATIONS_TABLE}")).all()
+        return {r[0]: r[1] for r in rows}
+
+    def _apply(self, conn: Connection, m: Migration) -> None:
+        started = time.monotonic()
+        skipped = 0
+        for stmt in m.statements:
+            try:
+                conn.execute(text(stmt))
+                conn.commit()
+            except DBAPIError as e:
+                conn.rollback()
+                if _mysql_errno(e) not in _ALREADY_APPLIED_ERRORS:
+                    raise
+                skipped += 1
+                logger.info("migration %s: already applied, skipping statement: %s", m.version, e.orig)
+        conn.execute(
+            text(f"INSERT INTO {MIGRATIONS_TABLE} (version, checksum) VALUES (:v, :c)"),
+            {"v": m.version, "c": m.checksum},
+        )
+        conn.commit()
+        logger.info(
+            json.dumps(
+                {
+                    "task": "schema_migrate",
+                    "event": "applied",
+                    "version": m.version,
+                    "statements": len(m.statements),
+                    "skipped_existing": skipped,
+                    "duration_ms": round((time.monotonic() - started) * 1000, 1),
+                },
+                ensure_ascii=False,
+            )
+        )
@@ -5,6 +5,8 @@ from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import QueuePool
 
+from utils.mysql.migrations import SchemaMigrator
+
 logger = logging.getLogger(__name__)
 
 
@@ -71,15 +73,28 @@ class MySQLSession:
         except Exception as e:  # noqa: BLE001
             logger.error("创建数据库失败: %s", e)
 
-    def create_tables(self, base) -> None:
+    def migrate(self, base, migrations_dir: str) -> dict:
+        """执行 `migrations_dir` 下未执行过的迁移（首次运行时先 create_all），取代每次启动的 create_all。
+
+        版本戳一致时直接返回；只有库或 `schema_migrations` 不存在时才执行 CREATE DATABASE。
+        """
         if not self.enable_mysql or not self.engine:
-            return
+            return {"success": False, "message": "MySQL disabled"}
+        migrator = SchemaMigrator(self.engine, base.metadata, migrations_dir)
         try:
+            if migrator.is_current():
+                logger.info("数据库表已就绪（schema 版本戳一致）")
+                return {"success": True, "message": "Schema up to date", "applied": [], "fast_path": True}
+        except Exception as e:  # noqa: BLE001
+            logger.info("schema 版本戳不可用，执行完整迁移: %s", e)
             self.create_database()
-            base.metadata.create_all(bind=self.engine)
+        try:
+            result = migrator.migrate()
             logger.info("数据库表已就绪")
+            return result
         except Exception as e:  # noqa: BLE001
-            logger.error("创建表失败: %s", e)
+            logger.error("数据库迁移失败: %s", e)
+            return {"success": False, "message": str(e)}
 
     @contextmanager
     def get_session(self):
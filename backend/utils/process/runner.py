@@ -0,0 +1,210 @@
+"""asyncio 子进程执行器：`create_subprocess_exec` + 逐行转发 stdout/stderr 到日志 + 超时/取消时 terminate→kill。
+
+进程内所有事件环（HTTP、签发队列、Kafka Consumer）共用一个并发上限，因此信号量基于线程锁实现，
+不绑定某个事件环。
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+_TERMINATE_GRACE_S = 5.0
+
+
+@dataclass
+class ProcessResult:
+    returncode: Optional[int]
+    stdout: str
+    stderr: str
+    timed_out: bool = False
+    duration_s: float = 0.0
+
+
+class _CrossLoopSemaphore:
+    """可被多个事件环 await 的计数信号量（FIFO 唤醒）。"""
+
+    def __init__(self, value: int) -> None:
+        self._value = max(1, value)
+        self._in_use = 0
+        self._lock = threading.Lock()
+        self._waiters: deque[tuple[asyncio.AbstractEventLoop, asyncio.Future[None]]] = deque()
+
+    def resize(self, value: int) -> None:
+        with self._lock:
+            self._value = max(1, value)
+        self._wake()
+
+    @property
+    def in_use(self) -> int:
+        return self._in_use
+
+    async def acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._in_use < self._value and not self._waiters:
+                self._in_use += 1
+                return
+            fut: asyncio.Future[None] = loop.create_future()
+            self._waiters.append((loop, fut))
+        try:
+            await fut
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove((loop, fut))
+                    granted = False
+                except ValueError:
+                    granted = True
+            if granted:
+                self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            self._in_use -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        with self._lock:
+            while self._waiters and self._in_use < self._value:
+                loop, fut = self._waiters.popleft()
+                try:
+                    loop.call_soon_threadsafe(_resolve, fut)
+                except RuntimeError:
+                    # 等待方的事件环已关闭
+                    continue
+                self._in_use += 1
+
+
+def _resolve(fut: asyncio.Future[None]) -> None:
+    if not fut.done():
+        fut.set_result(None)
+
+
+class AsyncProcessRunner:
+    def __init__(self, max_concurrency: int = 4) -> None:
+        self._sem = _CrossLoopSemaphore(max_concurrency)
+
+    def set_max_concurrency(self, value: int) -> None:
+        self._sem.resize(value)
+
+    @property
+    def running(self) -> int:
+        return self._sem.in_use
+
+    async def run(
+        self,
+        cmd: list[str],
+        *,
+        timeout: float,
+        input_text: Optional[str] = None,
+        log_name: Optional[str] = None,
+        stream_log: bool = False,
+        env: Optional[dict[str, str]] = None,
+    ) -> ProcessResult:
+        """`stream_log=True` 时每行以 `[log_name] stdout|stderr: ...` 实时写日志（适合 certbot 这类长任务）。
+
+        超时返回 `timed_out=True`；调用方被取消时同样终止子进程后再抛出 CancelledError。
+        """
+        name = log_name or os.path.basename(cmd[0])
+        await self._sem.acquire()
+        started = time.monotonic()
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.PIPE if input_text is not None else asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                env=env,
+            )
+            out_lines: list[str] = []
+            err_lines: list[str] = []
+            pumps = [
+                asyncio.create_task(_pump(proc.stdout, out_lines, name, "stdout", stream_log)),
+                asyncio.create_task(_pump(proc.stderr, err_lines, name, "stderr", stream_log)),
+            ]
+            # 无论正常结束、写 stdin 出错还是被取消，都保证子进程已退出、输出泵已结束后才释放并发名额
+            try:
+                if input_text is not None and proc.stdin is not None:
+                    try:
+                        proc.stdin.write(input_text.encode("utf-8"))
+                        await proc.stdin.drain()
+                    except (BrokenPipeError, ConnectionResetError):
+                        # 子进程未读完 stdin 就退出：以其退出码与输出为准
+                        pass
+                    finally:
+                        proc.stdin.close()
+                timed_out = False
+                try:
+                    await asyncio.wait_for(proc.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    timed_out = True
+                    await _terminate(proc, name)
+                await asyncio.gather(*pumps, return_exceptions=True)
+                return ProcessResult(
+                    returncode=proc.returncode,
+                    stdout="".join(out_lines),
+                    stderr="".join(err_lines),
+                    timed_out=timed_out,
+                    duration_s=time.monotonic() - started,
+                )
+            finally:
+                if proc.returncode is None:
+                    await _terminate(proc, name)
+                for p in pumps:
+                    p.cancel()
+                await asyncio.gather(*pumps, return_exceptions=True)
+        finally:
+            self._sem.release()
+
+
+async def _pump(
+    stream: Optional[asyncio.StreamReader],
+    sink: list[str],
+    name: str,
+    label: str,
+    stream_log: bool,
+) -> None:
+    if stream is None:
+        return
+    while True:
+        raw = await stream.readline()
+        if not raw:
+            return
+        line = raw.decode("utf-8", errors="replace")
+        sink.append(line)
+        if stream_log and line.strip():
+            logger.info("[%s] %s: %s", name, label, line.rstrip())
+
+
+async def _terminate(proc: asyncio.subprocess.Process, name: str) -> None:
+    if proc.returncode is not None:
+        return
+    try:
+        proc.terminate()
+        await asyncio.wait_for(proc.wait(), timeout=_TERMINATE_GRACE_S)
+    except ProcessLookupError:
+        return
+    except asyncio.TimeoutError:
+        logger.warning("%s 未响应 SIGTERM，发送 SIGKILL pid=%s", name, proc.pid)
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            return
+        await proc.wait()
+
+
+_default_runner = AsyncProcessRunner()
+
+
+def default_process_runner() -> AsyncProcessRunner:
+    """进程级共享执行器：certbot 与 openssl 共用同一并发上限。"""
+    return _default_runner
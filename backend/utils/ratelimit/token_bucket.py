@@ -0,0 +1,77 @@
+"""令牌桶（按 key 分桶）：用于按注册域名规划 Let's Encrypt 签发配额。"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class _Bucket:
+    tokens: float
+    updated: float
+    blocked_until: float = 0.0
+
+
+class KeyedTokenBucket:
+    """线程安全；`capacity` 个令牌，每 `period_s` 秒匀速补满。
+
+    - `try_take(key)`：有令牌则取走并返回 0，否则返回需等待的秒数（不取）；
+    - `refund(key)`：归还一个 `try_take` 预留但最终未消耗的令牌（不超过容量）；
+    - `charge(key, n)`：事后补扣 n 个令牌（可为负，之后的 `try_take` 相应等待更久）；
+    - `drain(key, until)`：服务端已报限流时清空该桶，并在 `until`（epoch 秒）前一律拒绝。
+    """
+
+    def __init__(self, capacity: int, period_s: float) -> None:
+        self.capacity = max(1, capacity)
+        self.rate = self.capacity / max(1.0, period_s)
+        self._buckets: dict[str, _Bucket] = {}
+        self._lock = threading.Lock()
+
+    def _refill(self, key: str, now: float) -> _Bucket:
+        b = self._buckets.get(key)
+        if b is None:
+            b = _Bucket(tokens=float(self.capacity), updated=now)
+            self._buckets[key] = b
+            return b
+        b.tokens = min(float(self.capacity), b.tokens + (now - b.updated) * self.rate)
+        b.updated = now
+        return b
+
+    def try_take(self, key: str, now: Optional[float] = None) -> float:
+        now = time.time() if now is None else now
+        with self._lock:
+            b = self._refill(key, now)
+            if now < b.blocked_until:
+                return b.blocked_until - now
+            if b.tokens >= 1.0:
+                b.tokens -= 1.0
+                return 0.0
+            return (1.0 - b.tokens) / self.rate
+
+    def refund(self, key: str, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        with self._lock:
+            b = self._refill(key, now)
+            b.tokens = min(float(self.capacity), b.tokens + 1.0)
+
+    def charge(self, key: str, n: float, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        with self._lock:
+            b = self._refill(key, now)
+            b.tokens -= n
+
+    def drain(self, key: str, until: Optional[float] = None, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        with self._lock:
+            b = self._refill(key, now)
+            b.tokens = 0.0
+            if until is not None:
+                b.blocked_until = max(b.blocked_until, until)
+
+    def snapshot(self, key: str) -> dict[str, float]:
+        now = time.time()
+        with self._lock:
+            b = self._refill(key, now)
+            return {"tokens": round(b.tokens, 3), "blocked_for_s": max(0.0, b.blocked_until - now)}
@@ -14,15 +14,21 @@ class RedisClient:
         db: int = 0,
         password: Optional[str] = None,
         enable_redis: bool = True,
+        connect: bool = True,
     ) -> None:
+        """`connect=False` 时只记录配置，由调用方稍后（可在后台线程）调用 `connect()`；连上之前按未启用处理。"""
         self.host = host
         self.port = port
         self.db = db
         self.password = password
-        self.enable_redis = enable_redis
+        self.enable_redis = False
         self.client: Optional[redis.Redis] = None
+        self._wanted = enable_redis
+        if connect:
+            self.connect()
 
-        if self.enable_redis:
+    def connect(self) -> bool:
+        if self._wanted:
             try:
                 kwargs = {
                     "host": self.host,
@@ -35,13 +41,16 @@ class RedisClient:
                 }
                 if self.password:
                     kwargs["password"] = self.password
-                self.client = redis.Redis(**kwargs)
-                self.client.ping()
+                client = redis.Redis(**kwargs)
+                client.ping()
+                self.client = client
+                self.enable_redis = True
                 logger.info("Redis 已连接 %s:%s/%s", self.host, self.port, self.db)
             except Exception as e:  # noqa: BLE001
                 logger.error("Redis 初始化失败: %s", e)
                 self.enable_redis = False
                 self.client = None
+        return self.enable_redis
 
     def get(self, key: str) -> Optional[str]:
         if not self.enable_redis or not self.client:
@@ -52,6 +61,20 @@ class RedisClient:
             logger.error("Redis GET 失败: %s", e)
             return None
 
+    def get_with_pttl(self, key: str) -> tuple[Optional[str], Optional[int]]:
+        """一次往返取值与剩余毫秒数（PTTL：-1 无过期，-2 不存在）。"""
+        if not self.enable_redis or not self.client:
+            return None, None
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.pttl(key)
+            value, pttl = pipe.execute()
+            return value, pttl
+        except Exception as e:  # noqa: BLE001
+            logger.error("Redis GET/PTTL 失败: %s", e)
+            return None, None
+
     def setex(self, key: str, time: int, value: str) -> None:
         if not self.enable_redis or not self.client:
             return
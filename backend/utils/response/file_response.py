@@ -0,0 +1,131 @@
+"""文件响应：单区间 HTTP Range（206 / 416，Starlette 0.38 的 FileResponse 尚不支持）+ 条件请求判定；
+ASGI 服务器声明 `http.response.zerocopysend` 扩展时走 sendfile 零拷贝，否则分块读取。
+"""
+from __future__ import annotations
+
+import os
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.types import Receive, Scope, Send
+
+_ZEROCOPY_EXT = "http.response.zerocopysend"
+
+
+def file_etag(st: os.stat_result) -> str:
+    """强 ETag：inode + mtime_ns + size，文件被原地改写或替换即变化。"""
+    return f'"{st.st_ino:x}-{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+
+def is_not_modified(headers: Headers, etag: str, mtime: float) -> bool:
+    """If-None-Match 优先；不存在时才看 If-Modified-Since（RFC 9110 §13.2.2）。"""
+    inm = headers.get("if-none-match")
+    if inm is not None:
+        tags = [t.strip() for t in inm.split(",")]
+        return "*" in tags or any(t.removeprefix("W/") == etag for t in tags)
+    ims = headers.get("if-modified-since")
+    if ims:
+        try:
+            since = parsedate_to_datetime(ims)
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= since.timestamp()
+    return False
+
+
+def _parse_range(value: str, size: int) -> Optional[tuple[int, int]]:
+    """`bytes=a-b` / `bytes=a-` / `bytes=-n` → 闭区间 (start, end)；多区间与非法语法返回 None（按整文件响应）。
+
+    起点超出文件长度时返回 (size, size)，由调用方回 416。
+    """
+    unit, _, spec = value.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if not first:
+            n = int(last)
+            if n <= 0:
+                return (size, size)
+            return (max(0, size - n), size - 1)
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start < 0:
+        return None
+    if start >= size:
+        return (size, size)
+    if end < start:
+        return None
+    return (start, min(end, size - 1))
+
+
+class ZeroCopyFileResponse(FileResponse):
+    """需传入 `stat_result`（调用方已 stat 过，省去一次系统调用）。"""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.stat_result is None or self.status_code != 200:
+            await super().__call__(scope, receive, send)
+            return
+        size = self.stat_result.st_size
+        self.headers["accept-ranges"] = "bytes"
+        start, end = 0, size - 1
+        req_headers = Headers(scope=scope)
+        rng = _parse_range(req_headers["range"], size) if "range" in req_headers and size > 0 else None
+        if rng is not None and not self._if_range_matches(req_headers):
+            rng = None
+        if rng is not None:
+            start, end = rng
+            if start >= size:
+                self.status_code = 416
+                self.headers["content-range"] = f"bytes */{size}"
+                self.headers["content-length"] = "0"
+                await send({"type": "http.response.start", "status": 416, "headers": self.raw_headers})
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+                return
+            self.status_code = 206
+            self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+            self.headers["content-length"] = str(end - start + 1)
+        count = max(0, end - start + 1)
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD" or count == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif _ZEROCOPY_EXT in (scope.get("extensions") or {}):
+            fd = os.open(self.path, os.O_RDONLY)
+            try:
+                await send(
+                    {"type": _ZEROCOPY_EXT, "file": fd, "offset": start, "count": count, "more_body": False}
+                )
+            finally:
+                os.close(fd)
+        else:
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                await file.seek(start)
+                remaining = count
+                while remaining > 0:
+                    chunk = await file.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+                if remaining > 0:
+                    # 文件在发送途中被截断
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+        if self.background is not None:
+            await self.background()
+
+    def _if_range_matches(self, req_headers: Headers) -> bool:
+        """If-Range 与当前 ETag / Last-Modified 不一致时忽略 Range，返回完整文件。"""
+        if_range = req_headers.get("if-range")
+        if if_range is None:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith('"') or if_range.startswith("W/"):
+            return if_range == self.headers.get("etag")
+        return if_range == self.headers.get("last-modified")
@@ -0,0 +1,106 @@
+# coding=utf-8
+"""流式 multipart 解析：逐块产出指定文件字段的数据，不经 Starlette `UploadFile` 的整体缓冲/落盘。
+
+调用方可在任意一块后停止迭代（超限 / 类型不符），剩余请求体不再读取。
+"""
+from __future__ import annotations
+
+from typing import AsyncIterator, Optional
+
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.datastructures import Headers
+
+# 产出事件：("start", 文件名) → ("data", 字节块)* → ("end", None)
+PART_START = "start"
+PART_DATA = "data"
+PART_END = "end"
+
+
+class MultipartStreamError(ValueError):
+    """请求不是合法的 multipart/form-data。"""
+
+
+async def iter_multipart_file(
+    headers: Headers,
+    stream: AsyncIterator[bytes],
+    field_name: str,
+) -> AsyncIterator[tuple[str, Optional[object]]]:
+    """只产出第一个名为 `field_name` 且带 filename 的文件字段；其余字段忽略。"""
+    content_type, params = parse_options_header(headers.get("content-type", ""))
+    if content_type != b"multipart/form-data":
+        raise MultipartStreamError("需要 multipart/form-data")
+    boundary = params.get(b"boundary")
+    if not boundary:
+        raise MultipartStreamError("缺少 multipart boundary")
+
+    events: list[tuple[str, Optional[object]]] = []
+    state = {"field": b"", "value": b"", "headers": {}, "match": False, "done": False}
+
+    def on_part_begin() -> None:
+        state["headers"] = {}
+        state["match"] = False
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        state["field"] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        state["value"] += data[start:end]
+
+    def on_header_end() -> None:
+        state["headers"][state["field"].lower()] = state["value"]
+        state["field"] = b""
+        state["value"] = b""
+
+    def on_headers_finished() -> None:
+        if state["done"]:
+            return
+        _disp, opts = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        name = opts.get(b"name", b"").decode("utf-8", "replace")
+        filename = opts.get(b"filename")
+        if name == field_name and filename is not None:
+            state["match"] = True
+            events.append((PART_START, filename.decode("utf-8", "replace")))
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        if state["match"]:
+            events.append((PART_DATA, data[start:end]))
+
+    def on_part_end() -> None:
+        if state["match"]:
+            state["match"] = False
+            state["done"] = True
+            events.append((PART_END, None))
+
+    parser = MultipartParser(
+        boundary,
+        {
+            "on_part_begin": on_part_begin,
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+            "on_part_data": on_part_data,
+            "on_part_end": on_part_end,
+        },
+    )
+    async for chunk in stream:
+        if not chunk:
+            continue
+        try:
+            parser.write(chunk)
+        except Exception as e:  # noqa: BLE001 — python-multipart 的解析异常类型随版本变化
+            raise MultipartStreamError(f"multipart 解析失败: {e}") from e
+        # 同一块内多个小片段合并后再交给调用方，减少一次次写盘
+        data = b"".join(v for k, v in events if k == PART_DATA)  # type: ignore[misc]
+        others = [(k, v) for k, v in events if k != PART_DATA]
+        events.clear()
+        for kind, value in others:
+            if kind == PART_START:
+                yield kind, value
+        if data:
+            yield PART_DATA, data
+        if any(k == PART_END for k, _ in others):
+            yield PART_END, None
+            return
+    if state["match"]:
+        raise MultipartStreamError("上传不完整")
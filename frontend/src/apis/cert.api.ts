@@ -8,6 +8,7 @@ import type {
   DeleteCertificateRequest,
   SearchCertificateRequest,
   CertificateResponse,
+  IssuanceJobResponse,
   SearchCertificateResponse,
   ParseCertificatePreviewRequest,
   ParseCertificatePreviewResponse,
@@ -16,7 +17,7 @@ import type {
 import { protectedClient } from "@/apis/clients";
 import { URL_PATHS } from "./ip";
 
-/** 与后端 Certbot 最长等待（如 300s）对齐，并留余量，避免 nginx/浏览器先断连 */
+/** 签发任务轮询上限：与后端 Certbot 最长等待（如 300s）对齐并留余量 */
 export const TLS_ISSUE_HTTP_TIMEOUT_MS = 420_000;
 
 export interface GetCertificateListParams {
@@ -42,18 +43,40 @@ export const GetCertificateDetailById = async (
   return data;
 };
 
-export const ApplyCertificate = async (request: ApplyCertificateRequest): Promise<CertificateResponse> => {
-  const { data } = await protectedClient.post<CertificateResponse>(URL_PATHS.TLS.apply, request, {
-    timeout: TLS_ISSUE_HTTP_TIMEOUT_MS,
-  });
+const ISSUANCE_JOB_POLL_INTERVAL_MS = 2_000;
+
+export const GetIssuanceJob = async (jobId: string): Promise<IssuanceJobResponse> => {
+  const { data } = await protectedClient.get<IssuanceJobResponse>(URL_PATHS.TLS.job(jobId));
   return data;
 };
 
+/** apply / reapply 只返回 jobId；轮询到任务结束后返回与原同步接口一致的结果 */
+const waitForIssuanceJob = async (queued: CertificateResponse): Promise<CertificateResponse> => {
+  if (!queued.success || !queued.jobId) return queued;
+  const deadline = Date.now() + TLS_ISSUE_HTTP_TIMEOUT_MS;
+  while (Date.now() < deadline) {
+    await new Promise((resolve) => setTimeout(resolve, ISSUANCE_JOB_POLL_INTERVAL_MS));
+    const job = await GetIssuanceJob(queued.jobId);
+    if (job.jobStatus === "succeeded" || job.jobStatus === "failed") {
+      const result = job.result ?? { success: job.jobStatus === "succeeded", message: "" };
+      return { ...result, jobId: job.jobId, jobStatus: job.jobStatus };
+    }
+    if (job.jobStatus === "deferred") {
+      // 令牌桶 / 错峰延后执行：不再阻塞界面，按已入队成功返回
+      return { ...queued, jobStatus: job.jobStatus };
+    }
+  }
+  return { ...queued, success: false, message: "issuance job timeout" };
+};
+
+export const ApplyCertificate = async (request: ApplyCertificateRequest): Promise<CertificateResponse> => {
+  const { data } = await protectedClient.post<CertificateResponse>(URL_PATHS.TLS.apply, request);
+  return waitForIssuanceJob(data);
+};
+
 export const ReapplyCertificate = async (request: ReapplyCertificateRequest): Promise<CertificateResponse> => {
-  const { data } = await protectedClient.post<CertificateResponse>(URL_PATHS.TLS.reapply, request, {
-    timeout: TLS_ISSUE_HTTP_TIMEOUT_MS,
-  });
-  return data;
+  const { data } = await protectedClient.post<CertificateResponse>(URL_PATHS.TLS.reapply, request);
+  return waitForIssuanceJob(data);
 };
 
 export const CreateCertificate = async (request: CreateCertificateRequest): Promise<CertificateResponse> => {
@@ -1,12 +1,17 @@
-import type { FileListResponse } from "@/types";
+import type { FileListResponse, ListDirectoryParams } from "@/types";
 import { safeOr } from "nfx-ui/utils";
 import { protectedClient } from "@/apis/clients";
 import { URL_PATHS } from "./ip";
 import AuthStore from "@/stores/authStore";
 
-export const ListDirectory = async (path?: string): Promise<FileListResponse> => {
+export const ListDirectory = async (
+  path?: string,
+  options: Omit<ListDirectoryParams, "path"> = {},
+): Promise<FileListResponse> => {
+  const params: ListDirectoryParams = { ...options };
+  if (path) params.path = path;
   const { data } = await protectedClient.get<FileListResponse>(URL_PATHS.FILE.list, {
-    params: path ? { path } : undefined,
+    params: Object.keys(params).length ? params : undefined,
   });
   return data;
 };
@@ -34,6 +39,36 @@ export const ExportSingleCertificate = async (params: ExportSingleCertificatePar
   return data;
 };
 
+export interface ExportCertificatesBatchParams {
+  certificateIds: string[];
+}
+
+export interface ExportCertificatesBatchResult {
+  certificateId: string;
+  success: boolean;
+  message: string;
+  domain?: string | null;
+  folderName?: string | null;
+}
+
+export interface ExportCertificatesBatchResponse {
+  success: boolean;
+  message: string;
+  store?: string;
+  total: number;
+  exported: number;
+  failed: number;
+  dbUpdated: number;
+  filesWritten: number;
+  filesUnchanged: number;
+  results: ExportCertificatesBatchResult[];
+}
+
+export const ExportCertificatesBatch = async (params: ExportCertificatesBatchParams): Promise<ExportCertificatesBatchResponse> => {
+  const { data } = await protectedClient.post<ExportCertificatesBatchResponse>(URL_PATHS.FILE.exportBatch, params);
+  return data;
+};
+
 export const downloadFile = async (filePath: string, folderName: string): Promise<void> => {
   const baseURL = safeOr(protectedClient.defaults.baseURL, window.location.origin);
   const downloadUrl = `${baseURL}${URL_PATHS.FILE.download}?path=${encodeURIComponent(filePath)}`;
@@ -60,8 +95,14 @@ export const downloadFile = async (filePath: string, folderName: string): Promis
 export interface FileContentResponse {
   success: boolean;
   message: string;
-  content?: string;
+  content?: string | null;
   filename?: string;
+  size?: number;
+  offset?: number;
+  nextOffset?: number;
+  truncated?: boolean;
+  binary?: boolean;
+  encoding?: string | null;
 }
 
 export const GetFileContent = async (filePath: string): Promise<FileContentResponse> => {
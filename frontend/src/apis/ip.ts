@@ -15,6 +15,7 @@ export const URL_PATHS = {
     detailById: (certificateId: string) => `/detail-by-id/${certificateId}`,
     apply: "/apply",
     reapply: "/reapply",
+    job: (jobId: string) => `/jobs/${jobId}`,
     create: "/create",
     updateManualAdd: "/update/manual-add",
     delete: "/delete",
@@ -27,6 +28,7 @@ export const URL_PATHS = {
     list: "/list",
     export: "/export",
     exportSingle: "/export-single",
+    exportBatch: "/export-batch",
     download: "/download",
     content: "/content",
     delete: "/delete",
@@ -25,7 +25,7 @@ const RightContainer = memo(() => {
   const [avatarBroken, setAvatarBroken] = useState(false);
   const languageValue = (i18n.language as LanguageEnum) || LanguageEnum.ZH;
 
-  const avatarSrc = avatarImageId ? vaultImageFileUrl(avatarImageId) : "";
+  const avatarSrc = avatarImageId ? vaultImageFileUrl(avatarImageId, 64) : "";
   const showAvatarImg = Boolean(avatarSrc) && !avatarBroken;
 
   useEffect(() => {
@@ -166,7 +166,7 @@ const AccountPage = memo(() => {
   }
 
   const savedAvatarSrc =
-    !clearAvatarOnSave && profile?.avatarImageId ? vaultImageFileUrl(profile.avatarImageId) : "";
+    !clearAvatarOnSave && profile?.avatarImageId ? vaultImageFileUrl(profile.avatarImageId, 256) : "";
   const resolvedAvatarSrc = localPreviewUrl || savedAvatarSrc;
   const showAvatarPreview = Boolean(resolvedAvatarSrc) && !avatarBroken;
   const initials = initialsFrom(name, email);
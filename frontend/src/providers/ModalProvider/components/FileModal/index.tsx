@@ -15,6 +15,7 @@ const FileModal = memo(() => {
   const hideModal = ModalStore.getState().hideModal;
 
   const [fileContent, setFileContent] = useState<string>("");
+  const [truncatedNote, setTruncatedNote] = useState<string | null>(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
 
@@ -31,6 +32,7 @@ const FileModal = memo(() => {
       dialog.close();
       // 重置状态
       setFileContent("");
+      setTruncatedNote(null);
       setError(null);
     }
   }, [isOpen, filePath]);
@@ -43,6 +45,11 @@ const FileModal = memo(() => {
       const result = await GetFileContent(filePath);
       if (result.success && result.content) {
         setFileContent(result.content);
+        setTruncatedNote(
+          result.truncated && result.size
+            ? `Showing first ${(result.nextOffset ?? 0).toLocaleString()} of ${result.size.toLocaleString()} bytes — download for the full file`
+            : null,
+        );
       } else {
         setError(result.message || "Failed to load file content");
       }
@@ -109,6 +116,7 @@ const FileModal = memo(() => {
                 >
                   Download
                 </Button>
+                {truncatedNote ? <span className={styles.truncatedNote}>{truncatedNote}</span> : null}
               </div>
               <pre className={styles.fileContent}>{fileContent}</pre>
             </div>
@@ -53,6 +53,24 @@ export interface CertificateResponse {
   certificateId?: string;
   rateLimit?: boolean;
   retryAfter?: string;
+  /** apply / reapply 入签发队列后返回，轮询 `/tls/jobs/{jobId}` 取最终结果 */
+  jobId?: string;
+  jobStatus?: IssuanceJobStatus;
+}
+
+export type IssuanceJobStatus = "queued" | "deferred" | "running" | "succeeded" | "failed";
+
+export interface IssuanceJobResponse {
+  jobId: string;
+  kind: "apply" | "reapply";
+  domain: string;
+  jobStatus: IssuanceJobStatus;
+  priority: number;
+  createdAt?: string;
+  notBefore?: string;
+  startedAt?: string;
+  finishedAt?: string;
+  result?: CertificateResponse;
 }
 
 export interface SearchCertificateResponse {
@@ -8,6 +8,8 @@ export interface FileItem {
   path: string;
   size?: number | null;
   modified: number;
+  /** 仅 `depth > 1` 时出现在目录项上 */
+  children?: FileItem[];
 }
 
 export interface FileListResponse {
@@ -16,4 +18,8 @@ export interface FileListResponse {
   store: string;
   path: string;
   items: FileItem[];
+  total?: number;
+  offset?: number;
+  limit?: number | null;
+  hasMore?: boolean;
 }
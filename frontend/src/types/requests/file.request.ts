@@ -4,4 +4,9 @@
 
 export interface ListDirectoryParams {
   path?: string;
+  offset?: number;
+  /** 1–1000，不传返回全部 */
+  limit?: number;
+  /** 1–3，>1 时子目录带 children */
+  depth?: number;
 }
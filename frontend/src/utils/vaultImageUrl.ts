@@ -1,10 +1,11 @@
 import { API_ENDPOINTS } from "@/apis/ip";
 import { safeStringable } from "nfx-ui/utils";
 
-/** 与后端 `GET /vault/images/{id}/file` 对齐（公开、无需 Bearer）。 */
-export function vaultImageFileUrl(imageId: string): string {
+/** 与后端 `GET /vault/images/{id}/file` 对齐（公开、无需 Bearer）；`size` 为期望像素边长，后端返回最近的缩略图。 */
+export function vaultImageFileUrl(imageId: string, size?: number): string {
   const id = safeStringable(imageId).trim();
   if (!id) return "";
   const base = API_ENDPOINTS.PURE.replace(/\/$/, "");
-  return `${base}/images/${id}/file`;
+  const query = size ? `?size=${Math.ceil(size)}` : "";
+  return `${base}/images/${id}/file${query}`;
 }